@@ -1,10 +1,628 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import json
+import csv
+import multiprocessing
+import os
+import re
+import sqlite3
+import time
+from bisect import bisect_left
 # To use the drag-and-drop feature, this library must be installed:
 # pip install tkinterdnd2
 import tkinterdnd2
-import re
+
+# GUI-free logic (loading, saving, TXT export/import, replace) shared with the command line tools.
+from i2editor import cache, checks, core, diff, exchange, filters, instrument, journal, pretranslate
+from i2editor.history import EditHistory, Edit
+from i2editor.replace import build_pattern, plan_replacements, replace_text
+from i2editor.search import SearchIndexes
+from i2editor.tasks import BackgroundTask
+from i2editor.tm import TranslationMemory, language_ids
+from i2editor.unity import UnityDocument
+from i2editor.workspace import Workspace, load_workspace
+
+class VirtualTable(ttk.Frame):
+    """
+    A Treeview wrapper that only renders the rows currently visible on screen.
+
+    The table keeps an in-memory model (a sequence of row ids, in display order) and a small pool
+    of Treeview items, one per visible line. Scrolling does not insert or delete rows; it only
+    rewrites the values of the pooled items, so the cost of a refresh is proportional to the
+    number of visible rows rather than the total number of terms.
+    """
+    def __init__(self, master, columns, row_values, on_select=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.row_values = row_values  # Callable returning the tuple of column values for a row id.
+        self.on_select = on_select  # Called when the user selects a different row.
+
+        self.rows = range(0)  # The model: row ids in display order.
+        self.offset = 0  # Position (in self.rows) of the first rendered row.
+        self.page_size = 1  # Number of rows that fit in the visible area.
+        self.selected_position = None  # Position (in self.rows) of the selected row.
+        self._items = []  # Pool of Treeview item ids, one per visible line.
+        self._item_lines = {}  # Treeview item id -> line of the pool, so events resolve their row without widget calls.
+        self._positions = None  # Lazily built row id -> position map for non-range models.
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Configure>", self._on_configure)
+        # Mouse wheel on Windows/macOS and on X11 respectively.
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self._scroll_by(3))
+        # Keyboard navigation has to move through the model, not through the pooled items.
+        for sequence, step in (("<Up>", -1), ("<Down>", 1)):
+            self.tree.bind(sequence, lambda event, step=step: self._move_selection(step))
+        self.tree.bind("<Prior>", lambda event: self._move_selection(-self.page_size))
+        self.tree.bind("<Next>", lambda event: self._move_selection(self.page_size))
+        self.tree.bind("<Home>", lambda event: self._move_selection(-len(self.rows)))
+        self.tree.bind("<End>", lambda event: self._move_selection(len(self.rows)))
+
+    # --- Model ---
+
+    def set_rows(self, rows):
+        """
+        Replaces the model with a new sequence of row ids and scrolls back to the top.
+        """
+        self.rows = rows
+        self._positions = None
+        self.offset = 0
+        self.selected_position = None
+        self.render()
+        if self.on_select:
+            self.on_select(None)
+
+    def update_rows(self, rows):
+        """
+        Replaces the model with a sequence that keeps the existing rows in place (e.g. one that grew while a
+        file is loading). The scroll position and the selection are preserved.
+        """
+        self.rows = rows
+        self._positions = None
+        if self.selected_position is not None and self.selected_position >= len(rows):
+            self.selected_position = None
+        self.render()
+
+    def selected_row(self):
+        """
+        Returns the row id of the selected row, or None if nothing is selected.
+        """
+        if self.selected_position is None:
+            return None
+        return self.rows[self.selected_position]
+
+    def position_of(self, row):
+        """
+        Returns the display position of a row id, or None if the row is not in the model.
+        """
+        if isinstance(self.rows, range):
+            return self.rows.index(row) if row in self.rows else None
+        if self._positions is None:
+            self._positions = {row_id: position for position, row_id in enumerate(self.rows)}
+        return self._positions.get(row)
+
+    def select_position(self, position):
+        """
+        Selects the row at the given display position, scrolls it into view and notifies the listener.
+        """
+        if not self.rows:
+            return
+        position = max(0, min(position, len(self.rows) - 1))
+        self.selected_position = position
+        self.see(position)
+        if self.on_select:
+            self.on_select(None)
+
+    def see(self, position):
+        """
+        Scrolls the view so that the given display position is visible.
+        """
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.page_size:
+            self.offset = position - self.page_size + 1
+        self.render()
+
+    def set_columns(self, columns):
+        """
+        Changes the columns of the table. Only the visible rows are rewritten, so this is as cheap as a refresh.
+        Headings and column widths have to be configured again by the caller.
+        """
+        self.tree.configure(columns=columns)
+        self.render()
+
+    # --- Rendering ---
+
+    def render(self):
+        """
+        Rewrites the pooled Treeview items with the values of the rows in the visible window.
+        """
+        total = len(self.rows)
+        self.offset = max(0, min(self.offset, total - self.page_size))
+        visible = max(0, min(self.page_size, total - self.offset))
+
+        # Grow or shrink the item pool to match the number of visible rows.
+        while len(self._items) < visible:
+            item_id = self.tree.insert("", "end")
+            self._item_lines[item_id] = len(self._items)
+            self._items.append(item_id)
+        if len(self._items) > visible:
+            self.tree.delete(*self._items[visible:])
+            for item_id in self._items[visible:]:
+                del self._item_lines[item_id]
+            del self._items[visible:]
+
+        for line, item_id in enumerate(self._items):
+            self.tree.item(item_id, values=self.row_values(self.rows[self.offset + line]))
+        instrument.count('rows_rendered', visible)
+        instrument.count('tk_calls', visible + 2)
+
+        # Re-apply the selection to whichever pooled item now shows the selected row.
+        line = None if self.selected_position is None else self.selected_position - self.offset
+        if line is not None and 0 <= line < visible:
+            self.tree.selection_set(self._items[line])
+            self.tree.focus(self._items[line])
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + visible) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def refresh(self):
+        """
+        Re-renders the visible rows, e.g. after the displayed language changed.
+        """
+        self.render()
+
+    def row_of_item(self, item_id):
+        """
+        Returns the row id shown by a Treeview item (e.g. from an event), or None.
+        """
+        line = self._item_lines.get(item_id)
+        return None if line is None else self.rows[self.offset + line]
+
+    def refresh_row(self, row):
+        """
+        Updates a single row if it is currently visible. Rows outside the window are rendered when scrolled to.
+        """
+        position = self.position_of(row)
+        if position is not None and 0 <= position - self.offset < len(self._items):
+            self.tree.item(self._items[position - self.offset], values=self.row_values(row))
+            instrument.count('rows_rendered')
+            instrument.count('tk_calls')
+
+    # --- Event handlers ---
+
+    def _on_tree_select(self, event):
+        selection = self.tree.selection()
+        line = self._item_lines.get(selection[0]) if selection else None
+        if line is None:
+            return  # Cleared by render() because the selected row scrolled out of view.
+        position = self.offset + line
+        if position != self.selected_position:
+            self.selected_position = position
+            if self.on_select:
+                self.on_select(event)
+
+    def _on_configure(self, event):
+        # The header and row heights are measured from a rendered item when one exists.
+        row_height = 20
+        header_height = 25
+        if self._items:
+            bbox = self.tree.bbox(self._items[0])
+            if bbox:
+                header_height, row_height = bbox[1], bbox[3]
+        page_size = max(1, (event.height - header_height) // max(1, row_height))
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.rows))
+            self.render()
+        elif action == "scroll":
+            step = int(amount) * (self.page_size if unit == "pages" else 1)
+            self._scroll_by(step)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS reports small raw deltas.
+        notches = event.delta // 120 or (1 if event.delta > 0 else -1)
+        self._scroll_by(-3 * notches)
+        return "break"
+
+    def _scroll_by(self, step):
+        self.offset += step
+        self.render()
+        return "break"
+
+    def _move_selection(self, step):
+        if not self.rows:
+            return "break"
+        start = self.offset if self.selected_position is None else self.selected_position
+        self.select_position(start + step)
+        return "break"
+
+
+# Number of terms the loader thread reads between two progress updates.
+LOAD_BATCH_SIZE = 2000
+# How often (in milliseconds) the GUI checks the background task queue.
+TASK_POLL_INTERVAL = 50
+# Delay (in milliseconds) after the last keystroke before search-as-you-type runs.
+LIVE_SEARCH_DELAY = 150
+# Approximate memory the undo/redo history may use before the oldest steps are dropped.
+UNDO_MEMORY_LIMIT = 64 * 1024 * 1024
+# Delay (in milliseconds) after a row is selected before the translation memory is searched.
+TM_LOOKUP_DELAY = 120
+# Number of translation memory suggestions listed for a term.
+TM_SUGGESTIONS = 8
+# Choices of the "Show" and "Sort" boxes of the filter bar (label, value for i2editor.filters.query_rows).
+VIEW_STATUSES = (("All terms", None), ("Untranslated", filters.UNTRANSLATED),
+                 ("Identical to source", filters.IDENTICAL), ("Translated", filters.TRANSLATED),
+                 ("Edited this session", filters.EDITED))
+VIEW_SORTS = (("File order", 'file'), ("Key", 'key'), ("Length", 'length'), ("Status", 'status'))
+# How often (in milliseconds) the debug panel shows the newly recorded operations.
+DEBUG_REFRESH_INTERVAL = 1000
+# The GUI checks every HEARTBEAT_INTERVAL milliseconds that its event loop is running; a check that comes
+# UI_STALL seconds late is recorded as a "ui_stall" operation (the window did not respond for that long).
+HEARTBEAT_INTERVAL = 100
+UI_STALL = 0.25
+# How often (in milliseconds) the journal of unsaved edits is written to disk (see i2editor.journal).
+JOURNAL_FLUSH_INTERVAL = 1000
+# Autosave saves the file in the background once its journal holds edits older than AUTOSAVE_INTERVAL seconds
+# or has grown to AUTOSAVE_JOURNAL_SIZE bytes, as soon as no edit was made for AUTOSAVE_IDLE seconds.
+AUTOSAVE_INTERVAL = 300
+AUTOSAVE_JOURNAL_SIZE = 1024 * 1024
+AUTOSAVE_IDLE = 2
+# With autosave off, a journal is compacted (keeping the last text of each cell) once it reaches this size.
+JOURNAL_COMPACT_SIZE = 4 * 1024 * 1024
+
+
+class ReplacePreview(tk.Toplevel):
+    """
+    Modal window listing the changes planned by Replace All. Every change is accepted by default;
+    double-clicking a row (or pressing Space) toggles it. on_apply receives the accepted changes.
+    """
+    def __init__(self, master, title, doc, changes, on_apply):
+        super().__init__(master)
+        self.title(title)
+        self.geometry("900x450")
+        self.transient(master)
+        self.doc = doc
+        self.changes = changes
+        self.on_apply = on_apply
+        self.rejected = set()  # Indices (into self.changes) of the changes the user turned off.
+
+        columns = ("apply", "#", "term", "before", "after")
+        self.table = VirtualTable(self, columns, self._row_values)
+        for column, heading, width in (("apply", "Apply", 50), ("#", "No.", 50), ("term", "Term Key", 180),
+                                       ("before", "Before", 300), ("after", "After", 300)):
+            self.table.tree.heading(column, text=heading)
+            self.table.tree.column(column, width=width, anchor='center' if width == 50 else 'w')
+        self.table.pack(expand=True, fill=tk.BOTH, padx=10, pady=(10, 0))
+        self.table.tree.bind("<Double-1>", lambda event: self.toggle())
+        self.table.tree.bind("<space>", lambda event: self.toggle())
+
+        buttons = ttk.Frame(self, padding="10")
+        buttons.pack(fill=tk.X)
+        self.summary = ttk.Label(buttons, text="")
+        self.summary.pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Cancel", command=self.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons, text="Apply", command=self.apply).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons, text="Reject All", command=lambda: self._set_all(False)).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons, text="Accept All", command=lambda: self._set_all(True)).pack(side=tk.RIGHT, padx=5)
+
+        self.table.set_rows(range(len(changes)))
+        self._update_summary()
+        self.grab_set()
+
+    def _row_values(self, index):
+        change = self.changes[index]
+        preview = lambda text: text.replace('\n', ' ').replace('\r', ' ').strip()
+        return ("\u2718" if index in self.rejected else "\u2714", change.row + 1, self.doc.key(change.row),
+                preview(change.old_text), preview(change.new_text))
+
+    def toggle(self):
+        index = self.table.selected_row()
+        if index is None:
+            return "break"
+        self.rejected.symmetric_difference_update({index})
+        self.table.refresh_row(index)
+        self._update_summary()
+        return "break"
+
+    def _set_all(self, accepted):
+        self.rejected = set() if accepted else set(range(len(self.changes)))
+        self.table.refresh()
+        self._update_summary()
+
+    def _update_summary(self):
+        accepted = len(self.changes) - len(self.rejected)
+        self.summary.config(text=f"{accepted} of {len(self.changes)} change(s) will be applied.")
+
+    def apply(self):
+        accepted = [change for index, change in enumerate(self.changes) if index not in self.rejected]
+        self.destroy()
+        self.on_apply(accepted)
+
+
+class DiffWindow(tk.Toplevel):
+    """
+    Lists the differences found by Compare or Merge. A check box per kind of change filters the list;
+    double-clicking a change calls on_open(change), which shows the term in the main table.
+    """
+    def __init__(self, master, title, changes, old, new, lang_index, language_name, on_open):
+        super().__init__(master)
+        self.title(title)
+        self.geometry("1000x450")
+        self.changes = changes
+        self.old = old
+        self.new = new
+        self.lang_index = lang_index  # Language shown for changes that don't name one (added/removed terms).
+        self.language_name = language_name
+        self.on_open = on_open
+
+        filters = ttk.Frame(self, padding=(10, 10, 10, 0))
+        filters.pack(fill=tk.X)
+        ttk.Label(filters, text="Show:").pack(side=tk.LEFT)
+        counts = {kind: 0 for kind in diff.KINDS}
+        for change in changes:
+            counts[change.kind] += 1
+        self.kind_vars = {}
+        for kind in diff.KINDS:
+            if counts[kind]:
+                self.kind_vars[kind] = tk.BooleanVar(value=True)
+                ttk.Checkbutton(filters, text=f"{kind.capitalize()} ({counts[kind]})", variable=self.kind_vars[kind],
+                                command=self.apply_filters).pack(side=tk.LEFT, padx=5)
+
+        columns = ("change", "#", "term", "language", "old", "new")
+        self.table = VirtualTable(self, columns, self._row_values)
+        for column, heading, width in (("change", "Change", 130), ("#", "No.", 50), ("term", "Term Key", 180),
+                                       ("language", "Language", 120), ("old", "Old Text", 250), ("new", "New Text", 250)):
+            self.table.tree.heading(column, text=heading)
+            self.table.tree.column(column, width=width, anchor='center' if width == 50 else 'w')
+        self.table.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+        self.table.tree.bind("<Double-1>", self._open_selected)
+        self.table.tree.bind("<Return>", self._open_selected)
+        self.apply_filters()
+
+    def apply_filters(self):
+        shown = {kind for kind, variable in self.kind_vars.items() if variable.get()}
+        self.table.set_rows([index for index, change in enumerate(self.changes) if change.kind in shown])
+
+    def _row_values(self, index):
+        change = self.changes[index]
+        lang_index = change.languages[0] if change.languages else self.lang_index
+        preview = lambda doc, row: doc.text(row, lang_index).replace('\n', ' ').replace('\r', ' ').strip() if row is not None else ""
+        row = change.new_row if change.new_row is not None else change.old_row
+        return (change.kind, row + 1, change.key, self.language_name(lang_index),
+                preview(self.old, change.old_row), preview(self.new, change.new_row))
+
+    def _open_selected(self, event=None):
+        index = self.table.selected_row()
+        if index is not None:
+            self.on_open(self.changes[index])
+        return "break"
+
+
+class IssuesWindow(tk.Toplevel):
+    """
+    Lists the issues found by a checks.Checker, filtered by kind and language. The list follows the edits
+    made in the editor (see refresh); double-clicking an issue calls on_open(issue).
+    """
+    def __init__(self, master, checker, language_names, on_open):
+        super().__init__(master)
+        self.geometry("1000x450")
+        self.checker = checker
+        self.language_names = language_names
+        self.on_open = on_open
+        self.issues = []
+
+        filters = ttk.Frame(self, padding=(10, 10, 10, 0))
+        filters.pack(fill=tk.X)
+        ttk.Label(filters, text="Show:").pack(side=tk.LEFT)
+        self.kind_vars = {}
+        self.kind_buttons = {}
+        for kind in checks.KINDS:
+            self.kind_vars[kind] = tk.BooleanVar(value=kind != checks.EMPTY) # Untranslated languages would flood the list.
+            self.kind_buttons[kind] = ttk.Checkbutton(filters, variable=self.kind_vars[kind], command=self.refresh)
+            self.kind_buttons[kind].pack(side=tk.LEFT, padx=5)
+        self.language_var = tk.StringVar(value="All languages")
+        language_combo = ttk.Combobox(filters, textvariable=self.language_var, state="readonly", width=32,
+                                      values=["All languages"] + list(language_names))
+        language_combo.pack(side=tk.RIGHT)
+        language_combo.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+
+        columns = ("#", "term", "language", "issue", "detail", "text")
+        self.table = VirtualTable(self, columns, self._row_values)
+        for column, heading, width in (("#", "No.", 50), ("term", "Term Key", 180), ("language", "Language", 150),
+                                       ("issue", "Issue", 130), ("detail", "Detail", 150), ("text", "Text", 300)):
+            self.table.tree.heading(column, text=heading)
+            self.table.tree.column(column, width=width, anchor='center' if width == 50 else 'w')
+        self.table.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+        self.table.tree.bind("<Double-1>", self._open_selected)
+        self.table.tree.bind("<Return>", self._open_selected)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Rebuilds the list from the checker's current issues.
+        """
+        counts = self.checker.counts()
+        for kind, button in self.kind_buttons.items():
+            button.config(text=f"{kind.capitalize()} ({counts[kind]})")
+        shown = {kind for kind, variable in self.kind_vars.items() if variable.get()}
+        language = self.language_var.get()
+        lang_index = self.language_names.index(language) if language in self.language_names else None
+        self.issues = [issue for issue in self.checker.issues()
+                       if issue.kind in shown and (lang_index is None or issue.lang_index == lang_index)]
+        self.title(f"Translation Issues - {len(self.issues)} shown, {len(self.checker.issues())} in total")
+        self.table.set_rows(range(len(self.issues)))
+
+    def _row_values(self, index):
+        issue = self.issues[index]
+        doc = self.checker.doc
+        language = self.language_names[issue.lang_index] if issue.lang_index < len(self.language_names) else f"Language {issue.lang_index + 1}"
+        text = doc.text(issue.row, issue.lang_index).replace('\n', ' ').replace('\r', ' ').strip()
+        return (issue.row + 1, doc.key(issue.row), language, issue.kind, issue.detail, text)
+
+    def _open_selected(self, event=None):
+        index = self.table.selected_row()
+        if index is not None:
+            self.on_open(self.issues[index])
+
+
+class PreTranslateDialog(tk.Toplevel):
+    """
+    Asks how to pre-translate the edited language: the source language, the backend (the translation memory
+    or a glossary file) and which terms to fill. on_start(source_index, backend, overwrite, shown_only) is
+    called when the user confirms.
+    """
+    def __init__(self, master, language_name, language_names, source_index, on_start):
+        super().__init__(master)
+        self.title(f"Pre-translate {language_name}")
+        self.transient(master)
+        self.resizable(False, False)
+        self.language_names = language_names
+        self.on_start = on_start
+
+        frame = ttk.Frame(self, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text="Translate from:").grid(row=0, column=0, sticky='w', pady=2)
+        self.source_var = tk.StringVar(value=language_names[source_index])
+        ttk.Combobox(frame, textvariable=self.source_var, values=language_names, state="readonly",
+                     width=40).grid(row=0, column=1, columnspan=2, sticky='w', pady=2)
+
+        self.backend_var = tk.StringVar(value="memory")
+        ttk.Radiobutton(frame, text="Translation memory (exact matches)", variable=self.backend_var,
+                        value="memory").grid(row=1, column=0, columnspan=3, sticky='w', pady=(8, 2))
+        ttk.Radiobutton(frame, text="Glossary file (JSON, CSV or TSV):", variable=self.backend_var,
+                        value="glossary").grid(row=2, column=0, sticky='w', pady=2)
+        self.glossary_entry = ttk.Entry(frame, width=40)
+        self.glossary_entry.grid(row=2, column=1, sticky='w', pady=2)
+        ttk.Button(frame, text="Browse...", command=self._browse).grid(row=2, column=2, padx=(5, 0), pady=2)
+
+        self.overwrite_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Also replace existing translations", variable=self.overwrite_var).grid(
+            row=3, column=0, columnspan=3, sticky='w', pady=(8, 2))
+        self.shown_only_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Only the terms shown in the table", variable=self.shown_only_var).grid(
+            row=4, column=0, columnspan=3, sticky='w', pady=2)
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=5, column=0, columnspan=3, sticky='e', pady=(10, 0))
+        ttk.Button(buttons, text="Pre-translate", command=self.start).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Cancel", command=self.destroy).pack(side=tk.LEFT)
+
+    def _browse(self):
+        filepath = filedialog.askopenfilename(parent=self, title="Select Glossary",
+                                              filetypes=[("Glossaries", "*.json *.csv *.tsv *.txt"), ("All files", "*.*")])
+        if filepath:
+            self.glossary_entry.delete(0, "end")
+            self.glossary_entry.insert(0, filepath)
+            self.backend_var.set("glossary")
+
+    def start(self):
+        if self.backend_var.get() == "glossary":
+            try:
+                backend = pretranslate.DictionaryBackend.from_file(self.glossary_entry.get())
+            except (ValueError, OSError, csv.Error) as e:
+                messagebox.showerror("Glossary", f"Could not read the glossary: {e}", parent=self)
+                return
+        else:
+            backend = pretranslate.TranslationMemoryBackend()
+        source_index = self.language_names.index(self.source_var.get())
+        self.destroy()
+        self.on_start(source_index, backend, self.overwrite_var.get(), self.shown_only_var.get())
+
+
+class DebugWindow(tk.Toplevel):
+    """
+    Shows the recent operations recorded by i2editor.instrument (newest first), their totals and the
+    counters, refreshed while the window is open. The report can be saved to attach to a bug report.
+    """
+    def __init__(self, master, on_close):
+        super().__init__(master)
+        self.title("Debug Panel")
+        self.geometry("900x500")
+        self.on_close = on_close
+        self.operations = []
+        self._last_count = None
+        self._refresh_job = None
+
+        columns = ("time", "ms", "operation", "detail", "thread")
+        self.table = VirtualTable(self, columns, self._row_values)
+        for column, heading, width in (("time", "Time", 80), ("ms", "ms", 80), ("operation", "Operation", 160),
+                                       ("detail", "Detail", 380), ("thread", "Thread", 140)):
+            self.table.tree.heading(column, text=heading)
+            self.table.tree.column(column, width=width, anchor='e' if column == "ms" else 'w')
+        self.table.pack(expand=True, fill=tk.BOTH, padx=10, pady=(10, 5))
+
+        self.summary = tk.Text(self, height=10, wrap="none", state="disabled", background="#f0f0f0")
+        self.summary.pack(fill=tk.X, padx=10)
+        buttons = ttk.Frame(self, padding=10)
+        buttons.pack(fill=tk.X)
+        ttk.Button(buttons, text="Save Report...", command=self.save_report).pack(side=tk.RIGHT)
+        ttk.Button(buttons, text="Reset", command=self.reset).pack(side=tk.RIGHT, padx=5)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Reloads the operations if new ones were recorded, and schedules the next refresh.
+        """
+        operations = instrument.recent()
+        if len(operations) != self._last_count or (operations and operations[-1] is not self.operations[0]):
+            self.operations = operations[::-1]
+            self._last_count = len(operations)
+            self.table.update_rows(range(len(self.operations)))
+            lines = [f"{name}: {calls} call(s), {total:.3f} s in total, longest {longest * 1000:.1f} ms"
+                     for name, (calls, total, longest) in sorted(instrument.totals().items(), key=lambda item: -item[1][1])]
+            lines += [f"{name}: {value}" for name, value in sorted(instrument.counters().items())]
+            self.summary.config(state="normal")
+            self.summary.delete("1.0", "end")
+            self.summary.insert("1.0", "\n".join(lines))
+            self.summary.config(state="disabled")
+        self._refresh_job = self.after(DEBUG_REFRESH_INTERVAL, self.refresh)
+
+    def _row_values(self, index):
+        operation = self.operations[index]
+        started = time.strftime('%H:%M:%S', time.localtime(operation.started))
+        return (started, f"{operation.seconds * 1000:.1f}", operation.name, operation.detail, operation.thread)
+
+    def reset(self):
+        instrument.reset()
+        self.operations = []
+        self._last_count = None
+        # Render the emptied buffers now instead of at the next scheduled refresh.
+        if self._refresh_job:
+            self.after_cancel(self._refresh_job)
+        self.refresh()
+
+    def save_report(self):
+        filepath = filedialog.asksaveasfilename(parent=self, title="Save Debug Report", defaultextension=".txt",
+                                                filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if not filepath:
+            return
+        try:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(instrument.format_report(limit=instrument.RECENT_OPERATIONS) + "\n")
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save the report: {e}", parent=self)
+
+    def close(self):
+        if self._refresh_job:
+            self.after_cancel(self._refresh_job)
+        self.destroy()
+        self.on_close()
+        return "break"
+
 
 # We inherit from tkinterdnd2.TkinterDnD.Tk for the most reliable drag-and-drop functionality.
 class I2Editor(tkinterdnd2.TkinterDnD.Tk):
@@ -16,19 +634,46 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         self.geometry("1100x700")
 
         # --- Application state variables ---
-        self.data = None  # Holds the entire loaded JSON data structure.
+        self.doc = None  # The loaded I2Languages document (see i2editor.core.I2Document).
+        self.task = None  # The BackgroundTask (loading or saving) that is currently running, if any.
+        self.search_indexes = None  # Per-language full-text search indexes of the loaded document.
+        self._live_search_job = None  # Pending after() id of the search-as-you-type update.
+        self.find_all_window = None  # The "Find All" results window, while it is open.
+        self.find_all_results = None  # The VirtualTable listing the results in that window.
+        self.history = EditHistory(max_bytes=UNDO_MEMORY_LIMIT)  # Undo/redo log of the edits made to the document.
+        self.reference_language_indices = []  # Languages shown next to the edited one (e.g. the source language).
+        self.reference_vars = []  # One BooleanVar per language for the View menu.
         self.current_filepath = None  # Stores the path to the currently open file.
-        self.term_to_tree_item = {}  # A dictionary to quickly find a treeview item by its term key.
-        self.term_to_original_index = {} # Maps a term key to its original index in the JSON array.
-        self.terms_list_ref = None  # A direct reference to the list of terms in the loaded JSON.
+        self.term_index = None # Term key -> rows of the document (see i2editor.core.TermIndex); keys may repeat.
+        self.tm = self._open_translation_memory()  # Translation memory of every file opened so far (None if unavailable).
+        self.tm_task = None  # BackgroundTask adding the open file(s) to the translation memory.
+        self.tm_suggestions = {}  # Suggestion list item id -> i2editor.tm.Suggestion.
+        self.checker = None  # Tag/placeholder/empty checks of the document (see i2editor.checks), once run.
+        self.unchecked_cells = set()  # (row, lang_index) edited while the first check was running.
+        self.issues_window = None  # The IssuesWindow, while it is open.
+        self._tm_lookup_job = None  # Pending after() id of the suggestion lookup for the selected row.
+        self.session_edits = {}  # Language index -> rows edited in this session (for the "Edited" filter).
+        self.key_tree = None  # Sorted term keys of the document (see i2editor.filters.KeyTree), built when needed.
+        self.key_prefix = ""  # Key category selected in the category panel ("" for every term).
+        self.category_prefixes = {}  # Category panel item id -> key prefix.
+        self._filter_job = None  # Pending after() id of the filter-as-you-type update.
+        self.debug_window = None  # The DebugWindow, while it is open.
+        self.profiler = None  # The running instrument.Profiler, while profiling is on.
+        self._heartbeat_time = None  # When the last event loop heartbeat ran (time.perf_counter()).
+        self.journals = {}  # File path -> journal.Journal of the unsaved edits of that file.
+        self._last_edit_time = 0  # When the last edit was made (time.time()), so autosave waits for a pause.
+        self._next_autosave = 0  # Autosave doesn't start again before this time (e.g. after a failed save).
+        self._recover_on_load = False  # Restore the journaled edits of the file being opened without asking.
         
-        # Variable to store the key of the term currently being edited in the Text widget.
-        self.currently_editing_term_key = None
+        # The row (position in the terms array) of the term currently being edited in the Text widget.
+        self.currently_editing_row = None
         
         # List of language names detected from the file.
         self.language_names = []
         # The index of the language we guess is English, for user convenience.
         self.detected_english_index = None
+        # Language index used by the table when rendering rows (cached so rendering doesn't re-read the combobox).
+        self.view_language_index = None
 
         # --- Build the user interface ---
         self._create_widgets()
@@ -37,6 +682,9 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         # This allows the on_drop function to be called when a file is dropped onto the window.
         self.drop_target_register('DND_FILES')
         self.dnd_bind('<<Drop>>', self.on_drop)
+        self._heartbeat()
+        self.after(JOURNAL_FLUSH_INTERVAL, self._journal_tick)
+        self.after_idle(self._offer_recovery)
 
     def _create_widgets(self):
         # --- Top Menu Bar ---
@@ -48,11 +696,37 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         file_menu.add_command(label="Open...", command=self.open_file_dialog, accelerator="Ctrl+O")
         file_menu.add_command(label="Save", command=self.save_file, accelerator="Ctrl+S")
         file_menu.add_command(label="Save As...", command=self.save_file_as, accelerator="Ctrl+Shift+S")
+        self.autosave_var = tk.BooleanVar(value=False)  # Opt-in: saving overwrites the file without asking.
+        file_menu.add_checkbutton(label="Autosave", variable=self.autosave_var)
         file_menu.add_separator()
         file_menu.add_command(label="Export to TXT...", command=self.export_to_txt)
         file_menu.add_command(label="Import from TXT...", command=self.import_from_txt)
+        file_menu.add_command(label="Export to CSV/TSV/XLIFF/PO...", command=self.export_exchange)
+        file_menu.add_command(label="Import from CSV/TSV/XLIFF/PO...", command=self.import_exchange)
+        file_menu.add_separator()
+        file_menu.add_command(label="Compare With File...", command=self.compare_with_file)
+        file_menu.add_command(label="Merge Into Updated File...", command=self.merge_into_update)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.quit)
+        file_menu.add_command(label="Exit", command=self.on_close)
+
+        self.edit_menu = tk.Menu(self.menu, tearoff=0)
+        self.menu.add_cascade(label="Edit", menu=self.edit_menu)
+        self.edit_menu.add_command(label="Undo", command=self.undo, accelerator="Ctrl+Z", state="disabled")
+        self.edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y", state="disabled")
+
+        # Languages to show as extra columns beside the edited one; filled in when a file is opened.
+        self.view_menu = tk.Menu(self.menu, tearoff=0)
+        self.menu.add_cascade(label="View", menu=self.view_menu)
+
+        tools_menu = tk.Menu(self.menu, tearoff=0)
+        self.menu.add_cascade(label="Tools", menu=tools_menu)
+        tools_menu.add_command(label="Check Translations...", command=self.show_issues)
+        tools_menu.add_command(label="Pre-translate...", command=self.show_pretranslate)
+        tools_menu.add_separator()
+        tools_menu.add_command(label="Debug Panel...", command=self.show_debug_panel)
+        self.profiling_var = tk.BooleanVar(value=False)
+        tools_menu.add_checkbutton(label="Profile with cProfile", variable=self.profiling_var,
+                                   command=self.toggle_profiling)
         
         # --- Top Toolbar Frame (for language selection and search) ---
         top_frame = ttk.Frame(self, padding="10")
@@ -60,7 +734,7 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
 
         ttk.Label(top_frame, text="Select Language:").pack(side=tk.LEFT, padx=(0, 5))
         self.language_var = tk.StringVar()
-        self.language_combo = ttk.Combobox(top_frame, textvariable=self.language_var, 
+        self.language_combo = ttk.Combobox(top_frame, textvariable=self.language_var, width=32,
                                            values=[], state="disabled")
         self.language_combo.pack(side=tk.LEFT, padx=5)
         self.language_combo.bind("<<ComboboxSelected>>", self.on_language_change)
@@ -72,7 +746,12 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         ttk.Label(search_frame, text="Find:").grid(row=0, column=0, padx=5, pady=2, sticky='w')
         self.search_entry = ttk.Entry(search_frame)
         self.search_entry.grid(row=0, column=1, padx=5, pady=2)
+        self.search_entry.bind("<KeyRelease>", self._schedule_live_search)
+        self.search_entry.bind("<Return>", lambda event: self.find_next())
         ttk.Button(search_frame, text="Find Next", command=self.find_next).grid(row=0, column=2, padx=5, pady=2)
+        ttk.Button(search_frame, text="Find All", command=self.find_all).grid(row=0, column=3, padx=5, pady=2)
+        self.match_count_label = ttk.Label(search_frame, text="", width=14)
+        self.match_count_label.grid(row=0, column=4, padx=5, pady=2, sticky='w')
 
         ttk.Label(search_frame, text="Replace:").grid(row=1, column=0, padx=5, pady=2, sticky='w')
         self.replace_entry = ttk.Entry(search_frame)
@@ -80,6 +759,46 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         ttk.Button(search_frame, text="Replace", command=self.replace_selected).grid(row=1, column=2, padx=5, pady=2)
         ttk.Button(search_frame, text="Replace All", command=self.replace_all).grid(row=1, column=3, padx=5, pady=2)
 
+        # Matching options shared by Find, Replace and Replace All.
+        options_frame = ttk.Frame(search_frame)
+        options_frame.grid(row=2, column=1, columnspan=4, sticky='w')
+        self.regex_var = tk.BooleanVar(value=False)
+        self.whole_word_var = tk.BooleanVar(value=False)
+        self.match_case_var = tk.BooleanVar(value=False)
+        for text, variable in (("Regex", self.regex_var), ("Whole word", self.whole_word_var), ("Match case", self.match_case_var)):
+            ttk.Checkbutton(options_frame, text=text, variable=variable,
+                            command=lambda: self._update_live_search(move_selection=False)).pack(side=tk.LEFT, padx=5)
+
+        # --- Filter bar: which terms the table shows, and in which order ---
+        filter_frame = ttk.Frame(self, padding=(10, 0, 10, 0))
+        filter_frame.pack(fill=tk.X)
+        ttk.Label(filter_frame, text="Show:").pack(side=tk.LEFT, padx=(0, 5))
+        self.view_status_var = tk.StringVar(value=VIEW_STATUSES[0][0])
+        status_combo = ttk.Combobox(filter_frame, textvariable=self.view_status_var, width=20, state="readonly",
+                                    values=[label for label, _ in VIEW_STATUSES])
+        status_combo.pack(side=tk.LEFT, padx=5)
+        status_combo.bind("<<ComboboxSelected>>", self.apply_view_filter)
+
+        ttk.Label(filter_frame, text="Filter (regex):").pack(side=tk.LEFT, padx=(15, 5))
+        self.filter_entry = ttk.Entry(filter_frame, width=30)
+        self.filter_entry.pack(side=tk.LEFT, padx=5)
+        self.filter_entry.bind("<KeyRelease>", self._schedule_view_filter)
+        self.filter_keys_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="Keys", variable=self.filter_keys_var,
+                        command=self.apply_view_filter).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(filter_frame, text="Sort:").pack(side=tk.LEFT, padx=(15, 5))
+        self.view_sort_var = tk.StringVar(value=VIEW_SORTS[0][0])
+        sort_combo = ttk.Combobox(filter_frame, textvariable=self.view_sort_var, width=12, state="readonly",
+                                  values=[label for label, _ in VIEW_SORTS])
+        sort_combo.pack(side=tk.LEFT, padx=5)
+        sort_combo.bind("<<ComboboxSelected>>", self.apply_view_filter)
+        self.sort_descending_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="Descending", variable=self.sort_descending_var,
+                        command=self.apply_view_filter).pack(side=tk.LEFT, padx=5)
+        self.filter_count_label = ttk.Label(filter_frame, text="")
+        self.filter_count_label.pack(side=tk.RIGHT, padx=5)
+
         # Use a PanedWindow to create a resizable split between the table and the editor.
         main_pane = ttk.PanedWindow(self, orient=tk.VERTICAL)
         main_pane.pack(expand=True, fill=tk.BOTH, padx=10, pady=(0, 10))
@@ -88,29 +807,33 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         tree_frame = ttk.Frame(main_pane, padding=(0, 10, 0, 0))
         main_pane.add(tree_frame, weight=3) # Give the table more space by default.
         
+        # Key categories ("UI/", "UI/Menu/") on the left of the table; a category's children are listed when it is opened.
+        table_pane = ttk.PanedWindow(tree_frame, orient=tk.HORIZONTAL)
+        table_pane.pack(expand=True, fill=tk.BOTH)
+        self.category_tree = ttk.Treeview(table_pane, columns=("count",), selectmode="browse")
+        self.category_tree.heading("#0", text="Categories")
+        self.category_tree.heading("count", text="Terms")
+        self.category_tree.column("#0", width=180)
+        self.category_tree.column("count", width=60, stretch=False, anchor="e")
+        self.category_tree.bind("<<TreeviewOpen>>", self._on_category_open)
+        self.category_tree.bind("<<TreeviewSelect>>", self._on_category_select)
+        table_pane.add(self.category_tree, weight=0)
+
+        # The table is virtualized: only the visible rows exist as Treeview items.
         columns = ("#", "term", "text")
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
-        self.tree.heading("#", text="No.")
-        self.tree.heading("term", text="Term Key")
-        self.tree.heading("text", text="Translation Text (Preview)")
-        
-        self.tree.column("#", width=50, anchor='center')
-        self.tree.column("term", width=300)
-        self.tree.column("text", width=650)
-        
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
-        
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
-        
-        # Bind the selection event to update the text editor below.
-        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.table = VirtualTable(table_pane, columns, self._row_values, on_select=self.on_tree_select)
+        table_pane.add(self.table, weight=1)
+        self.tree = self.table.tree
 
         # --- Bottom Frame for the full text editor ---
         editor_frame = ttk.LabelFrame(main_pane, text="Full Text Editor", padding="10")
         main_pane.add(editor_frame, weight=1) # Give the editor less space by default.
 
+        # Read-only full text of the reference languages, shown left of the editor while any are selected.
+        self.reference_text = tk.Text(editor_frame, wrap="word", height=10, width=50, state="disabled",
+                                      background="#f0f0f0")
+        self.reference_text.tag_configure("language", font=("TkDefaultFont", 9, "bold"))
+
         self.editor_text = tk.Text(editor_frame, wrap="word", height=10, width=80, undo=True)
         self.editor_text.pack(expand=True, fill="both", side="left", padx=(0, 10))
         self.editor_text.config(state="disabled") # Disable until an item is selected.
@@ -122,125 +845,481 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         self.save_button = ttk.Button(editor_frame, text="Save Changes", command=self.save_from_editor, state="disabled")
         self.save_button.pack(pady=10, anchor="n")
 
+        # --- Translation memory suggestions for the selected term (double-click one to use it) ---
+        tm_frame = ttk.LabelFrame(main_pane, text="Translation Memory", padding="5")
+        main_pane.add(tm_frame, weight=1)
+        self.tm_tree = ttk.Treeview(tm_frame, columns=("score", "source", "translation"), show="headings",
+                                    selectmode="browse", height=4)
+        self.tm_tree.heading("score", text="Match")
+        self.tm_tree.heading("source", text="Source")
+        self.tm_tree.heading("translation", text="Translation")
+        self.tm_tree.column("score", width=60, stretch=False, anchor="e")
+        self.tm_tree.column("source", width=400)
+        self.tm_tree.column("translation", width=400)
+        self.tm_tree.pack(expand=True, fill=tk.BOTH)
+        self.tm_tree.bind("<Double-1>", self.use_suggestion)
+        self.tm_tree.bind("<Return>", self.use_suggestion)
+
+        # Headings of the table (and the reference pane) depend on the languages shown.
+        self._configure_columns()
+
         # --- Bottom Status Bar ---
-        self.status_bar = ttk.Label(self, text="Open an I2Languages JSON file to begin, or drag & drop a file here.", relief=tk.SUNKEN, anchor='w')
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        status_frame = ttk.Frame(self)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_bar = ttk.Label(status_frame, text="Open an I2Languages JSON file to begin, or drag & drop a file here.", relief=tk.SUNKEN, anchor='w')
+        self.status_bar.pack(side=tk.LEFT, expand=True, fill=tk.X)
+
+        # Progress indicator and cancel action for background loading/saving (hidden while idle).
+        self.cancel_button = ttk.Button(status_frame, text="Cancel", command=self.cancel_task)
+        self.progress_bar = ttk.Progressbar(status_frame, orient=tk.HORIZONTAL, length=200, mode="determinate", maximum=100)
         
         # --- Bind keyboard shortcuts ---
         self.bind("<Control-o>", lambda event: self.open_file_dialog())
         self.bind("<Control-s>", lambda event: self.save_file())
         self.bind("<Control-S>", lambda event: self.save_file_as()) # Capital S for Shift+S
+        self.bind("<Control-z>", self._on_undo_key)
+        self.bind("<Control-y>", self._on_redo_key)
+        self.bind("<Control-Z>", self._on_redo_key) # Ctrl+Shift+Z
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def on_tree_select(self, event):
         """
         Called when a user selects a row in the treeview.
         It populates the text editor with the full translation text for the selected term.
         """
-        selected_items = self.tree.selection()
-        if not selected_items:
+        row = self.table.selected_row()
+        if row is None or not self.doc or self._task_running("load"):
             # If nothing is selected (e.g., on clear), disable the editor.
             self.editor_text.config(state="normal")
             self.editor_text.delete("1.0", "end")
             self.editor_text.config(state="disabled")
             self.save_button.config(state="disabled")
-            self.currently_editing_term_key = None
+            self.currently_editing_row = None
+            self._show_reference_texts(None)
+            self._schedule_suggestions(None)
             return
 
-        # Get the term key from the selected treeview item.
-        item_id = selected_items[0]
-        item_values = self.tree.item(item_id, "values")
-        term_key = item_values[1]
-        
-        # Get the full original text from our main data structure, not the treeview preview.
+        # The table model holds row ids, so the term is identified by its row even when its key is duplicated.
+        # The full original text comes from our main data structure, not the treeview preview.
         lang_index = self._get_selected_language_index()
-        original_index = self.term_to_original_index.get(term_key)
-
-        if lang_index is None or original_index is None:
+        if lang_index is None:
             return # Exit if data is not ready.
 
-        try:
-            full_text = self.terms_list_ref[original_index]['Languages']['Array'][lang_index]
-        except (KeyError, IndexError):
-            full_text = "" # Handle cases where a translation is missing.
+        full_text = self.doc.text(row, lang_index) # Missing translations come back as "".
 
         # Update the text editor widget.
         self.editor_text.config(state="normal")
         self.editor_text.delete("1.0", "end")
         self.editor_text.insert("1.0", full_text)
         self.save_button.config(state="normal")
-        self.currently_editing_term_key = term_key # Remember which term we are editing.
+        self.currently_editing_row = row # Remember which term we are editing.
+        self._show_reference_texts(row)
+        self._schedule_suggestions(row)
+
+    def _show_reference_texts(self, row):
+        """
+        Fills the reference pane with the full text of every reference language for a row (or clears it).
+        """
+        self.reference_text.config(state="normal")
+        self.reference_text.delete("1.0", "end")
+        if row is not None:
+            for lang_index in self._visible_reference_indices():
+                self.reference_text.insert("end", self._language_name(lang_index) + "\n", "language")
+                self.reference_text.insert("end", self.doc.text(row, lang_index) + "\n\n")
+        self.reference_text.config(state="disabled")
+
+    # --- Translation memory ---
+
+    def _open_translation_memory(self):
+        """
+        Opens the translation memory shared by all sessions. Suggestions are disabled if it can't be opened.
+        """
+        try:
+            return TranslationMemory()
+        except (sqlite3.Error, OSError) as e:
+            # Called before the status bar exists; the message is shown once the window is built.
+            message = f"Translation memory unavailable, suggestions are disabled: {e}"
+            self.after_idle(lambda: self.status_bar.config(text=message))
+            return None
+
+    def _update_translation_memory(self):
+        """
+        Adds the open file (or every file of the workspace) to the translation memory in a background thread.
+        Files that are already in the memory and unchanged on disk are skipped.
+        """
+        if self.tm is None or self.doc is None:
+            return
+        if self.tm_task:
+            self.tm_task.cancel()
+        documents = self.doc.documents if isinstance(self.doc, Workspace) else [self.doc]
+
+        # The worker uses its own connection; SQLite connections can't be shared between threads.
+        def add(task, tm_path, documents):
+            def progress(done, total):
+                task.check_cancelled()
+            added = 0
+            with TranslationMemory(tm_path) as memory:
+                for document in documents:
+                    if document.path and not memory.is_current(document.path):
+                        memory.add_document(document, progress=progress)
+                        added += 1
+            return added
+
+        self.tm_task = BackgroundTask("tm", add, self.tm.path, documents).start()
+        self.after(TASK_POLL_INTERVAL, self._poll_tm_task, self.tm_task)
+
+    def _poll_tm_task(self, task):
+        """
+        Waits for the translation memory update without blocking the window; shows fresh suggestions when done.
+        """
+        for kind, payload in task.poll():
+            if task is not self.tm_task:
+                continue
+            self.tm_task = None
+            if kind == 'done' and payload:
+                self._schedule_suggestions(self.currently_editing_row)
+            elif kind == 'error':
+                self.status_bar.config(text=f"Could not update the translation memory: {payload}")
+        if not task.finished:
+            self.after(TASK_POLL_INTERVAL, self._poll_tm_task, task)
+
+    def _suggestion_source_index(self, lang_index):
+        """
+        The language suggestions are looked up from: the first reference language, else the detected English one.
+        """
+        for reference_index in self._visible_reference_indices():
+            return reference_index
+        if self.detected_english_index is not None and self.detected_english_index != lang_index:
+            return self.detected_english_index
+        return None
+
+    def _schedule_suggestions(self, row):
+        """
+        Looks up suggestions for a row shortly after it is selected, so scrolling with the keys stays smooth.
+        """
+        if self._tm_lookup_job:
+            self.after_cancel(self._tm_lookup_job)
+            self._tm_lookup_job = None
+        self.tm_tree.delete(*self.tm_tree.get_children())
+        self.tm_suggestions = {}
+        if row is not None and self.tm is not None:
+            self._tm_lookup_job = self.after(TM_LOOKUP_DELAY, self._show_suggestions, row)
+
+    def _show_suggestions(self, row):
+        """
+        Lists the translation memory matches for the source text of a row, best first.
+        """
+        self._tm_lookup_job = None
+        lang_index = self._get_selected_language_index()
+        if row != self.currently_editing_row or lang_index is None:
+            return
+        source_index = self._suggestion_source_index(lang_index)
+        if source_index is None:
+            return
+        # Codes are taken from the row's own file, the way it was stored in the memory.
+        document, local_row = self.doc.locate(row) if isinstance(self.doc, Workspace) else (self.doc, row)
+        codes = language_ids(document)
+        if max(source_index, lang_index) >= len(codes):
+            return
+        try:
+            suggestions = self.tm.suggest(codes[source_index], document.text(local_row, source_index), codes[lang_index],
+                                          limit=TM_SUGGESTIONS, exclude=(document.path, document.key(local_row)))
+        except sqlite3.Error as e:
+            self.status_bar.config(text=f"Translation memory error: {e}")
+            return
+        self.tm_tree.delete(*self.tm_tree.get_children())
+        self.tm_suggestions = {}
+        for suggestion in suggestions:
+            item = self.tm_tree.insert("", "end", values=(
+                f"{suggestion.score:.0%}",
+                suggestion.source.replace('\n', ' ').replace('\r', ' ').strip(),
+                suggestion.target.replace('\n', ' ').replace('\r', ' ').strip()))
+            self.tm_suggestions[item] = suggestion
+
+    def use_suggestion(self, event=None):
+        """
+        Puts the selected suggestion into the editor. It is applied to the term with "Save Changes", as usual.
+        """
+        selection = self.tm_tree.selection()
+        if not selection or self.currently_editing_row is None or selection[0] not in self.tm_suggestions:
+            return
+        suggestion = self.tm_suggestions[selection[0]]
+        self.editor_text.delete("1.0", "end")
+        self.editor_text.insert("1.0", suggestion.target)
+        self.status_bar.config(text=f"Suggestion from {suggestion.key} ({suggestion.origin.split('/')[-1]}) inserted; "
+                                    "click Save Changes to keep it.")
 
     def save_from_editor(self):
         """
         Saves the text from the editor back into the main data structure and updates the treeview.
         """
-        if not self.currently_editing_term_key:
+        if self.currently_editing_row is None:
+            return
+        if self._task_running("save"):
+            self.status_bar.config(text="Please wait until the file has been saved.")
             return
         
         new_text = self.editor_text.get("1.0", "end-1c") # Get text, excluding the final newline.
-        self.update_data_and_tree(self.currently_editing_term_key, new_text)
-        self.status_bar.config(text=f"Saved changes for term: {self.currently_editing_term_key}")
+        self.update_data_and_tree(self.currently_editing_row, new_text)
+        self.editor_text.edit_reset() # The change is now undone with Edit > Undo, not by the text widget.
+        self.status_bar.config(text=f"Saved changes for term: {self.doc.key(self.currently_editing_row)}")
 
     def on_drop(self, event):
         """
-        Handles the file drop event. It cleans the file path and loads the file.
+        Handles the file drop event. It cleans the file paths and loads the file (or all files as a workspace).
         """
         try:
-            # The event.data contains the file path, which might be wrapped in curly braces on Windows.
-            filepath = self.tk.splitlist(event.data)[0]
-            if filepath.startswith('{') and filepath.endswith('}'):
-                filepath = filepath[1:-1]
-            
-            self.load_file_logic(filepath)
+            # The event.data contains the file paths, which might be wrapped in curly braces on Windows.
+            filepaths = []
+            for filepath in self.tk.splitlist(event.data):
+                if filepath.startswith('{') and filepath.endswith('}'):
+                    filepath = filepath[1:-1]
+                filepaths.append(filepath)
+
+            if len(filepaths) > 1:
+                self.load_workspace_logic(filepaths)
+            else:
+                self.load_file_logic(filepaths[0])
         except Exception as e:
             messagebox.showerror("Drag & Drop Error", f"Could not open the dropped file.\n\nError: {e}")
             self.status_bar.config(text="Drag & drop failed.")
 
+    # File types offered wherever a document is opened: JSON dumps and Unity dumps (see i2editor.unity).
+    DOCUMENT_FILETYPES = [("JSON files", "*.json"), ("Unity dumps", "*.txt *.dat"), ("All files", "*.*")]
+
     def open_file_dialog(self):
         """
-        Opens a standard file dialog to select a JSON file.
+        Opens a standard file dialog to select one JSON file (or Unity dump), or several to edit them together
+        as a workspace.
         """
-        filepath = filedialog.askopenfilename(
-            title="Open I2Languages JSON File",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        filepaths = filedialog.askopenfilenames(
+            title="Open I2Languages JSON File(s)",
+            filetypes=self.DOCUMENT_FILETYPES
         )
-        if not filepath:
+        if not filepaths:
             return
-        self.load_file_logic(filepath)
+        if len(filepaths) > 1:
+            self.load_workspace_logic(list(filepaths))
+        else:
+            self.load_file_logic(filepaths[0])
 
     def load_file_logic(self, filepath):
         """
         The core logic for loading and parsing the I2Languages JSON file.
+        The file is streamed (see core.StreamingLoader) in a worker thread; batches of terms are shown in the
+        table as they arrive, so the window keeps responding and the load can be cancelled.
         """
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
-            
-            # The terms data can be in a few different nested structures. This code checks common locations.
-            self.terms_list_ref = None
-            if 'mSource' in self.data and isinstance(self.data.get('mSource'), dict) and 'mTerms' in self.data['mSource']:
-                self.terms_list_ref = self.data['mSource']['mTerms'].get('Array')
-            elif 'mTerms' in self.data and isinstance(self.data.get('mTerms'), dict):
-                 self.terms_list_ref = self.data['mTerms'].get('Array')
-            
-            if self.terms_list_ref is None:
-                raise ValueError("Invalid I2Languages file structure. Could not find the 'mTerms' array.")
+        if not self._reset_for_load():
+            return
 
-            self.current_filepath = filepath
-            
+        def load(task, path):
+            def progress(document, bytes_read, total_bytes):
+                task.check_cancelled()
+                task.report(document, len(document), bytes_read, total_bytes)
+            # A file opened before and unchanged since is read from its binary snapshot and shown at once.
+            document = cache.read_cache(path)
+            if document is not None:
+                progress(document, 1, 1)
+            else:
+                document = core.load_document(path, progress=progress, batch_size=LOAD_BATCH_SIZE)
+                try:
+                    cache.write_cache(document)
+                except OSError:
+                    pass # The cache only speeds up the next load.
+
+            # Build the search index of the language that will be displayed while we are still off the main thread.
+            indexes = SearchIndexes(document)
+            if document.language_count:
+                _, english_index = core.detect_languages(document)
+                indexes.get(english_index or 0)
+            return document, indexes
+
+        self._start_task(BackgroundTask("load", load, filepath), self._on_load_progress, self._on_load_done,
+                         f"Loading {filepath}...")
+
+    def _reset_for_load(self):
+        """
+        Closes the current file (or workspace) before another one is loaded. Returns False if a save is running.
+        """
+        if self._task_running("save"):
+            messagebox.showwarning("Busy", "Please wait until the file has been saved.")
+            return False
+        if self.task:
+            self.task.cancel() # Abandon a file that is still loading.
+        if self.tm_task:
+            self.tm_task.cancel() # The memory keeps the files that were completely added.
+        # Unsaved edits of the file being closed stay in its journal and are offered again when it is reopened.
+        self._flush_journals()
+        self.journals = {}
+
+        self.doc = None
+        self.search_indexes = None
+        self.term_index = None
+        self.checker = None
+        if self.issues_window is not None:
+            self._close_issues()
+        self._reset_view_filter()
+        self.history.clear()
+        self._update_undo_menu()
+        self.current_filepath = None
+        self.language_names = []
+        self.table.set_rows(range(0))
+        return True
+
+    def load_workspace_logic(self, filepaths):
+        """
+        Opens several I2Languages files as one workspace. The files are parsed in parallel worker processes
+        and shown as a single table with a File column; saving writes back only the files that were edited.
+        """
+        if not self._reset_for_load():
+            return
+
+        def load(task, paths):
+            def progress(loaded, total, path):
+                task.check_cancelled()
+                task.report(loaded, total, path)
+            workspace = load_workspace(paths, progress=progress)
+            indexes = SearchIndexes(workspace)
+            if workspace.language_count:
+                _, english_index = core.detect_languages(workspace)
+                indexes.get(english_index or 0)
+            return workspace, indexes
+
+        def on_progress(task, loaded, total, path):
+            self.progress_bar.config(value=100 * loaded / max(1, total))
+            self.status_bar.config(text=f"Loading workspace... {loaded}/{total} files ({path.split('/')[-1]})")
+
+        def on_done(task, result):
+            self.doc, self.search_indexes = result
             self.detect_languages()
             self.populate_treeview()
-            self.title(f"I2Languages Editor By MrGamesKingPro - {filepath.split('/')[-1]}")
-            self.status_bar.config(text=f"File loaded: {filepath}")
-
-        except (json.JSONDecodeError, ValueError, KeyError, FileNotFoundError) as e:
-            messagebox.showerror("Error", f"Failed to open or parse file: {e}\n\nPlease make sure it's a valid I2Languages JSON file.")
-            self.data = None
-            self.current_filepath = None
-            self.terms_list_ref = None
-            self.tree.delete(*self.tree.get_children())
-            self.language_combo.config(state="disabled")
-            self.language_combo.set('')
+            self._update_live_search()
+            count = len(self.doc.documents)
+            self.title(f"I2Languages Editor By MrGamesKingPro - Workspace ({count} files)")
+            self.status_bar.config(text=f"Workspace loaded: {count} files, {len(self.doc)} terms{self._duplicate_keys_note()}")
+            self._update_translation_memory()
+            self._open_journals()
+
+        self._start_task(BackgroundTask("load", load, filepaths), on_progress, on_done,
+                         f"Loading {len(filepaths)} files...")
+
+    def _on_load_progress(self, task, document, count, bytes_read, total_bytes):
+        """
+        Shows the terms read so far. Only rows that were complete when the message was sent are displayed.
+        """
+        self.doc = document
+        if not self.language_names and document.language_count:
+            self.detect_languages() # Provisional; checked again once every term has been read.
+            self.view_language_index = self._get_selected_language_index()
+            self._configure_columns()
+        self.table.update_rows(range(count))
+        self.progress_bar.config(value=100 * bytes_read / max(1, total_bytes))
+        self.status_bar.config(text=f"Loading {task.args[0]}... {count} terms")
+
+    def _on_load_done(self, task, result):
+        filepath = task.args[0]
+        self.doc, self.search_indexes = result
+        self.current_filepath = filepath
+        if core.detect_languages(self.doc) != (self.language_names, self.detected_english_index):
+            self.detect_languages()
+        self.populate_treeview()
+        self._update_live_search()
+        self.title(f"I2Languages Editor By MrGamesKingPro - {filepath.split('/')[-1]}")
+        self.status_bar.config(text=f"File loaded: {filepath}{self._duplicate_keys_note()}")
+        self._update_translation_memory()
+        self._open_journals()
+
+    def _duplicate_keys_note(self):
+        """
+        Mentions duplicated term keys after loading; such terms are still edited separately, by row.
+        """
+        duplicates = self.term_index.duplicates() if self.term_index is not None else {}
+        return f" ({len(duplicates)} duplicated term keys)" if duplicates else ""
+
+    def _load_failed(self, error):
+        """
+        Reports a file that could not be opened or parsed and resets the editor to its empty state.
+        """
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to open or parse file: {error}\n\nPlease make sure it's a valid I2Languages JSON file or Unity dump of a LanguageSource.")
+        self.doc = None
+        self.search_indexes = None
+        self.current_filepath = None
+        self._recover_on_load = False
+        self.table.set_rows(range(0))
+        self._reset_view_filter()
+        self.language_combo.config(state="disabled")
+        self.language_combo.set('')
+
+    # --- Background tasks ---
+
+    def _start_task(self, task, on_progress, on_done, description):
+        """
+        Starts a BackgroundTask and shows the progress bar and Cancel button until it finishes.
+        """
+        self.task = task
+        self.progress_bar.config(value=0)
+        self.cancel_button.pack(side=tk.RIGHT, padx=2)
+        self.progress_bar.pack(side=tk.RIGHT, padx=2)
+        self.status_bar.config(text=description)
+        task.start()
+        self.after(TASK_POLL_INTERVAL, self._poll_task, task, on_progress, on_done)
+
+    def _poll_task(self, task, on_progress, on_done):
+        """
+        Applies the messages sent by a background task. Reschedules itself until the task has finished.
+        """
+        for kind, payload in task.poll():
+            if task is not self.task:
+                continue # A cancelled task that was replaced by a newer one; ignore what it sends.
+            if kind == 'progress':
+                on_progress(task, *payload)
+                continue
+            self.task = None
+            self.progress_bar.pack_forget()
+            self.cancel_button.pack_forget()
+            if kind == 'done':
+                on_done(task, payload)
+            elif kind == 'cancelled':
+                target = task.args[0] if isinstance(task.args[0], str) else "workspace"
+                self.status_bar.config(text=f"Cancelled: {task.name} {target}")
+                if task.name == "load":
+                    self._load_failed(None)
+            elif task.name == "load":
+                self._load_failed(payload)
+            elif task.name == "save":
+                messagebox.showerror("Save Error", f"Could not save file: {payload}")
+                self.status_bar.config(text=f"Error saving file: {payload}")
+            else:
+                messagebox.showerror("Error", f"Could not {task.name} files: {payload}")
+                self.status_bar.config(text=f"Error: {payload}")
+        if not task.finished:
+            self.after(TASK_POLL_INTERVAL, self._poll_task, task, on_progress, on_done)
+
+    def _task_running(self, name=None):
+        """
+        Returns True if a background task (optionally with the given name) is running.
+        """
+        return self.task is not None and (name is None or self.task.name == name)
+
+    def cancel_task(self):
+        """
+        Asks the running background task to stop. A cancelled save leaves the file on disk unchanged.
+        """
+        if self.task:
+            self.task.cancel()
+            self.status_bar.config(text=f"Cancelling {self.task.name}...")
+
+    def on_close(self):
+        """
+        Closes the window, asking first if a save is still being written.
+        """
+        if self._task_running("save"):
+            if not messagebox.askyesno("Save in Progress", "The file is still being saved. Quit anyway? The file on disk will be left unchanged."):
+                return
+            self.task.cancel()
+        self._flush_journals() # Edits that were not saved are offered for recovery on the next start.
+        self.destroy()
 
     def detect_languages(self):
         """
@@ -249,28 +1328,11 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         self.language_names = []
         self.detected_english_index = None
 
-        if not self.terms_list_ref:
+        if not self.doc:
             self.status_bar.config(text="Warning: File contains no terms.")
             return
 
-        # Assume all terms have the same number of languages based on the first term.
-        num_languages = len(self.terms_list_ref[0].get('Languages', {}).get('Array', []))
-        self.language_names = [f"Language {i+1}" for i in range(num_languages)]
-
-        # Try to find English by looking for common, untranslated terms like 'Cancel' or 'RUN'.
-        search_terms = {'Cancel': 'Cancel', 'RUN': 'RUN', '3DMark/RUN': 'RUN'}
-        found_english = False
-        for term_key, english_value in search_terms.items():
-            for term_data in self.terms_list_ref:
-                if term_data.get('Term') == term_key:
-                    translations = term_data.get('Languages', {}).get('Array', [])
-                    for j, text in enumerate(translations):
-                        if text == english_value:
-                            self.detected_english_index = j
-                            found_english = True
-                            break
-                if found_english: break
-            if found_english: break
+        self.language_names, self.detected_english_index = core.detect_languages(self.doc)
         
         # Update the language combobox with the detected languages.
         self.language_combo.config(values=self.language_names, state="readonly")
@@ -281,6 +1343,7 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
             self.language_var.set(self.language_names[0])
         else:
              self.language_combo.config(state="disabled")
+        self._build_view_menu()
 
     def _get_selected_language_index(self):
         """
@@ -296,70 +1359,571 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
 
     def populate_treeview(self):
         """
-        Clears and fills the treeview with data for the currently selected language.
+        Loads the terms of a newly opened file into the table model.
+        Only the visible rows are rendered, so this does not depend on the number of terms.
         """
-        if not self.data or not self.terms_list_ref: return
-        self.tree.delete(*self.tree.get_children())
-        self.term_to_tree_item.clear()
-        self.term_to_original_index.clear()
-        
-        # Clear and disable the editor when reloading the table.
-        self.on_tree_select(None)
-        
-        lang_index = self._get_selected_language_index()
-        if lang_index is None:
+        if not self.doc: return
+        self.term_index = self.doc.term_index()
+
+        self.view_language_index = self._get_selected_language_index()
+        if self.view_language_index is None:
             self.status_bar.config(text="Error: No language selected or invalid format.")
             return
 
-        for i, term_data in enumerate(self.terms_list_ref):
-            term_key = term_data.get('Term', '[NO TERM KEY]')
-            try:
-                full_translation = term_data.get('Languages', {}).get('Array', [])[lang_index]
-            except IndexError:
-                full_translation = "[NO TEXT FOR THIS LANGUAGE]"
-            
-            # Clean up the text for display in the treeview (single line preview).
-            display_translation = full_translation.replace('\n', ' ').replace('\r', ' ').strip()
-            
-            # Insert the row and store references for quick access later.
-            item_id = self.tree.insert("", "end", values=(i + 1, term_key, display_translation))
-            self.term_to_tree_item[term_key] = item_id
-            self.term_to_original_index[term_key] = i
+        # The rows were already shown while loading; keep the scroll position and re-render.
+        with instrument.timed('populate_treeview', f"{len(self.doc)} terms"):
+            self._configure_columns()
+            self.table.update_rows(range(len(self.doc)))
+            self.on_tree_select(None)
+            self._fill_categories()
+            self._update_filter_count()
 
-    def on_language_change(self, event=None):
+    def _row_values(self, row):
         """
-        Called when the user selects a different language from the combobox.
+        Returns the values shown in the table for one row of the model (number, term key, single line preview).
         """
-        self.populate_treeview()
-        self.status_bar.config(text=f"Displaying language: {self.language_var.get()}")
+        term_key = self.doc.key(row)
+        if self.doc.has_text(row, self.view_language_index):
+            full_translation = self.doc.text(row, self.view_language_index)
+        else:
+            full_translation = "[NO TEXT FOR THIS LANGUAGE]"
 
-    def update_data_and_tree(self, term_key, new_text):
-        """
-        Updates a term's translation both in the main data structure and in the treeview.
-        """
-        if not self.data or not self.terms_list_ref: return
-        
-        lang_index = self._get_selected_language_index()
-        original_index = self.term_to_original_index.get(term_key)
+        # Clean up the text for display in the treeview (single line preview).
+        display_translation = full_translation.replace('\n', ' ').replace('\r', ' ').strip()
+        references = tuple(self.doc.text(row, lang_index).replace('\n', ' ').replace('\r', ' ').strip()
+                           for lang_index in self._visible_reference_indices())
+        if isinstance(self.doc, Workspace):
+            # In a workspace every row also shows the file the term belongs to.
+            return (row + 1, term_key, self.doc.path_of(row).split('/')[-1], display_translation) + references
+        return (row + 1, term_key, display_translation) + references
 
-        if lang_index is None or original_index is None: return
+    # --- Language columns ---
 
-        # Update the data in memory (the main JSON dictionary).
-        self.terms_list_ref[original_index]['Languages']['Array'][lang_index] = new_text
+    def _language_name(self, lang_index):
+        if 0 <= lang_index < len(self.language_names):
+            return self.language_names[lang_index]
+        return f"Language {lang_index + 1}"
 
-        # Update the preview value in the treeview as well.
-        item_id = self.term_to_tree_item[term_key]
-        current_values = list(self.tree.item(item_id, "values"))
-        current_values[2] = new_text.replace('\n', ' ').replace('\r', ' ').strip()
-        self.tree.item(item_id, values=tuple(current_values))
-        
-        self.status_bar.config(text=f"Updated term: {term_key}")
+    def _visible_reference_indices(self):
+        """
+        The reference languages that get their own column: the ones chosen in the View menu, except the edited one.
+        """
+        language_count = self.doc.language_count if self.doc is not None else 0
+        return [lang_index for lang_index in self.reference_language_indices
+                if lang_index != self.view_language_index and lang_index < language_count]
 
-    def save_file(self):
+    def _build_view_menu(self):
         """
-        Saves the current data to the existing file path.
+        Lists every language of the file in the View menu as a column that can be shown or hidden.
         """
-        if not self.current_filepath:
+        self.view_menu.delete(0, "end")
+        self.reference_vars = []
+        for lang_index, name in enumerate(self.language_names):
+            variable = tk.BooleanVar(value=lang_index in self.reference_language_indices)
+            self.reference_vars.append(variable)
+            self.view_menu.add_checkbutton(label=f"Show {name} column", variable=variable,
+                                           command=self.on_reference_columns_change)
+        if self.language_names:
+            self.view_menu.add_separator()
+            self.view_menu.add_command(label="Hide All Extra Columns", command=self.hide_reference_columns)
+
+    def on_reference_columns_change(self):
+        """
+        Called when a language column is toggled in the View menu. The translations come straight from the
+        document's language columns, so only the visible rows have to be rendered again.
+        """
+        self.reference_language_indices = [lang_index for lang_index, variable in enumerate(self.reference_vars)
+                                           if variable.get()]
+        self._configure_columns()
+        self._show_reference_texts(self.table.selected_row())
+
+    def hide_reference_columns(self):
+        for variable in self.reference_vars:
+            variable.set(False)
+        self.on_reference_columns_change()
+
+    def _configure_columns(self):
+        """
+        Sets up the table columns: number, term key, the edited language and one column per reference language.
+        """
+        references = self._visible_reference_indices() if self.doc is not None else []
+        show_file = isinstance(self.doc, Workspace)
+        columns = ("#", "term") + (("file",) if show_file else ()) + ("text",)
+        columns += tuple(f"lang{lang_index}" for lang_index in references)
+        if tuple(self.tree["columns"]) != columns:
+            self.table.set_columns(columns)
+        self.tree.heading("#", text="No.")
+        self.tree.heading("term", text="Term Key")
+        self.tree.column("#", width=50, anchor='center')
+        self.tree.column("term", width=300 if not references else 220)
+        if show_file:
+            self.tree.heading("file", text="File")
+            self.tree.column("file", width=180)
+        if not references:
+            self.tree.heading("text", text="Translation Text (Preview)")
+            self.tree.column("text", width=650)
+        else:
+            # The available width is shared by the edited language and the reference languages.
+            width = max(150, 730 // (len(references) + 1))
+            self.tree.heading("text", text=f"{self._language_name(self.view_language_index)} (editing)")
+            self.tree.column("text", width=width)
+            for lang_index in references:
+                self.tree.heading(f"lang{lang_index}", text=self._language_name(lang_index))
+                self.tree.column(f"lang{lang_index}", width=width)
+
+        # The reference pane beside the editor is only shown while there is something to compare with.
+        if references and not self.reference_text.winfo_manager():
+            self.reference_text.pack(expand=True, fill="both", side="left", padx=(0, 10), before=self.editor_text)
+        elif not references and self.reference_text.winfo_manager():
+            self.reference_text.pack_forget()
+
+    def on_language_change(self, event=None):
+        """
+        Called when the user selects a different language from the combobox.
+        Only the visible rows are re-rendered; the selected term stays selected and is reloaded in the editor.
+        """
+        if not self.doc: return
+        with instrument.timed('language_change', self.language_var.get()):
+            self.view_language_index = self._get_selected_language_index()
+            self._configure_columns() # The edited language is never shown twice.
+            if self._view_filter_active():
+                self.apply_view_filter() # Statuses, texts and lengths depend on the language.
+            else:
+                self.table.refresh()
+            self.on_tree_select(None)
+            self._update_live_search(move_selection=False)
+        self.status_bar.config(text=f"Displaying language: {self.language_var.get()}")
+
+    def update_data_and_tree(self, row, new_text):
+        """
+        Updates the translation of a row (in the current language) both in the main data structure and in the treeview.
+        """
+        if self.doc is None or not 0 <= row < len(self.doc): return
+        
+        lang_index = self._get_selected_language_index()
+        if lang_index is None: return
+
+        term_key = self.doc.key(row)
+        self._apply_edits([(row, lang_index, new_text)], f"Edit '{term_key}'")
+        self.status_bar.config(text=f"Updated term: {term_key}")
+
+    def _apply_edits(self, edits, label=None, to_journal=True):
+        """
+        Writes a batch of (row, lang_index, new_text) edits to the document and the search index, refreshes
+        the table once, and records the batch as one undoable step (unless label is None, as for undo/redo).
+        The edits are also added to the crash-recovery journal, unless to_journal is False.
+        Returns the list of Edit tuples that actually changed something.
+        """
+        applied = []
+        for row, lang_index, new_text in edits:
+            old_text = self.doc.set_text(row, lang_index, new_text)
+            if old_text == new_text:
+                continue
+            applied.append(Edit(row, lang_index, old_text, new_text))
+            self.session_edits.setdefault(lang_index, set()).add(row)
+            if self.search_indexes:
+                self.search_indexes.update(row, lang_index, new_text)
+
+        instrument.count('edits', len(applied))
+        if to_journal and applied:
+            self._journal_edits(applied)
+
+        # Only the edited cells are checked again, and the issue list is refreshed if that changed anything.
+        # Cells edited during the first check may have been checked before the edit; they are checked again
+        # when it finishes.
+        if self.checker is not None:
+            changed = False
+            for edit in applied:
+                changed = self.checker.recheck(edit.row, edit.lang_index) or changed
+            if changed and self.issues_window is not None:
+                self.issues_window.refresh()
+        elif self._task_running("check"):
+            self.unchecked_cells.update((edit.row, edit.lang_index) for edit in applied)
+
+        # Update the preview values in the table as well (only visible rows are rendered).
+        if len(applied) == 1:
+            self.table.refresh_row(applied[0].row)
+        elif applied:
+            self.table.refresh()
+
+        if label is not None and applied:
+            if not self.history.record(label, applied):
+                messagebox.showwarning("Undo", f"'{label}' is too large to be kept in the undo history.")
+            self._update_undo_menu()
+        return applied
+
+    # --- Filtering & sorting the table ---
+
+    def _view_filter_active(self):
+        """
+        True if the filter bar or the category panel hides or reorders any term.
+        """
+        return (self.view_status_var.get() != VIEW_STATUSES[0][0] or bool(self.filter_entry.get())
+                or self.view_sort_var.get() != VIEW_SORTS[0][0] or self.sort_descending_var.get()
+                or bool(self.key_prefix))
+
+    def _get_key_tree(self):
+        if self.key_tree is None and self.doc is not None:
+            self.key_tree = filters.KeyTree(self.doc)
+        return self.key_tree
+
+    def _schedule_view_filter(self, event=None):
+        """
+        Restarts the filter-as-you-type timer on every keystroke in the Filter box.
+        """
+        if self._filter_job:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(LIVE_SEARCH_DELAY, self.apply_view_filter)
+
+    def apply_view_filter(self, event=None):
+        """
+        Shows only the terms matching the filter bar and the selected category, in the chosen order.
+        The query runs over the columns of the document (see i2editor.filters) and only the visible rows of
+        the table are rendered, so this takes milliseconds even for very large files. The selected term stays
+        selected if it is still shown. Edits don't re-filter the table, so an edited term doesn't disappear.
+        """
+        self._filter_job = None
+        if self.doc is None or self.view_language_index is None or self._task_running("load"):
+            return
+        lang_index = self.view_language_index
+        status = dict(VIEW_STATUSES).get(self.view_status_var.get())
+        sort = dict(VIEW_SORTS).get(self.view_sort_var.get(), 'file')
+        key_tree = self._get_key_tree() if self.key_prefix or sort == 'key' else None
+        search_index = self.search_indexes.get(lang_index) if self.search_indexes is not None else None
+        try:
+            rows = filters.query_rows(self.doc, lang_index, self.detected_english_index, status=status,
+                                      key_prefix=self.key_prefix, pattern=self.filter_entry.get(),
+                                      search_keys=self.filter_keys_var.get(),
+                                      edited=self.session_edits.get(lang_index, ()), sort=sort,
+                                      descending=self.sort_descending_var.get(), key_tree=key_tree,
+                                      search_index=search_index)
+        except re.error:
+            self.filter_count_label.config(text="Invalid regex")
+            return
+        selected = self.table.selected_row()
+        self.table.set_rows(rows)
+        if selected is not None:
+            position = self.table.position_of(selected)
+            if position is not None:
+                self.table.select_position(position)
+        self._update_filter_count()
+        self._update_live_search(move_selection=False) # Find works on the rows shown.
+
+    def _update_filter_count(self):
+        if self.doc is None:
+            self.filter_count_label.config(text="")
+        else:
+            self.filter_count_label.config(text=f"{len(self.table.rows)} of {len(self.doc)} terms")
+
+    def _reset_view_filter(self):
+        """
+        Clears the filter bar and the category panel (when another file is opened).
+        """
+        if self._filter_job:
+            self.after_cancel(self._filter_job)
+            self._filter_job = None
+        self.session_edits = {}
+        self.key_tree = None
+        self.key_prefix = ""
+        self.view_status_var.set(VIEW_STATUSES[0][0])
+        self.filter_entry.delete(0, "end")
+        self.filter_keys_var.set(False)
+        self.view_sort_var.set(VIEW_SORTS[0][0])
+        self.sort_descending_var.set(False)
+        self.category_tree.delete(*self.category_tree.get_children())
+        self.category_prefixes = {}
+        self._update_filter_count()
+
+    def _add_categories(self, parent, prefix):
+        """
+        Lists the categories directly under a key prefix. Each one gets a placeholder child so that it can be
+        opened; its own categories are only looked up when it is.
+        """
+        for child, count, is_category in self.key_tree.children(prefix):
+            if not is_category:
+                continue
+            item = self.category_tree.insert(parent, "end", text=child[len(prefix):], values=(count,))
+            self.category_prefixes[item] = child
+            self.category_tree.insert(item, "end", text="")
+
+    def _fill_categories(self):
+        self.category_tree.delete(*self.category_tree.get_children())
+        self.category_prefixes = {}
+        root = self.category_tree.insert("", "end", text="All terms", values=(len(self.doc),), open=True)
+        self.category_prefixes[root] = ""
+        self._get_key_tree()
+        self._add_categories(root, "")
+
+    def _on_category_open(self, event):
+        item = self.category_tree.focus()
+        prefix = self.category_prefixes.get(item)
+        children = self.category_tree.get_children(item)
+        if prefix and len(children) == 1 and children[0] not in self.category_prefixes:
+            self.category_tree.delete(children[0]) # The placeholder.
+            self._add_categories(item, prefix)
+
+    def _on_category_select(self, event):
+        """
+        Shows only the terms whose key starts with the selected category.
+        """
+        selection = self.category_tree.selection()
+        prefix = self.category_prefixes.get(selection[0], "") if selection else ""
+        if prefix != self.key_prefix:
+            self.key_prefix = prefix
+            self.apply_view_filter()
+
+    # --- Instrumentation ---
+
+    def _heartbeat(self):
+        """
+        Records the times the event loop was blocked (by slow work on the GUI thread) for UI_STALL or longer.
+        """
+        now = time.perf_counter()
+        if self._heartbeat_time is not None:
+            delay = now - self._heartbeat_time - HEARTBEAT_INTERVAL / 1000
+            if delay >= UI_STALL:
+                instrument.record('ui_stall', delay, "the window did not respond")
+        self._heartbeat_time = now
+        self.after(HEARTBEAT_INTERVAL, self._heartbeat)
+
+    def show_debug_panel(self):
+        """
+        Opens the panel listing the recent operation timings and counters.
+        """
+        if self.debug_window is not None:
+            self.debug_window.lift()
+            return
+        self.debug_window = DebugWindow(self, self._close_debug_panel)
+
+    def _close_debug_panel(self):
+        self.debug_window = None
+
+    def toggle_profiling(self):
+        """
+        Starts or stops cProfile (GUI thread and background tasks). When stopped, the statistics are saved
+        to a .prof file (for pstats or snakeviz) and the slowest functions are shown.
+        """
+        if self.profiling_var.get():
+            self.profiler = instrument.Profiler().start()
+            self.status_bar.config(text="Profiling... (Tools > Profile with cProfile again to stop)")
+            return
+        if self.profiler is None:
+            return
+        stats = self.profiler.stop()
+        self.profiler = None
+        filepath = filedialog.asksaveasfilename(title="Save Profile", defaultextension=".prof",
+                                                initialfile=time.strftime("i2editor-%Y%m%d-%H%M%S.prof"),
+                                                filetypes=[("cProfile statistics", "*.prof"), ("All files", "*.*")])
+        if filepath:
+            try:
+                stats.dump_stats(filepath)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save the profile: {e}")
+                return
+            self.status_bar.config(text=f"Profile saved to {filepath}")
+
+        window = tk.Toplevel(self)
+        window.title("Profile - slowest functions (cumulative time)")
+        window.geometry("900x500")
+        text = tk.Text(window, wrap="none", font=("TkFixedFont", 9))
+        text.insert("1.0", instrument.stats_summary(stats))
+        text.config(state="disabled")
+        text.pack(expand=True, fill=tk.BOTH)
+
+    # --- Crash-recovery journal & autosave ---
+
+    def _journal_edits(self, applied):
+        """
+        Adds applied edits to the journals of the files they belong to; they are written by the next _journal_tick().
+        """
+        workspace = self.doc if isinstance(self.doc, Workspace) else None
+        for edit in applied:
+            document, row = workspace.locate(edit.row) if workspace else (self.doc, edit.row)
+            entry = self.journals.get(document.path)
+            if entry is not None:
+                entry.record(row, edit.lang_index, document.key(row), edit.new_text)
+        self._last_edit_time = time.time()
+
+    def _journal_tick(self):
+        """
+        Writes the edits made since the last tick to the journals, then autosaves (or compacts the journals)
+        when they have grown. Reschedules itself.
+        """
+        if not self._task_running("save"): # Edits made while saving belong to the journal started afterwards.
+            self._flush_journals()
+            self._autosave_if_due()
+        self.after(JOURNAL_FLUSH_INTERVAL, self._journal_tick)
+
+    def _flush_journals(self):
+        for entry in self.journals.values():
+            try:
+                entry.flush()
+            except OSError as e:
+                self.status_bar.config(text=f"Could not write the recovery journal: {e}")
+
+    def _autosave_if_due(self):
+        """
+        Folds the journals into a real save, in the background, once they are old or large enough and the
+        user paused editing. With autosave off, large journals are compacted instead.
+        """
+        entries = [entry for entry in self.journals.values() if len(entry)]
+        now = time.time()
+        if not entries or now - self._last_edit_time < AUTOSAVE_IDLE:
+            return
+        if not self.autosave_var.get():
+            for entry in entries:
+                if entry.size >= max(JOURNAL_COMPACT_SIZE, 2 * entry.compacted_size):
+                    try:
+                        entry.compact()
+                    except OSError as e:
+                        self.status_bar.config(text=f"Could not compact the recovery journal: {e}")
+            return
+        due = (sum(entry.size for entry in entries) >= AUTOSAVE_JOURNAL_SIZE
+               or now - min(entry.started for entry in entries) >= AUTOSAVE_INTERVAL)
+        if due and now >= self._next_autosave and self.doc is not None and self.task is None:
+            self._next_autosave = now + AUTOSAVE_INTERVAL # Don't retry a failing save right away.
+            self._write_to_file(None if isinstance(self.doc, Workspace) else self.current_filepath, autosave=True)
+
+    def _restart_journals(self, documents, old_paths):
+        """
+        Starts new, empty journals for documents that were just saved (Save As moves the journal to the new path).
+        """
+        for document, old_path in zip(documents, old_paths):
+            entry = self.journals.pop(old_path, None)
+            try:
+                if entry is None:
+                    entry = journal.Journal(document.path)
+                else:
+                    entry.restart(document.path if document.path != old_path else None)
+            except OSError as e:
+                self.status_bar.config(text=f"Could not delete the recovery journal: {e}")
+            self.journals[document.path] = entry
+
+    def _open_journals(self):
+        """
+        Starts the journals of the files just loaded, and offers to restore the edits a previous session made
+        to them but never saved (the editor was closed without saving, or crashed).
+        """
+        documents = self.doc.documents if isinstance(self.doc, Workspace) else [self.doc]
+        found = []
+        for document in documents:
+            entry = journal.Journal(document.path)
+            self.journals[document.path] = entry
+            records = entry.recoverable()
+            if records:
+                found.append((document, entry, records))
+        recover, self._recover_on_load = self._recover_on_load, False
+        if not found:
+            return
+        count = sum(len(records) for _, _, records in found)
+        if not recover:
+            recover = messagebox.askyesno(
+                "Recover Unsaved Edits",
+                f"{count} edit(s) made in a previous session were never saved. Restore them?\n\n"
+                "Choose No to discard them.")
+        if not recover:
+            for _, entry, _ in found:
+                entry.discard()
+            return
+
+        edits = []
+        skipped = 0
+        for document, entry, records in found:
+            document_edits, document_skipped = journal.replay(document, records)
+            start = self.doc.starts[self.doc.documents.index(document)] if isinstance(self.doc, Workspace) else 0
+            edits.extend((start + row, lang_index, text) for row, lang_index, text in document_edits)
+            skipped += document_skipped
+            entry.resume() # The restored edits are already journaled.
+        applied = self._apply_edits(edits, "Recover unsaved edits", to_journal=False)
+        self._last_edit_time = time.time()
+        if self.table.selected_row() is not None:
+            self.on_tree_select(None)
+        self._update_live_search(move_selection=False)
+        note = f" ({skipped} could not be matched to a term)" if skipped else ""
+        self.status_bar.config(text=f"Restored {len(applied)} unsaved edit(s){note}. Save to keep them in the file.")
+
+    def _offer_recovery(self):
+        """
+        At startup, offers to reopen the files that have unsaved edits in a journal.
+        """
+        found = journal.find_recoverable()
+        if not found:
+            return
+        files = "\n".join(f"{recovery.path} ({recovery.edits} edit(s), "
+                          f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(recovery.modified))})"
+                          for recovery in found)
+        answer = messagebox.askyesnocancel(
+            "Recover Unsaved Edits",
+            f"Edits that were never saved were found for:\n\n{files}\n\n"
+            "Open the file(s) and restore the edits? Choose No to discard the edits, Cancel to decide later.")
+        if answer is None:
+            return
+        if not answer:
+            for recovery in found:
+                journal.Journal(recovery.path).discard()
+            return
+        self._recover_on_load = True
+        paths = [recovery.path for recovery in found]
+        if len(paths) > 1:
+            self.load_workspace_logic(paths)
+        else:
+            self.load_file_logic(paths[0])
+
+    # --- Undo / redo ---
+
+    def undo(self):
+        """
+        Reverts the latest step of the edit history (a single edit, a Replace All or an import).
+        """
+        if not self.history.can_undo() or self._task_running("save"):
+            return
+        group = self.history.undo()
+        self._apply_edits([(edit.row, edit.lang_index, edit.old_text) for edit in reversed(group.edits)])
+        self._after_history_change(f"Undid: {group.label} ({len(group.edits)} edit(s))")
+
+    def redo(self):
+        """
+        Re-applies the latest undone step.
+        """
+        if not self.history.can_redo() or self._task_running("save"):
+            return
+        group = self.history.redo()
+        self._apply_edits([(edit.row, edit.lang_index, edit.new_text) for edit in group.edits])
+        self._after_history_change(f"Redid: {group.label} ({len(group.edits)} edit(s))")
+
+    def _after_history_change(self, message):
+        if self.table.selected_row() is not None:
+            self.on_tree_select(None) # Show the restored text in the editor.
+        self._update_live_search(move_selection=False)
+        self._update_undo_menu()
+        self.status_bar.config(text=message)
+
+    def _update_undo_menu(self):
+        undo_label = self.history.undo_label()
+        redo_label = self.history.redo_label()
+        self.edit_menu.entryconfig(0, label=f"Undo {undo_label}" if undo_label else "Undo",
+                                   state="normal" if undo_label else "disabled")
+        self.edit_menu.entryconfig(1, label=f"Redo {redo_label}" if redo_label else "Redo",
+                                   state="normal" if redo_label else "disabled")
+
+    def _on_undo_key(self, event):
+        # The text editor and entry boxes keep their own Ctrl+Z behaviour.
+        if isinstance(event.widget, (tk.Text, tk.Entry, ttk.Entry)):
+            return
+        self.undo()
+
+    def _on_redo_key(self, event):
+        if isinstance(event.widget, (tk.Text, tk.Entry, ttk.Entry)):
+            return
+        self.redo()
+
+    def save_file(self):
+        """
+        Saves the current data to the existing file path (or the edited files of a workspace).
+        """
+        if isinstance(self.doc, Workspace):
+            self._write_to_file(None)
+        elif not self.current_filepath:
             self.save_file_as()
         else:
             self._write_to_file(self.current_filepath)
@@ -368,41 +1932,93 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         """
         Opens a "Save As" dialog to save the current data to a new file.
         """
+        if isinstance(self.doc, Workspace):
+            messagebox.showinfo("Workspace", "The files of a workspace are saved in place. Use Save to write the edited files.")
+            return
         initial_filename = "I2Languages-resources.json"
         if self.current_filepath:
             initial_filename = self.current_filepath.split('/')[-1]
+        # A Unity dump is saved as a dump again (only the edited translations are replaced).
+        if isinstance(self.doc, UnityDocument):
+            extension = os.path.splitext(initial_filename)[1] or ".txt"
+            filetypes = [("Unity dumps", "*.txt *.dat"), ("All files", "*.*")]
+        else:
+            extension = ".json"
+            filetypes = [("JSON files", "*.json"), ("All files", "*.*")]
 
         filepath = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            defaultextension=extension,
+            filetypes=filetypes,
             initialfile=initial_filename
         )
         if not filepath: return
-        self.current_filepath = filepath
+        # The window title and current path are updated once the background save succeeds.
         self._write_to_file(filepath)
-        self.title(f"I2Languages Editor By MrGamesKingPro - {filepath.split('/')[-1]}")
 
-    def _write_to_file(self, filepath):
+    def _write_to_file(self, filepath, autosave=False):
         """
-        The core logic for writing the JSON data to a file.
+        The core logic for writing the JSON data to a file. Once it is written, the journal of its unsaved
+        edits is deleted.
         """
-        if not self.data:
+        if self.doc is None:
             messagebox.showwarning("No Data", "There is no data to save.")
-            return
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
-            self.status_bar.config(text=f"File saved successfully: {filepath}")
-        except Exception as e:
-            messagebox.showerror("Save Error", f"Could not save file: {e}")
-            self.status_bar.config(text=f"Error saving file: {e}")
+            return False
+        if self.task:
+            messagebox.showwarning("Busy", f"Please wait until the current {self.task.name} has finished.")
+            return False
+
+        # Serializing and writing happen in a worker thread; editing is blocked until it finishes.
+        def save(task, path, doc):
+            def progress(written, total):
+                task.check_cancelled()
+                task.report(written, total)
+            saved = doc.changed_documents() if isinstance(doc, Workspace) else [doc]
+            serialized = doc.save(path, progress=progress)
+            # Refresh the session cache, so the saved file reopens without being parsed.
+            for document in saved:
+                try:
+                    cache.write_cache(document)
+                except OSError:
+                    pass
+            return path, serialized
+
+        target = filepath or "workspace"
+        action = "Autosaving" if autosave else "Saving"
+
+        def on_progress(task, written, total):
+            self.progress_bar.config(value=100 * written / max(1, total))
+            self.status_bar.config(text=f"{action} {target}... {written}/{total} terms")
+
+        def on_done(task, result):
+            path, serialized = result
+            self._restart_journals(saved, old_paths)
+            self._update_translation_memory() # The saved translations become suggestions for other files.
+            if autosave:
+                self._next_autosave = 0
+                self.status_bar.config(text=f"Autosaved {target} ({serialized} term(s) written)")
+                return
+            if path is None:
+                self.status_bar.config(text=f"Workspace saved: {len(changed)} changed file(s), {serialized} term(s) written")
+                return
+            self.current_filepath = path
+            self.title(f"I2Languages Editor By MrGamesKingPro - {path.split('/')[-1]}")
+            # Unchanged terms are copied from the previous file, so usually only the edited ones are rewritten.
+            self.status_bar.config(text=f"File saved successfully: {path} ({serialized} term(s) written)")
+
+        # Only the files of a workspace that have edits are written.
+        changed = self.doc.changed_documents() if isinstance(self.doc, Workspace) else []
+        saved = changed if isinstance(self.doc, Workspace) else [self.doc]
+        old_paths = [document.path for document in saved]
+        self._flush_journals() # Edits made while saving are kept for the next journal.
+        self._start_task(BackgroundTask("save", save, filepath, self.doc), on_progress, on_done, f"{action} {target}...")
+        return True
 
     def export_to_txt(self):
         """
         Exports the translations for the current language to a simple TXT file.
         Each line is wrapped in quotes, with internal quotes escaped as "" to preserve data.
         """
-        if not self.data:
+        if self.doc is None or self.task:
             messagebox.showwarning("No Data", "Please open a file first before exporting.")
             return
         filepath = filedialog.asksaveasfilename(
@@ -410,21 +2026,11 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         )
         if not filepath: return
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                lang_index = self._get_selected_language_index()
-                if lang_index is None: return
-
-                for item_id in self.tree.get_children():
-                    term_key = self.tree.item(item_id, "values")[1]
-                    original_index = self.term_to_original_index[term_key]
-                    full_text = self.terms_list_ref[original_index]['Languages']['Array'][lang_index]
-                    
-                    # Escape double quotes within the text and then wrap the entire string in quotes.
-                    # This prevents data loss if a translation contains a quote character.
-                    escaped_text = full_text.replace('"', '""')
-                    quoted_text = f'"{escaped_text}"'
-                    f.write(quoted_text + '\n')
+            lang_index = self._get_selected_language_index()
+            if lang_index is None: return
 
+            # Rows are exported in table order, one quoted line each (see core.encode_txt_line).
+            core.export_txt(self.doc, lang_index, filepath, rows=self.table.rows)
             self.status_bar.config(text=f"Successfully exported to {filepath}")
         except Exception as e:
             messagebox.showerror("Export Error", f"Could not export file: {e}")
@@ -434,7 +2040,7 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         Imports translations from a TXT file, replacing the translations for the current language.
         It correctly handles text that was exported with the quoting format.
         """
-        if not self.data:
+        if self.doc is None or self.task:
             messagebox.showwarning("No Data", "Please open a file first before importing.")
             return
         filepath = filedialog.askopenfilename(
@@ -442,87 +2048,473 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         )
         if not filepath: return
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            tree_items = self.tree.get_children()
+            # Lines are decoded from the special quoting format by core.read_txt.
+            lines = core.read_txt(filepath)
+            table_rows = self.table.rows
             
             # Warn the user if the number of lines doesn't match the number of terms.
-            if len(lines) != len(tree_items):
+            if len(lines) != len(table_rows):
                 msg = (f"The number of lines in the text file ({len(lines)}) does not match "
-                       f"the number of terms in the table ({len(tree_items)}).\n\n"
+                       f"the number of terms in the table ({len(table_rows)}).\n\n"
                        "Do you want to proceed and import matching lines only?")
                 if not messagebox.askyesno("Line Count Mismatch", msg): return
             
-            count = 0
-            for item_id, new_line in zip(tree_items, lines):
-                term_key = self.tree.item(item_id, "values")[1]
-                
-                # Process the line to handle the special quoting format.
-                processed_line = new_line.rstrip('\n\r')
-                if processed_line.startswith('"') and processed_line.endswith('"'):
-                    # If it's a quoted string, remove outer quotes and un-escape inner quotes.
-                    new_text = processed_line[1:-1].replace('""', '"')
-                else:
-                    # For backward compatibility, if not quoted, use the line as is.
-                    new_text = processed_line
-                
-                self.update_data_and_tree(term_key, new_text)
-                count += 1
+            lang_index = self._get_selected_language_index()
+            if lang_index is None: return
+            # Lines belong to the rows in table order (rows are the terms' identity, even for duplicated keys).
+            edits = [(row, lang_index, new_text) for row, new_text in zip(table_rows, lines)]
+            count = len(edits)
+            # The whole import is applied (and undone) as one step.
+            self._apply_edits(edits, "Import TXT")
             
             # Refresh the editor if an item is currently selected to show the imported text.
-            selected = self.tree.selection()
-            if selected:
-                self.on_tree_select(None) # Trigger a fake de-select to clear the editor.
-                self.tree.selection_set(selected) # Re-select the item.
+            if self.table.selected_row() is not None:
+                self.on_tree_select(None)
 
             self.status_bar.config(text=f"Successfully imported {count} lines from {filepath}")
         except Exception as e:
             messagebox.showerror("Import Error", f"Could not import file: {e}")
 
+    # File types offered for the key-aligned exchange formats (see i2editor.exchange).
+    EXCHANGE_FILETYPES = [("CSV (all languages)", "*.csv"), ("TSV (all languages)", "*.tsv"),
+                          ("XLIFF 2.0", "*.xlf *.xliff"), ("gettext PO", "*.po *.pot"), ("All files", "*.*")]
+
+    def export_exchange(self):
+        """
+        Exports the terms in table order to CSV/TSV (every language) or XLIFF/PO (the detected English column as
+        source and the current language as target). Each record carries its term key.
+        """
+        if self.doc is None or self.task:
+            messagebox.showwarning("No Data", "Please open a file first before exporting.")
+            return
+        filepath = filedialog.asksaveasfilename(
+            title="Export translations", defaultextension=".csv", filetypes=self.EXCHANGE_FILETYPES
+        )
+        if not filepath: return
+        try:
+            lang_index = self._get_selected_language_index()
+            if lang_index is None: return
+            source_index = self.detected_english_index if self.detected_english_index is not None else 0
+            count = exchange.export_file(self.doc, filepath, rows=self.table.rows,
+                                         source_lang=source_index, target_lang=lang_index)
+            self.status_bar.config(text=f"Successfully exported {count} terms to {filepath}")
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Could not export file: {e}")
+
+    def import_exchange(self):
+        """
+        Imports translations from a CSV/TSV/XLIFF/PO file, matching rows by term key. XLIFF and PO translations go
+        to the current language. The import is one undoable step; unmatched and new keys are reported.
+        """
+        if self.doc is None or self.task:
+            messagebox.showwarning("No Data", "Please open a file first before importing.")
+            return
+        filepath = filedialog.askopenfilename(title="Import translations", filetypes=self.EXCHANGE_FILETYPES)
+        if not filepath: return
+        try:
+            lang_index = self._get_selected_language_index()
+            if lang_index is None: return
+            result = exchange.import_file(self.doc, filepath, target_lang=lang_index)
+        except Exception as e:
+            messagebox.showerror("Import Error", f"Could not import file: {e}")
+            return
+
+        summary = (f"{result.matched} keys matched, {len(result.edits)} translations changed.\n"
+                   f"{len(result.new_keys)} keys in the file are not in the document.\n"
+                   f"{len(result.unmatched_keys)} terms of the document are not in the file.")
+        if result.new_keys:
+            summary += "\n\nNew keys (not imported):\n" + "\n".join(result.new_keys[:15])
+            if len(result.new_keys) > 15:
+                summary += f"\n... and {len(result.new_keys) - 15} more"
+        if not result.edits:
+            messagebox.showinfo("Import", summary)
+            return
+        if not messagebox.askyesno("Import", summary + "\n\nApply the changes?"):
+            return
+        self._apply_edits(result.edits, f"Import {filepath.split('/')[-1]}")
+        if self.table.selected_row() is not None:
+            self.on_tree_select(None)
+        self._update_live_search(move_selection=False)
+        self.status_bar.config(text=f"Imported {len(result.edits)} translations from {filepath}")
+
+    # --- Translation checks ---
+
+    def show_issues(self):
+        """
+        Checks every translation for unbalanced rich-text tags, missing or extra placeholders and empty texts
+        (compared with the source language) and lists the issues. The first check runs in the background;
+        after that, edits only re-check the cells they change.
+        """
+        if self.doc is None or self._task_running("load"):
+            messagebox.showwarning("No Data", "Please open a file first.")
+            return
+        if self.checker is not None:
+            self._open_issues_window()
+            return
+        if self.task:
+            messagebox.showwarning("Busy", f"Please wait until the current {self.task.name} has finished.")
+            return
+        checker = checks.Checker(self.doc, source_lang=self.detected_english_index or 0)
+        self.unchecked_cells = set()
+
+        def check(task, checker):
+            def progress(done, total):
+                task.check_cancelled()
+                task.report(done, total)
+            checker.check_all(progress)
+            return checker
+
+        def on_progress(task, done, total):
+            self.progress_bar.config(value=100 * done / max(1, total))
+            self.status_bar.config(text=f"Checking translations... {done}/{total} terms")
+
+        def on_done(task, checker):
+            if checker.doc is not self.doc:
+                return # Another file was opened meanwhile.
+            for row, lang_index in self.unchecked_cells:
+                checker.recheck(row, lang_index)
+            self.unchecked_cells = set()
+            self.checker = checker
+            counts = checker.counts()
+            self.status_bar.config(text="Check finished: " + (", ".join(f"{counts[kind]} {kind}" for kind in checks.KINDS if counts[kind]) or "no issues"))
+            self._open_issues_window()
+
+        self._start_task(BackgroundTask("check", check, checker), on_progress, on_done, "Checking translations...")
+
+    def show_pretranslate(self):
+        """
+        Fills the translations of the edited language from the translation memory or a glossary (see
+        i2editor.pretranslate). The lookups run in the background; the result is applied as one undoable
+        step, and the filled terms can be reviewed with the "Edited this session" filter.
+        """
+        lang_index = self.view_language_index
+        if self.doc is None or lang_index is None or self._task_running("load"):
+            messagebox.showwarning("No Data", "Please open a file first.")
+            return
+        if self.task:
+            messagebox.showwarning("Busy", f"Please wait until the current {self.task.name} has finished.")
+            return
+        names = [self._language_name(index) for index in range(self.doc.language_count)]
+        source_index = self._suggestion_source_index(lang_index)
+        if source_index is None:
+            source_index = 0 if lang_index != 0 or len(names) < 2 else 1
+        PreTranslateDialog(self, self._language_name(lang_index), names, source_index,
+                           lambda *options: self._start_pretranslate(lang_index, *options))
+
+    def _start_pretranslate(self, lang_index, source_index, backend, overwrite, shown_only):
+        if source_index == lang_index:
+            messagebox.showwarning("Pre-translate", "Please choose a source language other than the edited one.")
+            return
+        if self.task:
+            messagebox.showwarning("Busy", f"Please wait until the current {self.task.name} has finished.")
+            return
+        doc = self.doc
+        rows = list(self.table.rows) if shown_only else None
+
+        def run(task, doc):
+            def progress(done, total):
+                task.check_cancelled()
+                task.report(done, total)
+            return pretranslate.pretranslate(doc, source_index, lang_index, backend, rows=rows,
+                                             overwrite=overwrite, progress=progress)
+
+        def on_progress(task, done, total):
+            self.progress_bar.config(value=100 * done / max(1, total))
+            self.status_bar.config(text=f"Pre-translating... {done}/{total} texts")
+
+        def on_done(task, result):
+            if doc is not self.doc:
+                return # Another file was opened meanwhile.
+            edits = result.edits
+            if not overwrite:
+                # Terms translated by hand while the lookups ran are kept.
+                edits = [edit for edit in edits if not self.doc.text(edit[0], lang_index)]
+            applied = self._apply_edits(edits, f"Pre-translate {self._language_name(lang_index)}")
+            summary = (f"{len(applied)} term(s) filled from {result.translated} of {result.unique} distinct source "
+                       f"text(s); {result.missing} not found, {result.rejected} rejected (tags or placeholders changed).")
+            self.status_bar.config(text="Pre-translation finished: " + summary)
+            messagebox.showinfo("Pre-translate", summary + "\n\nUse Show: \"Edited this session\" to review them.")
+
+        self._start_task(BackgroundTask("pre-translate", run, doc), on_progress, on_done,
+                         f"Pre-translating {self._language_name(lang_index)}...")
+
+    def _open_issues_window(self):
+        if self.issues_window is None:
+            self.issues_window = IssuesWindow(self, self.checker, self.language_names, self._open_issue)
+            self.issues_window.protocol("WM_DELETE_WINDOW", self._close_issues)
+        else:
+            self.issues_window.refresh()
+        self.issues_window.lift()
+
+    def _close_issues(self):
+        self.issues_window.destroy()
+        self.issues_window = None
+
+    def _open_issue(self, issue):
+        """
+        Shows the term of an issue in the editor, switching to the issue's language.
+        """
+        if issue.lang_index != self.view_language_index and issue.lang_index < len(self.language_names):
+            self.language_var.set(self.language_names[issue.lang_index])
+            self.on_language_change()
+        if not self._select_row(issue.row):
+            self.status_bar.config(text=f"Row {issue.row + 1} is not shown in the table.")
+
+    # --- Compare & merge ---
+
+    def _check_single_file(self, action):
+        """
+        Returns True if a single file is open and idle, as Compare and Merge need; tells the user otherwise.
+        """
+        if self.doc is None or isinstance(self.doc, Workspace):
+            messagebox.showwarning("No File", f"Please open a single file before using {action}.")
+            return False
+        if self.task:
+            messagebox.showwarning("Busy", f"Please wait until the current {self.task.name} has finished.")
+            return False
+        return True
+
+    def _select_row(self, row):
+        """
+        Selects a row of the open document in the table, if it is shown.
+        """
+        position = self.table.position_of(row) if row is not None else None
+        if position is None:
+            return False
+        self.table.select_position(position)
+        self.lift()
+        return True
+
+    def compare_with_file(self):
+        """
+        Compares the open file (with its unsaved edits) with another file, by term key, and lists the differences.
+        """
+        if not self._check_single_file("Compare"):
+            return
+        other_path = filedialog.askopenfilename(title="Compare with I2Languages JSON File",
+                                                filetypes=self.DOCUMENT_FILETYPES)
+        if not other_path:
+            return
+        source_index = self.detected_english_index or 0
+
+        def compare(task, path, doc):
+            other = cache.load_document(path)
+            return other, diff.diff_documents(doc, other, source_index)
+
+        def on_done(task, result):
+            other, differences = result
+            summary = diff.summarize(differences.changes)
+            self.status_bar.config(text=f"Compared with {other_path}: {summary}, {differences.unchanged} unchanged")
+
+            def on_open(change):
+                if not self._select_row(change.old_row):
+                    self.status_bar.config(text=f"'{change.key}' is only in {other_path.split('/')[-1]}.")
+
+            DiffWindow(self, f"Differences: {self.current_filepath.split('/')[-1]} \u2192 {other_path.split('/')[-1]} ({summary})",
+                       differences.changes, self.doc, other, self.view_language_index, self._language_name, on_open)
+
+        self._start_task(BackgroundTask("compare", compare, other_path, self.doc), lambda *args: None, on_done,
+                         f"Comparing with {other_path}...")
+
+    def merge_into_update(self):
+        """
+        Carries the translations of the open file (with its unsaved edits) over to an updated version of it,
+        e.g. a new asset from the game build, and saves the result as a new file. With the original file the
+        translations were based on, the merge is three-way and detects translations changed on both sides.
+        """
+        if not self._check_single_file("Merge"):
+            return
+        theirs_path = filedialog.askopenfilename(title="Select the Updated I2Languages JSON File",
+                                                 filetypes=self.DOCUMENT_FILETYPES)
+        if not theirs_path:
+            return
+        base_path = None
+        if messagebox.askyesno("Three-Way Merge", "Do you have the original file that the open file was translated from?\n\n"
+                                                  "With it, translations changed on both sides are detected as conflicts."):
+            base_path = filedialog.askopenfilename(title="Select the Original I2Languages JSON File",
+                                                   filetypes=self.DOCUMENT_FILETYPES) or None
+        # The merged file has the format of the updated one (a Unity dump is saved as a dump again).
+        name, extension = os.path.splitext(theirs_path.split('/')[-1])
+        output_path = filedialog.asksaveasfilename(title="Save Merged File As", defaultextension=extension or ".json",
+                                                   initialfile=f"{name}-merged{extension or '.json'}",
+                                                   filetypes=self.DOCUMENT_FILETYPES)
+        if not output_path:
+            return
+        source_index = self.detected_english_index or 0
+
+        def merge(task, path, doc, base_path, output_path):
+            theirs = cache.load_document(path)
+            base = cache.load_document(base_path) if base_path else None
+            result = diff.merge_documents(doc, theirs, base, source_index)
+            theirs.save(output_path)
+            return theirs, result
+
+        def on_done(task, result):
+            theirs, merged = result
+            summary = diff.summarize(merged.changes)
+            self.status_bar.config(text=f"Merged file saved to {output_path}: {len(merged.edits)} translations carried over ({summary})")
+            ours = self.doc
+            window = DiffWindow(self, f"Merge: {summary}", merged.changes, ours, theirs, self.view_language_index,
+                                self._language_name, lambda change: None)
+
+            # Once the merged file is open, changes are shown in it; until then, in the translated file.
+            def on_open(change):
+                row = change.new_row if self.doc is not ours else change.old_row
+                if not self._select_row(row):
+                    self.status_bar.config(text=f"'{change.key}' is not in the open file.")
+            window.on_open = on_open
+            if messagebox.askyesno("Merge Finished", f"{len(merged.edits)} translations were carried over ({summary}).\n\n"
+                                                     "Open the merged file now?", parent=window):
+                self.load_file_logic(output_path)
+
+        self._start_task(BackgroundTask("merge", merge, theirs_path, self.doc, base_path, output_path),
+                         lambda *args: None, on_done, f"Merging into {theirs_path}...")
+
+    def _search_positions(self, query):
+        """
+        Returns the sorted table positions of the rows whose full text (in the displayed language) contains query.
+        The search runs on the language's full-text index, not on the table widget.
+        """
+        lang_index = self._get_selected_language_index()
+        if not query or lang_index is None or self.search_indexes is None:
+            return []
+        if self._has_match_options():
+            # The index gives candidates for plain text; the options are checked with the compiled pattern.
+            pattern = self._compile_pattern(query)
+            candidates = range(len(self.doc)) if self.regex_var.get() else self.search_indexes.search(lang_index, query)
+            # JSON null (or other non-text) translations read as "" everywhere else and never match.
+            column = self.doc.terms.column(lang_index)
+            rows = [row for row in candidates if isinstance(column[row], str) and pattern.search(column[row])]
+        else:
+            rows = self.search_indexes.search(lang_index, query)
+        if isinstance(self.table.rows, range) and self.table.rows == range(len(self.doc)):
+            return rows # The table shows every row in file order, so positions are rows.
+        positions = (self.table.position_of(row) for row in rows)
+        return sorted(position for position in positions if position is not None)
+
+    def _has_match_options(self):
+        return self.regex_var.get() or self.whole_word_var.get() or self.match_case_var.get()
+
+    def _compile_pattern(self, query):
+        """
+        Compiles the Find text with the Regex / Whole word / Match case options. Raises re.error for an invalid regex.
+        """
+        return build_pattern(query, self.regex_var.get(), self.whole_word_var.get(), self.match_case_var.get())
+
     def find_next(self):
         """
         Finds the next occurrence of the search query in the full translation text.
         """
         query = self.search_entry.get()
         if not query: return
+        if not self.table.rows: return
+
+        try:
+            positions = self._search_positions(query)
+        except re.error as e:
+            messagebox.showerror("Invalid Regular Expression", f"{e}")
+            return
+        self.match_count_label.config(text=f"{len(positions)} match(es)")
+        if positions:
+            # Continue from the row AFTER the currently selected one, wrapping around to the beginning.
+            start_index = 0
+            if self.table.selected_position is not None:
+                start_index = self.table.selected_position + 1
+            i = bisect_left(positions, start_index)
+            position = positions[i % len(positions)]
+            self.table.select_position(position) # Select and scroll to make the found row visible.
+            self.status_bar.config(text=f"Found '{query}' ({(i % len(positions)) + 1} of {len(positions)})")
+            return
         
-        all_items = self.tree.get_children()
-        if not all_items: return
+        self.status_bar.config(text=f"No more occurrences of '{query}' found.")
+        messagebox.showinfo("Search Finished", f"No more occurrences of '{query}' were found.")
+
+    def _schedule_live_search(self, event=None):
+        """
+        Restarts the search-as-you-type timer on every keystroke in the Find box.
+        """
+        if event is not None and event.keysym in ("Return", "KP_Enter"):
+            return
+        if self._live_search_job:
+            self.after_cancel(self._live_search_job)
+        self._live_search_job = self.after(LIVE_SEARCH_DELAY, self._update_live_search)
+
+    def _update_live_search(self, move_selection=True):
+        """
+        Updates the live match count and jumps to the first match at or after the selected row.
+        """
+        self._live_search_job = None
+        query = self.search_entry.get()
+        if not query or self.doc is None:
+            self.match_count_label.config(text="")
+            return
+        try:
+            positions = self._search_positions(query)
+        except re.error:
+            self.match_count_label.config(text="Invalid regex")
+            return
+        self.match_count_label.config(text=f"{len(positions)} match(es)")
+        if move_selection and positions:
+            start_index = self.table.selected_position or 0
+            i = bisect_left(positions, start_index)
+            self.table.select_position(positions[i % len(positions)])
+        if self.find_all_window is not None:
+            self._fill_find_all(query, positions)
 
-        # Start search from the item AFTER the currently selected one.
-        selected_item = self.tree.focus()
-        start_index = 0
-        if selected_item:
-            start_index = self.tree.index(selected_item) + 1
+    def find_all(self):
+        """
+        Opens (or refreshes) a window listing every row that matches the search query. Selecting a result jumps to it.
+        """
+        query = self.search_entry.get()
+        if not query:
+            messagebox.showinfo("Info", "Please enter a search term in the 'Find' box.")
+            return
+        if self.find_all_window is None:
+            window = tk.Toplevel(self)
+            window.geometry("700x400")
+            window.protocol("WM_DELETE_WINDOW", self._close_find_all)
 
-        # Create a re-ordered list to search from the start_index to the end, then wrap around to the beginning.
-        items_to_search = all_items[start_index:] + all_items[:start_index]
+            def row_values(position):
+                row = self.table.rows[position]
+                preview = self.doc.text(row, self.view_language_index).replace('\n', ' ').replace('\r', ' ').strip()
+                return (row + 1, self.doc.key(row), preview)
 
-        lang_index = self._get_selected_language_index()
-        if lang_index is None: return
+            def on_select(event):
+                position = results.selected_row()
+                if position is not None:
+                    self.table.select_position(position)
 
-        for item in items_to_search:
-            # Search in the full text from the data source, not just the treeview preview.
-            term_key = self.tree.item(item, "values")[1]
-            original_index = self.term_to_original_index[term_key]
-            full_text = self.terms_list_ref[original_index]['Languages']['Array'][lang_index]
-
-            if query.lower() in full_text.lower():
-                self.tree.selection_set(item)
-                self.tree.focus(item)
-                self.tree.see(item) # Scroll to make the found item visible.
-                self.status_bar.config(text=f"Found '{query}'")
-                return
-        
-        self.status_bar.config(text=f"No more occurrences of '{query}' found.")
-        messagebox.showinfo("Search Finished", f"No more occurrences of '{query}' were found.")
+            results = VirtualTable(window, ("#", "term", "text"), row_values, on_select=on_select)
+            results.tree.heading("#", text="No.")
+            results.tree.heading("term", text="Term Key")
+            results.tree.heading("text", text="Translation Text (Preview)")
+            results.tree.column("#", width=50, anchor='center')
+            results.tree.column("term", width=220)
+            results.tree.column("text", width=420)
+            results.pack(expand=True, fill=tk.BOTH)
+            self.find_all_window = window
+            self.find_all_results = results
+        try:
+            self._fill_find_all(query, self._search_positions(query))
+        except re.error as e:
+            messagebox.showerror("Invalid Regular Expression", f"{e}")
+        self.find_all_window.lift()
+
+    def _fill_find_all(self, query, positions):
+        self.find_all_window.title(f"Find All: '{query}' - {len(positions)} match(es)")
+        self.find_all_results.set_rows(positions)
+
+    def _close_find_all(self):
+        self.find_all_window.destroy()
+        self.find_all_window = None
+        self.find_all_results = None
 
     def replace_selected(self):
         """
         Replaces the first occurrence of the search query within the text editor for the selected row.
         This does NOT save the change; the user must click "Save Changes".
         """
-        if not self.tree.focus():
+        if self.table.selected_row() is None:
             messagebox.showinfo("Info", "Please select a row to replace.")
             return
 
@@ -532,9 +2524,14 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
         if not query or self.editor_text.cget("state") == "disabled":
             return
 
-        # Replace only the first occurrence (count=1) in the editor's current text, case-insensitively.
+        # Replace only the first occurrence (count=1) in the editor's current text, using the matching options.
+        try:
+            pattern = self._compile_pattern(query)
+        except re.error as e:
+            messagebox.showerror("Invalid Regular Expression", f"{e}")
+            return
         current_text = self.editor_text.get("1.0", "end-1c")
-        new_text, count = re.subn(re.escape(query), replace_with, current_text, count=1, flags=re.IGNORECASE)
+        new_text, count = replace_text(current_text, pattern, replace_with, regex=self.regex_var.get(), count=1)
         
         if count > 0:
             self.editor_text.delete("1.0", "end")
@@ -545,47 +2542,64 @@ class I2Editor(tkinterdnd2.TkinterDnD.Tk):
 
     def replace_all(self):
         """
-        Replaces ALL occurrences of the search query in ALL terms for the current language.
-        This action is permanent and saves directly to the data.
+        Replaces ALL occurrences of the search query in ALL terms (of the table) for the current language.
+        The replacements are planned on the raw language column and shown in a preview, where single
+        changes can be rejected; the accepted ones are applied in one batch with a single table refresh.
         """
         query = self.search_entry.get()
         replace_with = self.replace_entry.get()
         if not query:
             messagebox.showinfo("Info", "Please enter a search term in the 'Find' box.")
             return
-            
-        if not messagebox.askyesno("Confirm Replace All", f"Are you sure you want to replace all occurrences of '{query}' with '{replace_with}'? This cannot be undone."):
+        if self._task_running("save"):
+            messagebox.showwarning("Busy", "Please wait until the file has been saved.")
             return
 
-        count = 0
         lang_index = self._get_selected_language_index()
-        if lang_index is None: return
+        if lang_index is None or self.doc is None: return
 
-        for item_id in self.tree.get_children():
-            term_key = self.tree.item(item_id, "values")[1]
-            
-            # Get the full text, perform the replacement, and then update.
-            original_index = self.term_to_original_index[term_key]
-            old_text = self.terms_list_ref[original_index]['Languages']['Array'][lang_index]
+        try:
+            pattern = self._compile_pattern(query)
+        except re.error as e:
+            messagebox.showerror("Invalid Regular Expression", f"{e}")
+            return
 
-            # Use re.subn which returns the new string and the number of substitutions made.
-            new_text, num_replacements = re.subn(re.escape(query), replace_with, old_text, flags=re.IGNORECASE)
+        # Without regex mode, only the rows the search index reports can contain the query.
+        rows = self.table.rows
+        if not self.regex_var.get() and self.search_indexes is not None:
+            rows = [row for row in self.search_indexes.search(lang_index, query)
+                    if self.table.position_of(row) is not None]
+        changes = plan_replacements(self.doc.terms.column(lang_index), pattern, replace_with, rows=rows,
+                                    regex=self.regex_var.get())
+        if not changes:
+            self.status_bar.config(text=f"No occurrences of '{query}' found.")
+            messagebox.showinfo("Replace All", f"No occurrences of '{query}' were found.")
+            return
+
+        count = sum(change.count for change in changes)
+        ReplacePreview(self, f"Replace All: '{query}' \u2192 '{replace_with}' ({count} occurrence(s) in {len(changes)} term(s))",
+                       self.doc, changes, lambda accepted: self._apply_replacements(lang_index, accepted))
+
+    def _apply_replacements(self, lang_index, changes):
+        """
+        Applies the changes accepted in the Replace All preview, then refreshes the table and status bar once.
+        """
+        if not changes:
+            self.status_bar.config(text="Replace All: no changes applied.")
+            return
+        count = sum(change.count for change in changes)
+        self._apply_edits([(change.row, lang_index, change.new_text) for change in changes],
+                          f"Replace All '{self.search_entry.get()}'")
 
-            if num_replacements > 0:
-                self.update_data_and_tree(term_key, new_text)
-                count += num_replacements
-        
         # Refresh the editor if the currently edited item was changed during the "replace all".
-        if self.currently_editing_term_key:
-            selected = self.tree.selection()
-            if selected:
-                self.on_tree_select(None)
-                self.tree.selection_set(selected)
+        if self.currently_editing_row is not None and self.table.selected_row() is not None:
+            self.on_tree_select(None)
+        self._update_live_search(move_selection=False)
 
-        self.status_bar.config(text=f"Replaced {count} occurrence(s) in total.")
-        messagebox.showinfo("Replace All", f"Finished. Replaced {count} occurrence(s).")
+        self.status_bar.config(text=f"Replaced {count} occurrence(s) in {len(changes)} term(s).")
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Workspaces load files in worker processes, also from a frozen executable.
     app = I2Editor()
     app.mainloop()
@@ -0,0 +1,31 @@
+"""
+GUI-free building blocks of the I2Languages Editor.
+
+The Tk editor (I2Languages-Editor.py) and the command line interface (python -m i2editor)
+both use this package, so everything here must work without a display.
+"""
+from .core import (
+    I2Document,
+    TermStore,
+    TermIndex,
+    StreamingLoader,
+    SourceLayout,
+    OperationCancelled,
+    load_document,
+    find_terms_path,
+    find_terms_array,
+    detect_languages,
+    document_stats,
+    validate_document,
+)
+from .workspace import Workspace, load_workspace
+from .langprofile import LanguageProfile, get_profile
+from .tm import TranslationMemory, Suggestion
+from .cache import read_cache, write_cache
+from .diff import diff_documents, merge_documents
+from .checks import Checker, Issue
+from .filters import KeyTree, query_rows
+from .bench import generate_source, run_benchmarks
+from .pretranslate import Backend, DictionaryBackend, TranslationMemoryBackend
+from .journal import Journal, find_recoverable
+from .unity import UnityDocument, load_dump
@@ -0,0 +1,343 @@
+"""
+Benchmarks of the editor's hot paths on synthetic I2Languages sources.
+
+generate_source() writes a JSON file shaped like a Unity I2Languages asset dump, with any number of terms,
+languages and text length. run_source() then goes through what a session in the editor does with a file:
+load, language detection, filling the table, building the search index, find, replace all, TXT export and
+import, and save. Every step is timed (the best of several runs) and, in one extra run under tracemalloc,
+its peak memory is measured. The results are plain dictionaries that can be written as JSON and compared
+with a baseline to catch regressions before a release.
+"""
+import gc
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+
+from . import core
+from .replace import apply_changes, build_pattern, plan_replacements
+from .search import SearchIndexes
+
+# Version of the results format written by run_benchmarks().
+RESULTS_FORMAT = 1
+
+# Steps of a benchmark run, in the order they are executed.
+STEPS = ('load', 'detect', 'populate', 'index', 'find', 'replace_all', 'export_txt', 'import_txt', 'save')
+
+# Words the synthetic texts are made of. Latin and Cyrillic languages get their most common words, so that
+# language detection has the same work to do as on a real file; the others are recognized by their script.
+VOCABULARY = (
+    ('en', 'the and of to a in is you for it on with are this that be your not or can '
+           'settings speed game score level player start options graphics sound test result'),
+    ('es', 'de la el que en y los las del se por un una para con no es su al lo '
+           'ajustes velocidad juego nivel jugador opciones sonido prueba resultado'),
+    ('ru', 'и в не на что с по как это для к вы из от у все так же '
+           'настройки скорость игра уровень игрок параметры звук тест результат'),
+    ('ja', '設定 を ゲーム の 開始 は スコア です レベル ます プレイヤー する オプション サウンド'),
+    ('de', 'der die und das ist nicht sie zu den mit ein eine auf für sich dem des von wird '
+           'Einstellungen Geschwindigkeit Spiel Stufe Spieler Optionen Ton Ergebnis'),
+    ('fr', 'de la le et les des en un une du est pour que pas vous sur au avec ce dans '
+           'paramètres vitesse jeu niveau joueur options son essai résultat'),
+    ('zh', '设置 游戏 开始 分数 的 是 在 等级 玩家 选项 声音 测试 结果'),
+    ('ko', '설정 게임 시작 점수 레벨 플레이어 옵션 소리 테스트 결과 하다 있다'),
+    ('it', 'di il che la e per non un una del della le è sono con si al gli da '
+           'impostazioni velocità gioco livello giocatore opzioni suono risultato'),
+    ('pt', 'de que o a e do da em um para com não uma os no se na por você '
+           'configurações velocidade jogo nível jogador opções som resultado'),
+    ('pl', 'i w nie na się z do to że jest jak o co po ale dla tak '
+           'ustawienia prędkość gra poziom gracz opcje dźwięk wynik'),
+    ('tr', 've bir bu da de için ile ne çok daha olarak gibi ama sen ben değil '
+           'ayarlar hız oyun seviye oyuncu seçenekler ses sonuç'),
+)
+
+# Categories of the synthetic term keys ("Menu/Options/Term123").
+CATEGORIES = ('Menu', 'Dialog', 'Items', 'Quests', 'Tutorial', 'Achievements', 'Credits', 'System')
+SUBCATEGORIES = ('Main', 'Options', 'Help', 'Popup', 'Tooltip')
+
+
+# --- Synthetic sources ---
+
+def _synthetic_text(rng, words, separator, length):
+    """
+    Returns a text of about length characters, sometimes with rich-text tags, placeholders or line breaks.
+    """
+    target = rng.randint(max(1, length // 2), max(1, length * 3 // 2))
+    parts = []
+    size = 0
+    while size < target:
+        word = rng.choice(words)
+        parts.append(word)
+        size += len(word) + len(separator)
+    text = separator.join(parts)
+    roll = rng.random()
+    if roll < 0.1:
+        text = f"<b>{text}</b>"
+    elif roll < 0.2:
+        text = f"<size=18>{text}</size> {{0}}"
+    elif roll < 0.25:
+        text = text.replace(separator, "\n", 1)
+    return text
+
+
+def generate_terms(term_count, language_count, length=40, seed=0, empty_rate=0.05, identical_rate=0.02):
+    """
+    Returns the list of term dictionaries of a synthetic source. Language 1 is English (the source language);
+    the other languages leave empty_rate of their translations empty and copy the source for identical_rate.
+    """
+    rng = random.Random(seed)
+    vocabulary = [VOCABULARY[lang_index % len(VOCABULARY)] for lang_index in range(language_count)]
+    words = [text.split() for _, text in vocabulary]
+    separators = ["" if code in ('ja', 'zh') else " " for code, _ in vocabulary]
+    terms = []
+    for row in range(term_count):
+        source = _synthetic_text(rng, words[0], separators[0], length)
+        texts = [source]
+        for lang_index in range(1, language_count):
+            roll = rng.random()
+            if roll < empty_rate:
+                texts.append("")
+            elif roll < empty_rate + identical_rate:
+                texts.append(source)
+            else:
+                texts.append(_synthetic_text(rng, words[lang_index], separators[lang_index], length))
+        key = f"{CATEGORIES[row % len(CATEGORIES)]}/{SUBCATEGORIES[row // 7 % len(SUBCATEGORIES)]}/Term{row}"
+        terms.append({
+            "Term": key,
+            "TermType": 0,
+            "Description": "",
+            "Languages": {"Array": texts},
+            "Flags": {"Array": [0] * language_count},
+            "Languages_Touch": {"Array": [""] * language_count},
+        })
+    return terms
+
+
+def generate_source(path, term_count, language_count=8, length=40, seed=0):
+    """
+    Writes a synthetic I2Languages JSON file with the layout of a Unity asset dump. Returns its size in bytes.
+    """
+    data = {
+        "m_GameObject": {"m_FileID": 0, "m_PathID": 0},
+        "m_Enabled": 1,
+        "m_Name": "",
+        "mSource": {
+            "UserAgreesToHaveItOnTheScene": 0,
+            "mTerms": {"Array": generate_terms(term_count, language_count, length, seed)},
+            "CaseInsensitiveTerms": 0,
+            "mLanguages": {"Array": []},
+        },
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return os.path.getsize(path)
+
+
+# --- Running ---
+
+def _measure(trace, func, *args):
+    """
+    Calls func(*args) and returns (result, seconds, peak_bytes). peak_bytes is the highest amount of memory
+    allocated during the call, measured with tracemalloc when trace is set (None otherwise).
+    """
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def _queries(doc, lang_index, count=3):
+    """
+    Picks words of the document to search for: the longest word of texts spread over the column.
+    """
+    queries = []
+    for position in range(1, count + 1):
+        text = doc.text(len(doc) * position // (count + 1), lang_index)
+        words = [word for word in text.replace("<", " ").replace(">", " ").split() if len(word) >= 3]
+        if words:
+            queries.append(max(words, key=len))
+    return queries or ["the"]
+
+
+def _populate(doc, lang_index):
+    """
+    What the table needs from a newly loaded file: the term index, and the preview values of every row
+    (what scrolling through the whole table renders).
+    """
+    doc.term_index()
+    for row in range(len(doc)):
+        doc.key(row)
+        doc.text(row, lang_index).replace('\n', ' ').replace('\r', ' ').strip()
+
+
+def _find(doc, indexes, lang_index, queries):
+    """
+    Find with the search index, as the Find box does, and one regular expression checked on every row.
+    """
+    found = sum(len(indexes.search(lang_index, query)) for query in queries)
+    pattern = build_pattern(r'\{\d+\}', regex=True)
+    column = doc.terms.column(lang_index)
+    return found + sum(1 for text in column if isinstance(text, str) and pattern.search(text))
+
+
+def _replace_all(doc, indexes, lang_index, query):
+    rows = indexes.search(lang_index, query)
+    changes = plan_replacements(doc.terms.column(lang_index), query, query.upper(), rows=rows)
+    apply_changes(doc, lang_index, changes)
+    for change in changes:
+        indexes.update(change.row, lang_index, change.new_text)
+    return len(changes)
+
+
+def _import_txt(doc, lang_index, path):
+    lines = core.read_txt(path)
+    changed = 0
+    for row, text in enumerate(lines[:len(doc)]):
+        if doc.set_text(row, lang_index, text) != text:
+            changed += 1
+    return changed
+
+
+def _run_once(path, workdir, trace, info):
+    """
+    Goes once through every step on a freshly loaded document. Yields (step, seconds, peak_bytes).
+    The size of the document is stored in info.
+    """
+    doc, seconds, peak = _measure(trace, core.load_document, path)
+    info.update(terms=len(doc), languages=doc.language_count)
+    yield 'load', seconds, peak
+    (_, english_index), seconds, peak = _measure(trace, core.detect_languages, doc)
+    yield 'detect', seconds, peak
+    source_index = english_index if english_index is not None else 0
+    lang_index = 1 if source_index == 0 and doc.language_count > 1 else 0
+
+    _, seconds, peak = _measure(trace, _populate, doc, lang_index)
+    yield 'populate', seconds, peak
+    indexes = SearchIndexes(doc)
+    _, seconds, peak = _measure(trace, indexes.get, lang_index)
+    yield 'index', seconds, peak
+    queries = _queries(doc, lang_index)
+    _, seconds, peak = _measure(trace, _find, doc, indexes, lang_index, queries)
+    yield 'find', seconds, peak
+    _, seconds, peak = _measure(trace, _replace_all, doc, indexes, lang_index, queries[0])
+    yield 'replace_all', seconds, peak
+
+    txt_path = os.path.join(workdir, 'bench-export.txt')
+    _, seconds, peak = _measure(trace, core.export_txt, doc, lang_index, txt_path)
+    yield 'export_txt', seconds, peak
+    _, seconds, peak = _measure(trace, _import_txt, doc, lang_index, txt_path)
+    yield 'import_txt', seconds, peak
+    _, seconds, peak = _measure(trace, doc.save, os.path.join(workdir, 'bench-save.json'))
+    yield 'save', seconds, peak
+
+
+def run_source(path, repeat=3, memory=True, workdir=None, progress=None):
+    """
+    Benchmarks one file. Every step keeps the best of repeat timed runs; with memory=True one more run
+    measures the peak memory of each step (tracemalloc slows code down, so it is never timed).
+    progress(step, run) is called after every step.
+    """
+    result = {
+        'name': os.path.basename(path),
+        'terms': None,
+        'languages': None,
+        'bytes': os.path.getsize(path),
+        'steps': {step: {'seconds': None, 'runs': [], 'peak_bytes': None} for step in STEPS},
+    }
+    with tempfile.TemporaryDirectory(dir=workdir) as directory:
+        for run in range(repeat + (1 if memory else 0)):
+            trace = run == repeat
+            for step, seconds, peak in _run_once(path, directory, trace, result):
+                entry = result['steps'][step]
+                if trace:
+                    entry['peak_bytes'] = peak
+                else:
+                    entry['runs'].append(round(seconds, 6))
+                if progress:
+                    progress(step, run)
+    for entry in result['steps'].values():
+        entry['seconds'] = min(entry['runs']) if entry['runs'] else None
+    return result
+
+
+def run_benchmarks(paths=(), sizes=(10000, 100000), language_count=8, length=40, repeat=3, memory=True,
+                   seed=0, progress=None):
+    """
+    Benchmarks the given files, or synthetic files of every size in sizes (term counts) when none are given.
+    Returns the results as a JSON-compatible dictionary.
+    """
+    results = {
+        'format': RESULTS_FORMAT,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeat': repeat,
+        'sources': [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        if not paths:
+            paths = []
+            for term_count in sizes:
+                path = os.path.join(directory, f"synthetic-{term_count}x{language_count}.json")
+                generate_source(path, term_count, language_count, length, seed)
+                paths.append(path)
+            results['synthetic'] = {'languages': language_count, 'length': length, 'seed': seed}
+        for path in paths:
+            results['sources'].append(run_source(path, repeat, memory, directory,
+                                                 progress and (lambda step, run, path=path: progress(path, step, run))))
+    return results
+
+
+# --- Comparing ---
+
+def compare_results(baseline, results, tolerance=0.25, min_seconds=0.005):
+    """
+    Returns the regressions of results against a baseline, as readable strings: steps more than tolerance
+    (a fraction) slower or using that much more memory, for the sources both have (matched by name).
+    Differences below min_seconds are ignored as noise.
+    """
+    baseline_sources = {source['name']: source for source in baseline.get('sources', [])}
+    regressions = []
+    for source in results['sources']:
+        base = baseline_sources.get(source['name'])
+        if base is None:
+            continue
+        for step, entry in source['steps'].items():
+            base_entry = base['steps'].get(step)
+            if not base_entry:
+                continue
+            seconds, base_seconds = entry['seconds'], base_entry.get('seconds')
+            if seconds is not None and base_seconds is not None \
+                    and seconds > base_seconds * (1 + tolerance) and seconds - base_seconds > min_seconds:
+                regressions.append(f"{source['name']}: {step} took {seconds:.3f} s (baseline {base_seconds:.3f} s)")
+            peak, base_peak = entry['peak_bytes'], base_entry.get('peak_bytes')
+            if peak is not None and base_peak and peak > base_peak * (1 + tolerance):
+                regressions.append(f"{source['name']}: {step} used {peak / 1e6:.1f} MB "
+                                   f"(baseline {base_peak / 1e6:.1f} MB)")
+    return regressions
+
+
+def format_results(results):
+    """
+    Returns the results as a readable table.
+    """
+    lines = []
+    for source in results['sources']:
+        lines.append(f"{source['name']}: {source['terms']} terms, {source['languages']} languages, "
+                     f"{source['bytes'] / 1e6:.1f} MB")
+        for step in STEPS:
+            entry = source['steps'][step]
+            seconds = f"{entry['seconds']:9.3f} s" if entry['seconds'] is not None else "        -  "
+            peak = f"  peak {entry['peak_bytes'] / 1e6:8.1f} MB" if entry['peak_bytes'] is not None else ""
+            lines.append(f"  {step:<12} {seconds}{peak}")
+    return "\n".join(lines)
@@ -0,0 +1,281 @@
+"""
+Session cache: a binary snapshot of every file opened, so reopening it doesn't parse the JSON again.
+
+A cache file is a plain binary file holding the parsed term table in a flat layout: for the keys and for
+every language column, an array of byte offsets followed by one UTF-8 blob with all of the strings. The row
+metadata (language counts, term shapes, byte spans of the terms in the JSON file) are plain integer arrays,
+and everything else (the skeleton, the shape table, the language profile) is a small JSON block at the end.
+Reading one back decodes every string, but that is a single slice and decode per string instead of a
+JSON parse of the whole file.
+
+Caches are keyed by the absolute path of the JSON file and remember its size, modification time and a hash
+of its contents. A cache is used when size and time are unchanged, or when only the time changed but the
+contents hash the same (a file that was copied or touched). Anything else means the file is parsed again.
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+from . import core, instrument, langprofile
+
+# Default location of the cache files.
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.i2languages-editor', 'cache')
+# Oldest cache files are removed once the directory grows beyond this size.
+CACHE_LIMIT = 512 * 1024 * 1024
+
+_MAGIC = b'I2ECACHE'
+_VERSION = 2
+# Magic, format version, offset and length of the JSON metadata block.
+_HEADER = struct.Struct('<8sIQQ')
+
+
+def cache_path(path, directory=None):
+    """
+    Returns the cache file used for a JSON file.
+    """
+    name = os.path.normcase(os.path.abspath(path)).encode('utf-8', 'surrogatepass')
+    return os.path.join(directory or CACHE_DIR, hashlib.blake2b(name, digest_size=16).hexdigest() + '.i2cache')
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    Returns a hash of the contents of a file.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Writing ---
+
+def _encode_strings(values, exceptions, lang_index):
+    """
+    Returns the offsets and the UTF-8 blob of a list of strings. Values that are not strings (None keys,
+    numbers found where a translation was expected) are stored as "" and listed in exceptions instead.
+    """
+    encoded = []
+    for row, value in enumerate(values):
+        if isinstance(value, str):
+            encoded.append(value.encode('utf-8', 'surrogatepass'))
+        else:
+            encoded.append(b'')
+            exceptions.append([lang_index, row, value])
+    offsets = array('q', [0])
+    offsets.extend(accumulate(map(len, encoded)))
+    return offsets, b''.join(encoded)
+
+
+def write_cache(doc, directory=None):
+    """
+    Stores a snapshot of a document that matches its file on disk. Returns the cache file, or None if the
+    document can't be cached (unsaved edits, not loaded from a file, or the file changed since it was read).
+    Raises OSError if the cache can't be written.
+    """
+    with instrument.timed('write_cache', doc.path):
+        return _write_cache(doc, directory)
+
+
+def _write_cache(doc, directory):
+    source = doc.source
+    if doc.path is None or doc.skeleton is None or doc.terms.dirty or source is None or source.spans is None:
+        return None
+    path = os.path.abspath(doc.path)
+    if not source.is_current(len(doc)):
+        return None
+    digest = file_hash(path)
+    if not source.is_current(len(doc)):
+        return None  # Modified while it was being hashed.
+
+    directory = directory or CACHE_DIR
+    os.makedirs(directory, exist_ok=True)
+    target = cache_path(path, directory)
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    terms = doc.terms
+    sections = {}
+    exceptions = []
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(b'\0' * _HEADER.size)
+
+            def add(name, data):
+                offset = f.tell()
+                f.write(data)
+                f.write(b'\0' * (-f.tell() % 8))  # Keeps every section 8-byte aligned.
+                sections[name] = [offset, len(data)]
+
+            offsets, blob = _encode_strings(terms.keys, exceptions, -1)
+            add('keys.offsets', offsets.tobytes())
+            add('keys.blob', blob)
+            for lang_index, column in enumerate(terms.columns):
+                offsets, blob = _encode_strings(column, exceptions, lang_index)
+                add(f'lang{lang_index}.offsets', offsets.tobytes())
+                add(f'lang{lang_index}.blob', blob)
+            add('lengths', array('q', terms.lengths).tobytes())
+            add('shapes', array('q', terms.shapes).tobytes())
+            add('spans', array('q', source.spans).tobytes())
+
+            profile = langprofile.get_profile(doc)
+            meta = {
+                'source': {'path': path, 'size': source.stat[0], 'mtime_ns': source.stat[1], 'hash': digest},
+                'byteorder': sys.byteorder,
+                'rows': len(terms),
+                'languages': terms.language_count,
+                'terms_path': list(doc.terms_path),
+                'skeleton': doc.skeleton,
+                'shape_table': terms.shape_table,
+                'exceptions': exceptions,
+                'layout': {'item_indent': source.item_indent, 'indent': source.indent,
+                           'separators': list(source.separators), 'newline': source.newline},
+                'profile': {'columns': [list(column) for column in profile.columns],
+                            'english_index': profile.english_index},
+                'sections': sections,
+            }
+            meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8', 'surrogatepass')
+            meta_offset = f.tell()
+            f.write(meta_bytes)
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, _VERSION, meta_offset, len(meta_bytes)))
+        instrument.count('bytes_written', os.path.getsize(temp_path))
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    prune(directory, keep=target)
+    return target
+
+
+def prune(directory=None, limit=CACHE_LIMIT, keep=None):
+    """
+    Removes the least recently used cache files until the directory holds at most limit bytes.
+    """
+    directory = directory or CACHE_DIR
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.i2cache') and entry.path != keep:
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    if keep is not None and os.path.exists(keep):
+        total += os.path.getsize(keep)
+    for _, size, cache_file in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(cache_file)
+            total -= size
+        except OSError:
+            pass  # In use by another editor (Windows); it will be removed later.
+
+
+# --- Reading ---
+
+def _read_meta(data):
+    magic, version, meta_offset, meta_length = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Not a cache file of this version.")
+    meta = json.loads(data[meta_offset:meta_offset + meta_length].decode('utf-8', 'surrogatepass'))
+    if meta['byteorder'] != sys.byteorder:
+        raise ValueError("Cache written on a machine with another byte order.")
+    return meta
+
+
+def _is_valid(meta, path, stat):
+    """
+    Checks that the cache describes the file as it is now (see the module docstring).
+    """
+    source = meta['source']
+    if source['path'] != path or source['size'] != stat.st_size:
+        return False
+    return source['mtime_ns'] == stat.st_mtime_ns or source['hash'] == file_hash(path)
+
+
+def _int_array(data, section, typecode='q'):
+    offset, length = section
+    values = array('q')
+    values.frombytes(data[offset:offset + length])
+    return values if typecode == 'q' else array(typecode, values)
+
+
+def _strings(data, offsets_section, blob_section, count):
+    offsets = _int_array(data, offsets_section)
+    if len(offsets) != count + 1:
+        raise ValueError("Cache section has the wrong number of rows.")
+    start, length = blob_section
+    blob = data[start:start + length]
+    return [blob[begin:end].decode('utf-8', 'surrogatepass') for begin, end in zip(offsets, offsets[1:])]
+
+
+def read_cache(path, directory=None):
+    """
+    Returns the cached I2Document of a JSON file, or None if there is no valid cache for it.
+    """
+    with instrument.timed('read_cache', path):
+        return _read_cache(path, directory)
+
+
+def _read_cache(path, directory):
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+        with open(cache_path(path, directory), 'rb') as f:
+            data = f.read()
+        meta = _read_meta(data)
+        if not _is_valid(meta, path, stat):
+            return None
+        sections = meta['sections']
+        rows = meta['rows']
+        keys = _strings(data, sections['keys.offsets'], sections['keys.blob'], rows)
+        columns = [_strings(data, sections[f'lang{lang_index}.offsets'], sections[f'lang{lang_index}.blob'], rows)
+                   for lang_index in range(meta['languages'])]
+        lengths = _int_array(data, sections['lengths'], 'l')
+        shapes = _int_array(data, sections['shapes'], 'l')
+        spans = _int_array(data, sections['spans'])
+    except (OSError, ValueError, KeyError, TypeError, IndexError, struct.error):
+        return None  # Missing, stale or damaged caches are simply ignored.
+    if not len(lengths) == len(shapes) == rows or len(spans) != 2 * rows:
+        return None
+
+    for lang_index, row, value in meta['exceptions']:
+        if lang_index < 0:
+            keys[row] = value
+        else:
+            columns[lang_index][row] = value
+    terms = core.TermStore.from_columns(keys, columns, lengths, shapes, meta['shape_table'])
+    doc = core.I2Document(meta['skeleton'], terms, tuple(meta['terms_path']), path)
+    layout = meta['layout']
+    doc.source = core.SourceLayout(path, None, layout['item_indent'], layout['indent'],
+                                   tuple(layout['separators']), layout['newline'])
+    doc.source.spans = spans
+    doc.source.stat = (stat.st_size, stat.st_mtime_ns)
+    profile = meta.get('profile')
+    if profile:
+        columns = [langprofile.ColumnProfile(*column[:-1], [tuple(word) for word in column[-1]])
+                   for column in profile['columns']]
+        langprofile.remember_profile(doc, langprofile.LanguageProfile(columns, profile['english_index']))
+    try:
+        os.utime(cache_path(path, directory))  # Marks the cache as recently used for prune().
+    except OSError:
+        pass
+    return doc
+
+
+def load_document(path, progress=None, batch_size=5000, directory=None):
+    """
+    Loads a JSON file from its cache if possible, otherwise parses it (see core.load_document) and caches it.
+    Failing to write the cache is not an error.
+    """
+    doc = read_cache(path, directory)
+    if doc is not None:
+        return doc
+    doc = core.load_document(path, progress=progress, batch_size=batch_size)
+    try:
+        write_cache(doc, directory)
+    except OSError:
+        pass
+    return doc
@@ -0,0 +1,178 @@
+"""
+Translation checks: rich-text tags, format placeholders and empty translations.
+
+One compiled tokenizer finds the Unity rich-text tags (<b>, <size=18>, </color>) and the format placeholders
+({0}, {1:N0}, {[PLAYER]}, %s) of a text. Every translation is compared with the text of the source language:
+placeholders must appear as often as in the source, tags must be balanced, and a translation may not be
+empty when the source is not. The first check of a document runs over all languages in chunks, reporting
+progress after each; afterwards only the cells that were edited are checked again.
+"""
+import re
+from collections import Counter, namedtuple
+
+from . import instrument
+
+# Kinds of issues, in the order they are listed.
+EMPTY = 'empty translation'
+UNBALANCED_TAG = 'unbalanced tag'
+MISSING_PLACEHOLDER = 'missing placeholder'
+EXTRA_PLACEHOLDER = 'extra placeholder'
+KINDS = (EMPTY, UNBALANCED_TAG, MISSING_PLACEHOLDER, EXTRA_PLACEHOLDER)
+
+Issue = namedtuple('Issue', 'row lang_index kind detail')
+Issue.__doc__ = """
+A problem found in one translation (row, lang_index), with a short description such as "{1}" or "<b> is not closed".
+"""
+
+# Tags and placeholders in one pass. A tag is a letter right after "<" (so "a < b" is not one).
+TOKEN_PATTERN = re.compile(
+    r'<(?P<close>/)?(?P<tag>[A-Za-z][\w-]*)(?:\s*=[^<>]*)?\s*(?P<void>/)?>'
+    r'|(?P<placeholder>\{\[?[\w.]+\]?(?:[,:][^{}]*)?\}|%\d*\$?[sd])'
+)
+
+# Tags that have no closing tag.
+VOID_TAGS = frozenset(('br', 'quad', 'sprite', 'space', 'pos', 'page'))
+
+# What scan() returns for the (most common) texts without any markup.
+_PLAIN = ([], Counter())
+
+
+def scan(text):
+    """
+    Returns the tag problems of a text (a list of descriptions) and a Counter of its placeholders.
+    The result must not be modified (texts without markup share one).
+    """
+    if '<' not in text and '{' not in text and '%' not in text:
+        return _PLAIN
+    problems = []
+    placeholders = Counter()
+    open_tags = []
+    for match in TOKEN_PATTERN.finditer(text):
+        placeholder = match.group('placeholder')
+        if placeholder:
+            placeholders[placeholder] += 1
+            continue
+        tag = match.group('tag').lower()
+        if match.group('void') or tag in VOID_TAGS:
+            continue
+        if not match.group('close'):
+            open_tags.append(tag)
+        elif open_tags and open_tags[-1] == tag:
+            open_tags.pop()
+        elif tag in open_tags:
+            # Closes an outer tag: the tags opened after it were never closed.
+            while open_tags[-1] != tag:
+                problems.append(f"<{open_tags.pop()}> is not closed")
+            open_tags.pop()
+        else:
+            problems.append(f"</{tag}> has no opening tag")
+    problems.extend(f"<{tag}> is not closed" for tag in reversed(open_tags))
+    return problems, placeholders
+
+
+def check_text(text, source_text, source_scan=None):
+    """
+    Returns the (kind, detail) problems of a translation compared with its source text. Pass the source text
+    itself with source_text=None to check only its tags. source_scan may hold scan(source_text) if known.
+    """
+    if source_text is not None and not text:
+        return [(EMPTY, "")] if source_text else []
+    tag_problems, placeholders = scan(text)
+    problems = [(UNBALANCED_TAG, detail) for detail in tag_problems]
+    if source_text is None:
+        return problems
+    _, source_placeholders = source_scan or scan(source_text)
+    if placeholders != source_placeholders:
+        problems.extend((MISSING_PLACEHOLDER, placeholder)
+                        for placeholder in sorted((source_placeholders - placeholders).elements()))
+        problems.extend((EXTRA_PLACEHOLDER, placeholder)
+                        for placeholder in sorted((placeholders - source_placeholders).elements()))
+    return problems
+
+
+def check_rows(doc, rows, source_lang, languages=None):
+    """
+    Checks the given rows in every language (or only in languages). Returns {(row, lang_index): [Issue]}
+    for the cells that have issues.
+    """
+    languages = range(doc.language_count) if languages is None else languages
+    found = {}
+    for row in rows:
+        source_text = doc.text(row, source_lang)
+        source_scan = scan(source_text)
+        for lang_index in languages:
+            if lang_index == source_lang:
+                problems = [(UNBALANCED_TAG, detail) for detail in source_scan[0]]
+            else:
+                problems = check_text(doc.text(row, lang_index), source_text, source_scan)
+            if problems:
+                found[row, lang_index] = [Issue(row, lang_index, kind, detail) for kind, detail in problems]
+    return found
+
+
+class Checker:
+    """
+    The issues of a document, kept up to date as it is edited.
+
+    check_all() checks every cell; recheck(row, lang_index) checks one edited cell again (or the whole row
+    when the source text was edited, since that can create or fix issues in every translation).
+    """
+    def __init__(self, doc, source_lang=0, chunk_size=5000):
+        self.doc = doc
+        self.source_lang = source_lang
+        self.chunk_size = chunk_size
+        self.cells = {}  # (row, lang_index) -> list of Issues, for the cells that have any.
+        self._issues = None  # Sorted list of every issue, rebuilt when the cells change.
+
+    def check_all(self, progress=None):
+        """
+        Checks every row of the document in chunks.
+        progress(rows_done, total_rows) is called after every chunk; it may raise to stop the check.
+        """
+        total = len(self.doc)
+        with instrument.timed('check_translations', f"{total} terms"):
+            self.cells = self._check_chunks(total, progress)
+        self._issues = None
+        return self.issues()
+
+    def _check_chunks(self, total, progress):
+        chunks = [range(start, min(total, start + self.chunk_size)) for start in range(0, total, self.chunk_size)]
+        cells = {}
+        for rows in chunks:
+            cells.update(check_rows(self.doc, rows, self.source_lang))
+            if progress:
+                progress(rows.stop, total)
+        return cells
+
+    def recheck(self, row, lang_index):
+        """
+        Checks a cell again after it was edited. Returns True if its issues changed.
+        """
+        languages = range(self.doc.language_count) if lang_index == self.source_lang else (lang_index,)
+        found = check_rows(self.doc, (row,), self.source_lang, languages)
+        changed = False
+        for cell_lang in languages:
+            issues = found.get((row, cell_lang))
+            if issues != self.cells.get((row, cell_lang)):
+                changed = True
+                if issues:
+                    self.cells[row, cell_lang] = issues
+                else:
+                    del self.cells[row, cell_lang]
+        if changed:
+            self._issues = None
+        return changed
+
+    def issues(self):
+        """
+        Returns every issue, ordered by row and language.
+        """
+        if self._issues is None:
+            self._issues = [issue for cell in sorted(self.cells) for issue in self.cells[cell]]
+        return self._issues
+
+    def counts(self):
+        """
+        Returns a Counter of the issues by kind.
+        """
+        return Counter(issue.kind for issue in self.issues())
@@ -0,0 +1,498 @@
+"""
+Command line interface for batch processing I2Languages JSON files without the GUI.
+
+Usage examples:
+    python -m i2editor export LanguageSource-*.json --language 2
+    python -m i2editor import LanguageSource-resources.json --language 2 --input translations.txt
+    python -m i2editor export LanguageSource-*.json --format xliff --source-language 1 --language 2
+    python -m i2editor import LanguageSource-resources.json --language 2 --input translations.po
+    python -m i2editor replace *.json --language 2 --find "Colour" --replace "Color"
+    python -m i2editor stats *.json --json
+    python -m i2editor validate *.json
+    python -m i2editor stats LanguageSource-resources.assets.txt
+    python -m i2editor check *.json --skip-empty
+    python -m i2editor tm-add LanguageSource-*.json
+    python -m i2editor diff old/LanguageSource.json new/LanguageSource.json
+    python -m i2editor merge translated.json update.json --base original.json -o merged.json
+    python -m i2editor pretranslate LanguageSource-*.json --language 3 --glossary glossary.csv
+    python -m i2editor generate synthetic.json --terms 100000 --languages 8
+    python -m i2editor bench --terms 10000 100000 -o results.json --compare baseline.json
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+
+from . import bench, checks, core, diff, exchange, langprofile, pretranslate, tm
+from .replace import plan_replacements, apply_changes
+
+
+def _expand_paths(patterns):
+    """
+    Expands glob patterns (shells on Windows don't do it for us) and keeps plain paths as they are.
+    """
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    return paths
+
+
+def _resolve_language(doc, language):
+    """
+    Converts the --language option (1-based number, or None for the detected English column) to a 0-based index.
+    """
+    if language is None:
+        _, english_index = core.detect_languages(doc)
+        return english_index if english_index is not None else 0
+    if not 1 <= language <= doc.language_count:
+        raise ValueError(f"Language {language} does not exist (the file has {doc.language_count} languages).")
+    return language - 1
+
+
+# File extension written for each --format.
+_EXTENSIONS = {'txt': '.txt', 'csv': '.csv', 'tsv': '.tsv', 'xliff': '.xlf', 'po': '.po'}
+
+
+def _exchange_path_for(json_path, directory=None, fmt='txt'):
+    """
+    Returns the default TXT (or other exchange) file used for exporting/importing a JSON file.
+    """
+    base = os.path.splitext(os.path.basename(json_path))[0] + _EXTENSIONS[fmt]
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory or os.path.dirname(json_path), base)
+
+
+def _output_path_for(json_path, directory=None):
+    """
+    Returns the path a modified JSON file is written to: in place, or inside --output-dir.
+    """
+    if not directory:
+        return json_path
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, os.path.basename(json_path))
+
+
+def _format_for(args, path):
+    """
+    The exchange format of a command: --format, else the extension of the given file, else TXT.
+    """
+    if args.format:
+        return args.format
+    if path and os.path.splitext(path)[1].lower() in exchange.FORMATS:
+        return exchange.format_for_path(path)
+    return 'txt'
+
+
+def cmd_export(args):
+    for path in args.files:
+        doc = core.load_document(path)
+        lang_index = _resolve_language(doc, args.language)
+        output = args.output if args.output and len(args.files) == 1 else None
+        fmt = _format_for(args, output)
+        out_path = output or _exchange_path_for(path, args.output_dir, fmt)
+        if fmt == 'txt':
+            count = core.export_txt(doc, lang_index, out_path)
+            print(f"{path}: exported {count} lines of Language {lang_index + 1} to {out_path}")
+            continue
+        source_index = _resolve_language(doc, args.source_language)
+        count = exchange.export_file(doc, out_path, fmt, source_lang=source_index, target_lang=lang_index)
+        print(f"{path}: exported {count} terms ({fmt}) to {out_path}")
+    return 0
+
+
+def _import_keyed(args, path, doc, lang_index, exchange_path, fmt):
+    """
+    Imports a key-aligned exchange file into doc. Returns the number of changed translations, or None if the
+    file was skipped because of --strict.
+    """
+    result = exchange.import_file(doc, exchange_path, fmt, target_lang=lang_index)
+    for key in result.new_keys[:20]:
+        print(f"{path}: {exchange_path} has a key that is not in the file: {key}", file=sys.stderr)
+    if len(result.new_keys) > 20:
+        print(f"{path}: ... and {len(result.new_keys) - 20} more new keys", file=sys.stderr)
+    print(f"{path}: {result.matched} keys matched, {len(result.new_keys)} new, "
+          f"{len(result.unmatched_keys)} terms not in {exchange_path}")
+    if args.strict and (result.new_keys or result.unmatched_keys):
+        print(f"{path}: keys do not match. Skipped.", file=sys.stderr)
+        return None
+    for row, edit_lang, text in result.edits:
+        doc.set_text(row, edit_lang, text)
+    return len(result.edits)
+
+
+def cmd_import(args):
+    status = 0
+    for path in args.files:
+        doc = core.load_document(path)
+        lang_index = _resolve_language(doc, args.language)
+        given = args.input if args.input and len(args.files) == 1 else None
+        fmt = _format_for(args, given)
+        txt_path = given or _exchange_path_for(path, args.input_dir, fmt)
+        if fmt != 'txt':
+            # Key-aligned formats: rows are matched by term key, not by line number.
+            changed = _import_keyed(args, path, doc, lang_index, txt_path, fmt)
+            if changed is None:
+                status = 1
+                continue
+            if not changed:
+                print(f"{path}: no translations changed")
+                continue
+            out_path = _output_path_for(path, args.output_dir)
+            doc.save(out_path)
+            print(f"{path}: {changed} translations changed, saved to {out_path}")
+            continue
+        lines = core.read_txt(txt_path)
+        if len(lines) != len(doc):
+            message = (f"{path}: the number of lines in {txt_path} ({len(lines)}) does not match "
+                       f"the number of terms ({len(doc)}).")
+            if args.strict:
+                print(message + " Skipped.", file=sys.stderr)
+                status = 1
+                continue
+            print(message + " Importing matching lines only.", file=sys.stderr)
+        changed = 0
+        for row, new_text in zip(range(len(doc)), lines):
+            if doc.set_text(row, lang_index, new_text) != new_text:
+                changed += 1
+        out_path = _output_path_for(path, args.output_dir)
+        doc.save(out_path)
+        print(f"{path}: imported {min(len(lines), len(doc))} lines ({changed} changed) into Language {lang_index + 1}, saved to {out_path}")
+    return status
+
+
+def cmd_replace(args):
+    total = 0
+    for path in args.files:
+        doc = core.load_document(path)
+        lang_index = _resolve_language(doc, args.language)
+        changes = plan_replacements(doc.terms.column(lang_index), args.find, args.replace,
+                                    regex=args.regex, whole_word=args.whole_word, match_case=args.match_case)
+        count = sum(change.count for change in changes)
+        total += count
+        if args.dry_run:
+            for change in changes:
+                print(f"{path}:{change.row + 1}: {doc.key(change.row)}: {change.old_text!r} -> {change.new_text!r}")
+            print(f"{path}: would replace {count} occurrence(s) in {len(changes)} term(s)")
+            continue
+        apply_changes(doc, lang_index, changes)
+        if changes:
+            doc.save(_output_path_for(path, args.output_dir))
+        print(f"{path}: replaced {count} occurrence(s) in {len(changes)} term(s)")
+    print(f"Total: {total} occurrence(s)")
+    return 0
+
+
+def cmd_stats(args):
+    results = {}
+    for path in args.files:
+        doc = core.load_document(path)
+        stats = core.document_stats(doc)
+        names, english_index = core.detect_languages(doc)
+        stats['english_index'] = english_index
+        stats['language_profile'] = [
+            {'name': column.name, 'code': column.code, 'declared': column.declared, 'guess': column.guess,
+             'confidence': column.confidence, 'fill_rate': round(column.filled / max(1, column.total), 4),
+             'scripts': column.scripts, 'top_words': [word for word, _ in column.top_words]}
+            for column in langprofile.get_profile(doc).columns]
+        results[path] = stats
+        if not args.json:
+            print(f"{path}: {stats['terms']} terms, {stats['languages']} languages, "
+                  f"{stats['duplicate_keys']} duplicate keys")
+            for lang_index, name in enumerate(names):
+                column = stats['language_profile'][lang_index]
+                print(f"  {name}: {stats['filled'][lang_index]} filled ({column['fill_rate']:.1%}), "
+                      f"{stats['characters'][lang_index]} characters, looks like {column['guess'] or 'unknown'}")
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0
+
+
+def cmd_validate(args):
+    status = 0
+    for path in args.files:
+        try:
+            doc = core.load_document(path)
+        except (json.JSONDecodeError, ValueError, OSError) as e:
+            print(f"{path}: cannot be loaded: {e}")
+            status = 1
+            continue
+        problems = core.validate_document(doc)
+        for problem in problems:
+            print(f"{path}: {problem}")
+        if problems:
+            status = 1
+        else:
+            print(f"{path}: OK ({len(doc)} terms)")
+    return status
+
+
+def cmd_check(args):
+    status = 0
+    for path in args.files:
+        doc = core.load_document(path)
+        checker = checks.Checker(doc, _resolve_language(doc, args.source_language))
+        issues = [issue for issue in checker.check_all() if not (args.skip_empty and issue.kind == checks.EMPTY)]
+        for issue in issues:
+            detail = f" {issue.detail}" if issue.detail else ""
+            print(f"{path}:{issue.row + 1}: {doc.key(issue.row)}: Language {issue.lang_index + 1}: {issue.kind}{detail}")
+        print(f"{path}: {len(issues)} issue(s)")
+        if issues:
+            status = 1
+    return status
+
+
+def _print_changes(changes):
+    for change in changes:
+        row = change.new_row if change.new_row is not None else change.old_row
+        languages = ", ".join(f"Language {lang_index + 1}" for lang_index in change.languages)
+        print(f"{change.kind}: row {row + 1}: {change.key}" + (f" ({languages})" if languages else ""))
+
+
+def cmd_diff(args):
+    old_path, new_path = args.files
+    old = core.load_document(old_path)
+    new = core.load_document(new_path)
+    source_index = _resolve_language(new, args.source_language)
+    result = diff.diff_documents(old, new, source_index)
+    if args.json:
+        print(json.dumps([change._asdict() for change in result.changes], indent=2, ensure_ascii=False))
+    else:
+        _print_changes(result.changes)
+        print(f"{diff.summarize(result.changes)}; {result.unchanged} terms unchanged")
+    return 1 if result.changes else 0
+
+
+def cmd_merge(args):
+    ours_path, theirs_path = args.files
+    ours = core.load_document(ours_path)
+    theirs = core.load_document(theirs_path)
+    base = core.load_document(args.base) if args.base else None
+    source_index = _resolve_language(theirs, args.source_language)
+    result = diff.merge_documents(ours, theirs, base, source_index)
+    # Conflicts and translations of changed source texts are the terms worth reviewing.
+    _print_changes([change for change in result.changes if change.kind in (diff.CONFLICT, diff.SOURCE_CHANGED)])
+    theirs.save(args.output)
+    print(f"{diff.summarize(result.changes)}; {len(result.edits)} translations carried over, saved to {args.output}")
+    return 0
+
+
+def cmd_tm_add(args):
+    with tm.TranslationMemory(args.memory) as memory:
+        for path in args.files:
+            if not args.force and memory.is_current(path):
+                print(f"{path}: already in the translation memory")
+                continue
+            doc = core.load_document(path)
+            memory.add_document(doc)
+            print(f"{path}: {len(doc)} terms added")
+        print(f"{args.memory}: {len(memory)} segments")
+    return 0
+
+
+def cmd_pretranslate(args):
+    for path in args.files:
+        doc = core.load_document(path)
+        source_index = _resolve_language(doc, args.source_language)
+        lang_index = _resolve_language(doc, args.language)
+        if source_index == lang_index:
+            raise ValueError("The source language and --language must differ.")
+        if args.glossary:
+            backend = pretranslate.DictionaryBackend.from_file(args.glossary, args.match_case)
+        else:
+            backend = pretranslate.TranslationMemoryBackend(args.memory, args.min_score)
+        result = pretranslate.pretranslate(doc, source_index, lang_index, backend, overwrite=args.overwrite)
+        summary = (f"{len(result.edits)} term(s) from {result.translated} of {result.unique} distinct text(s), "
+                   f"{result.missing} not found, {result.rejected} rejected")
+        if args.dry_run:
+            for row, _, text in result.edits:
+                print(f"{path}:{row + 1}: {doc.key(row)}: {text!r}")
+            print(f"{path}: would fill {summary}")
+            continue
+        for row, _, text in result.edits:
+            doc.set_text(row, lang_index, text)
+        if result.edits:
+            doc.save(_output_path_for(path, args.output_dir))
+        print(f"{path}: filled {summary}")
+    return 0
+
+
+def cmd_generate(args):
+    for path in args.files:
+        size = bench.generate_source(path, args.terms, args.languages, args.length, args.seed)
+        print(f"{path}: {args.terms} terms, {args.languages} languages, {size / 1e6:.1f} MB")
+    return 0
+
+
+def cmd_bench(args):
+    def progress(path, step, run):
+        if not args.quiet:
+            print(f"{os.path.basename(path)}: run {run + 1}: {step}", file=sys.stderr)
+
+    results = bench.run_benchmarks(args.files, args.terms, args.languages, args.length, args.repeat,
+                                   memory=not args.no_memory, progress=progress)
+    print(bench.format_results(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = bench.compare_results(baseline, results, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        print(f"{len(regressions)} regression(s) compared with {args.compare}")
+        return 1 if regressions else 0
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m i2editor",
+                                     description="Batch tools for I2Languages JSON files.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    def add_files(sub):
+        sub.add_argument("files", nargs="+", help="I2Languages JSON files (glob patterns are expanded)")
+
+    def add_language(sub):
+        sub.add_argument("-l", "--language", type=int,
+                         help="language number as shown in the editor (1-based); defaults to the detected English column")
+
+    def add_format(sub):
+        sub.add_argument("--format", choices=sorted(_EXTENSIONS),
+                         help="txt (one line per term, matched by position) or a key-aligned format: csv/tsv "
+                              "(all languages), xliff or po; defaults to the extension of the given file, else txt")
+
+    sub = subparsers.add_parser("export", help="export one language to TXT (or all languages to CSV/TSV, or XLIFF/PO)")
+    add_files(sub)
+    add_language(sub)
+    add_format(sub)
+    sub.add_argument("-s", "--source-language", type=int,
+                     help="source language number for XLIFF/PO (1-based); defaults to the detected English column")
+    sub.add_argument("-o", "--output", help="output file (only with a single input file)")
+    sub.add_argument("--output-dir", help="directory for the exported files (default: next to each JSON file)")
+    sub.set_defaults(func=cmd_export)
+
+    sub = subparsers.add_parser("import", help="import one language from TXT, XLIFF or PO (or all languages from CSV/TSV)")
+    add_files(sub)
+    add_language(sub)
+    add_format(sub)
+    sub.add_argument("-i", "--input", help="input file (only with a single input file)")
+    sub.add_argument("--input-dir", help="directory containing the files to import (default: next to each JSON file)")
+    sub.add_argument("--output-dir", help="write modified JSON files here instead of overwriting them")
+    sub.add_argument("--strict", action="store_true",
+                     help="skip files whose line count (TXT) or set of keys (other formats) does not match")
+    sub.set_defaults(func=cmd_import)
+
+    sub = subparsers.add_parser("replace", help="replace text in one language")
+    add_files(sub)
+    add_language(sub)
+    sub.add_argument("-f", "--find", required=True, help="text to find (case-insensitive unless --match-case)")
+    sub.add_argument("-r", "--replace", required=True, help="replacement text (a template with \\1 groups in --regex mode)")
+    sub.add_argument("-e", "--regex", action="store_true", help="treat --find as a regular expression")
+    sub.add_argument("-w", "--whole-word", action="store_true", help="only replace whole words")
+    sub.add_argument("-c", "--match-case", action="store_true", help="case-sensitive matching")
+    sub.add_argument("--output-dir", help="write modified JSON files here instead of overwriting them")
+    sub.add_argument("-n", "--dry-run", action="store_true", help="only print what would change")
+    sub.set_defaults(func=cmd_replace)
+
+    sub = subparsers.add_parser("stats", help="print term and language statistics")
+    add_files(sub)
+    sub.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    sub.set_defaults(func=cmd_stats)
+
+    sub = subparsers.add_parser("validate", help="check the file structure (exit code 1 on problems)")
+    add_files(sub)
+    sub.set_defaults(func=cmd_validate)
+
+    def add_source_language(sub):
+        sub.add_argument("-s", "--source-language", type=int,
+                         help="source language number (1-based); defaults to the detected English column")
+
+    sub = subparsers.add_parser("check", help="check translations for unbalanced tags, placeholders and empty texts "
+                                              "(exit code 1 on issues)")
+    add_files(sub)
+    add_source_language(sub)
+    sub.add_argument("--skip-empty", action="store_true", help="do not report empty translations")
+    sub.set_defaults(func=cmd_check)
+
+    sub = subparsers.add_parser("diff", help="compare two files by term key (exit code 1 if they differ)")
+    sub.add_argument("files", nargs=2, metavar="FILE", help="the old and the new file")
+    add_source_language(sub)
+    sub.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    sub.set_defaults(func=cmd_diff)
+
+    sub = subparsers.add_parser("merge", help="carry the translations of an edited copy over to an updated file")
+    sub.add_argument("files", nargs=2, metavar="FILE", help="the translated copy (ours) and the updated file (theirs)")
+    sub.add_argument("-b", "--base", help="the file the translated copy was made from, for a three-way merge")
+    sub.add_argument("-o", "--output", required=True, help="where to write the merged file")
+    add_source_language(sub)
+    sub.set_defaults(func=cmd_merge)
+
+    sub = subparsers.add_parser("tm-add", help="add files to the translation memory used for suggestions in the editor")
+    add_files(sub)
+    sub.add_argument("--memory", default=tm.DEFAULT_PATH, help=f"translation memory database (default: {tm.DEFAULT_PATH})")
+    sub.add_argument("--force", action="store_true", help="add files again even if they have not changed")
+    sub.set_defaults(func=cmd_tm_add)
+
+    sub = subparsers.add_parser("pretranslate", help="fill empty translations from the translation memory or a glossary")
+    add_files(sub)
+    sub.add_argument("-l", "--language", type=int, required=True, help="language number to fill (1-based)")
+    add_source_language(sub)
+    sub.add_argument("-g", "--glossary", help="glossary file: JSON object or CSV/TSV with source and translation columns "
+                                              "(default: use the translation memory)")
+    sub.add_argument("-c", "--match-case", action="store_true", help="case-sensitive glossary lookups")
+    sub.add_argument("--memory", default=tm.DEFAULT_PATH, help=f"translation memory database (default: {tm.DEFAULT_PATH})")
+    sub.add_argument("--min-score", type=float, default=1.0,
+                     help="lowest translation memory match score used, from 0 to 1 (default: 1, exact matches; "
+                          "lower is much slower)")
+    sub.add_argument("--overwrite", action="store_true", help="also replace existing translations")
+    sub.add_argument("--output-dir", help="write modified JSON files here instead of overwriting them")
+    sub.add_argument("-n", "--dry-run", action="store_true", help="only print what would be filled")
+    sub.set_defaults(func=cmd_pretranslate)
+
+    def add_synthetic(sub):
+        sub.add_argument("--languages", type=int, default=8, help="number of languages (default: 8)")
+        sub.add_argument("--length", type=int, default=40, help="average text length in characters (default: 40)")
+        sub.add_argument("--seed", type=int, default=0, help="random seed, for reproducible files")
+
+    sub = subparsers.add_parser("generate", help="write a synthetic I2Languages JSON file for benchmarks")
+    sub.add_argument("files", nargs=1, metavar="OUTPUT", help="the file to write")
+    sub.add_argument("-t", "--terms", type=int, default=10000, help="number of terms (default: 10000)")
+    add_synthetic(sub)
+    sub.set_defaults(func=cmd_generate)
+
+    sub = subparsers.add_parser("bench", help="time load, search, replace, TXT export/import and save "
+                                              "(exit code 1 on regressions with --compare)")
+    sub.add_argument("files", nargs="*", help="files to benchmark (default: synthetic files, see --terms)")
+    sub.add_argument("-t", "--terms", type=int, nargs="+", default=[10000, 100000],
+                     help="term counts of the synthetic files (default: 10000 100000)")
+    add_synthetic(sub)
+    sub.add_argument("-r", "--repeat", type=int, default=3, help="timed runs per file; the best one counts (default: 3)")
+    sub.add_argument("--no-memory", action="store_true", help="skip the extra run measuring peak memory")
+    sub.add_argument("-o", "--output", help="write the results as JSON")
+    sub.add_argument("--compare", help="results of an earlier run (JSON) to check for regressions")
+    sub.add_argument("--tolerance", type=float, default=0.25,
+                     help="slowdown or memory growth counted as a regression, as a fraction (default: 0.25)")
+    sub.add_argument("-q", "--quiet", action="store_true", help="don't print the progress of the runs")
+    sub.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    args.files = _expand_paths(args.files)
+    try:
+        return args.func(args)
+    except (json.JSONDecodeError, ValueError, OSError, re.error, sqlite3.Error, csv.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
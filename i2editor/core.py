@@ -0,0 +1,928 @@
+"""
+Core logic of the I2Languages Editor: loading, saving, TXT export/import and statistics.
+
+Nothing in this module depends on Tk, so it can run on a build machine without a display.
+"""
+import codecs
+import json
+import os
+from array import array
+
+from . import instrument, langprofile
+
+# Placeholder shown for terms that have no 'Term' key.
+NO_TERM_KEY = '[NO TERM KEY]'
+
+class OperationCancelled(Exception):
+    """
+    Raised by a progress callback (or a background task) to stop a long-running load or save.
+    """
+
+
+# Locations of the terms array inside the document, as paths of object keys.
+TERMS_PATHS = (('mSource', 'mTerms', 'Array'), ('mTerms', 'Array'))
+
+
+def find_terms_path(data):
+    """
+    Returns the path of object keys leading to the terms array of a parsed I2Languages document, or None.
+    The terms data can be in a few different nested structures. This checks common locations.
+    """
+    if not isinstance(data, dict):
+        return None
+    if 'mSource' in data and isinstance(data.get('mSource'), dict) and 'mTerms' in data['mSource']:
+        path = TERMS_PATHS[0]
+    elif 'mTerms' in data and isinstance(data.get('mTerms'), dict):
+        path = TERMS_PATHS[1]
+    else:
+        return None
+    container = _get_path(data, path[:-1])
+    return path if isinstance(container, dict) and isinstance(container.get('Array'), list) else None
+
+
+def find_terms_array(data):
+    """
+    Returns the list of terms inside a parsed I2Languages JSON document, or None if it can't be found.
+    """
+    path = find_terms_path(data)
+    return None if path is None else _get_path(data, path)
+
+
+def _get_path(data, path):
+    for key in path:
+        data = data[key]
+    return data
+
+
+class TermStore:
+    """
+    Compact, column-oriented storage for the terms of a document.
+
+    Instead of one dict per term (with nested 'Languages' dicts), the term keys and each language column
+    are kept in flat lists. The remaining fields of a term (TermType, Description, Flags, ...) are kept as
+    a JSON "shape" string that is shared by all terms with identical fields, so the original term objects
+    can be rebuilt exactly, in their original key order, when the document is saved.
+    """
+    def __init__(self):
+        self.keys = []  # Term key of every row (None if the term has no 'Term' field).
+        self.columns = []  # One list of translations per language.
+        self.lengths = array('l')  # Number of translations each term really has (terms can be ragged).
+        self.shapes = array('l')  # Index of each term's shape in self._shape_table.
+        self.dirty = set()  # Rows changed since the document was loaded or last saved.
+        self._shape_table = []
+        self._shape_ids = {}
+
+    @classmethod
+    def from_columns(cls, keys, columns, lengths, shapes, shape_table):
+        """
+        Rebuilds a store from the parts kept by another store (see i2editor.cache), without parsing any JSON.
+        """
+        store = cls()
+        store.keys = keys
+        store.columns = columns
+        store.lengths = lengths
+        store.shapes = shapes
+        store._shape_table = list(shape_table)
+        store._shape_ids = {shape_json: shape_id for shape_id, shape_json in enumerate(store._shape_table)}
+        return store
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def language_count(self):
+        return len(self.columns)
+
+    @property
+    def shape_table(self):
+        """
+        The distinct JSON shapes of the terms; self.shapes holds an index into it for every row.
+        """
+        return self._shape_table
+
+    def append(self, term_data):
+        """
+        Adds a term given as the dict found in the JSON file.
+        """
+        if not isinstance(term_data, dict):
+            raise ValueError(f"Invalid term at row {len(self.keys) + 1}: expected an object.")
+        row = len(self.keys)
+        translations = []
+        shape = []
+        for field, value in term_data.items():
+            if field == 'Term':
+                shape.append([field])
+            elif field == 'Languages' and isinstance(value, dict) and isinstance(value.get('Array', []), list):
+                # The other fields of Languages, and where its Array sits among them (None if it has none).
+                rest = {k: v for k, v in value.items() if k != 'Array'}
+                translations = value.get('Array', [])
+                position = list(value).index('Array') if 'Array' in value else None
+                shape.append([field, rest, position])
+            else:
+                shape.append([field, value])
+
+        shape_json = json.dumps(shape, ensure_ascii=False)
+        shape_id = self._shape_ids.get(shape_json)
+        if shape_id is None:
+            shape_id = self._shape_ids[shape_json] = len(self._shape_table)
+            self._shape_table.append(shape_json)
+
+        self.keys.append(term_data.get('Term'))
+        self.shapes.append(shape_id)
+        self.lengths.append(len(translations))
+        self._ensure_columns(len(translations), row)
+        for lang_index, column in enumerate(self.columns):
+            column.append(translations[lang_index] if lang_index < len(translations) else "")
+
+    def _ensure_columns(self, count, rows):
+        while len(self.columns) < count:
+            self.columns.append([""] * rows)
+
+    def key(self, row):
+        key = self.keys[row]
+        return NO_TERM_KEY if key is None else key
+
+    def has_text(self, row, lang_index):
+        return 0 <= lang_index < self.lengths[row]
+
+    def text(self, row, lang_index):
+        if not self.has_text(row, lang_index):
+            return ""
+        text = self.columns[lang_index][row]
+        return text if isinstance(text, str) else ""
+
+    def set_text(self, row, lang_index, text):
+        self._ensure_columns(lang_index + 1, len(self.keys))
+        if self.lengths[row] <= lang_index:
+            # Missing language slots are padded with empty strings.
+            self.lengths[row] = lang_index + 1
+            self.dirty.add(row)
+        old_text = self.columns[lang_index][row]
+        if old_text != text:
+            self.columns[lang_index][row] = text
+            self.dirty.add(row)
+        return old_text
+
+    def column(self, lang_index):
+        """
+        Returns the list of translations of one language (rows without that language hold "").
+        The list belongs to the store and must not be modified.
+        """
+        return self.columns[lang_index]
+
+    def term_data(self, row):
+        """
+        Rebuilds the term dict of a row, exactly as it appeared in the JSON file (with any edits applied).
+        A term that had no Languages object (or an invalid one) and was given translations gets one, placed
+        before Flags as in the files written by Unity.
+        """
+        length = self.lengths[row]
+        translations = [self.columns[lang_index][row] for lang_index in range(length)]
+        term_data = {}
+        has_languages = False
+        for entry in json.loads(self._shape_table[self.shapes[row]]):
+            field = entry[0]
+            if field == 'Term':
+                term_data[field] = self.keys[row]
+            elif field == 'Languages' and len(entry) == 3:
+                rest, position = entry[1], entry[2]
+                if position is None and length:
+                    position = len(rest)
+                if position is None:
+                    term_data[field] = rest
+                else:
+                    items = list(rest.items())
+                    items.insert(position, ('Array', translations))
+                    term_data[field] = dict(items)
+                has_languages = True
+            elif field == 'Languages' and length:
+                term_data[field] = {'Array': translations}
+                has_languages = True
+            else:
+                if field == 'Flags' and length and not has_languages:
+                    term_data['Languages'] = {'Array': translations}
+                    has_languages = True
+                term_data[field] = entry[1]
+        if length and not has_languages:
+            term_data['Languages'] = {'Array': translations}
+        return term_data
+
+
+class TermIndex:
+    """
+    Maps term keys to rows. Rows (positions in the terms array) are the identity of a term; keys are not,
+    because real files contain the same key more than once. Lookups are O(1): unique keys map straight to
+    their row and only duplicated keys keep a list.
+    """
+    def __init__(self, keys):
+        self._rows = {}  # Key -> row for keys seen once, key -> list of rows for duplicated keys.
+        self._length = 0
+        for row, key in enumerate(keys):
+            found = self._rows.get(key)
+            if found is None:
+                self._rows[key] = row
+            elif isinstance(found, list):
+                found.append(row)
+            else:
+                self._rows[key] = [found, row]
+            self._length += 1
+
+    def __len__(self):
+        return self._length
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def rows(self, key):
+        """
+        Returns the rows holding a key, in order (an empty tuple for unknown keys).
+        """
+        found = self._rows.get(key)
+        if found is None:
+            return ()
+        return tuple(found) if isinstance(found, list) else (found,)
+
+    def first(self, key):
+        """
+        Returns the first row holding a key, or None.
+        """
+        found = self._rows.get(key)
+        return found[0] if isinstance(found, list) else found
+
+    def duplicates(self):
+        """
+        Returns a dictionary of the keys found on more than one row and their rows.
+        """
+        return {key: list(found) for key, found in self._rows.items() if isinstance(found, list)}
+
+
+# Stand-in value for the terms array while the rest of the document is serialized.
+_TERMS_SENTINEL = "\u0000I2TERMS\u0000"
+
+
+class I2Document:
+    """
+    A loaded I2Languages file.
+
+    The terms live in a compact TermStore; the rest of the JSON document (the "skeleton") is kept aside
+    with an empty terms array, so saving produces the same output as dumping the original structure.
+    Rows are identified by their position in the terms array and languages by their 0-based index.
+    """
+    def __init__(self, skeleton, terms, terms_path, path=None):
+        self.skeleton = skeleton  # The JSON document without its terms (None while still loading).
+        self.terms = terms  # The TermStore holding every term.
+        self.terms_path = terms_path  # Keys leading from the skeleton root to the terms array.
+        self.path = path  # The file the document was loaded from (or last saved to).
+        self.source = None  # Where the terms are stored on disk (a SourceLayout), so unchanged terms can be copied when saving.
+        self._term_index = None
+
+    @classmethod
+    def from_data(cls, data, path=None):
+        """
+        Builds a document from a fully parsed JSON structure. The terms are moved out of the structure into a TermStore.
+        """
+        terms_path = find_terms_path(data)
+        if terms_path is None:
+            raise ValueError("Invalid I2Languages file structure. Could not find the 'mTerms' array.")
+        container = _get_path(data, terms_path[:-1])
+        store = TermStore()
+        for term_data in container['Array']:
+            store.append(term_data)
+        container['Array'] = []
+        return cls(data, store, terms_path, path)
+
+    def __len__(self):
+        return len(self.terms)
+
+    @property
+    def language_count(self):
+        """
+        The number of language columns (the largest number of translations any term has).
+        """
+        return self.terms.language_count
+
+    def key(self, row):
+        """
+        Returns the term key of a row.
+        """
+        return self.terms.key(row)
+
+    def has_text(self, row, lang_index):
+        """
+        Returns True if the term has an entry for the given language.
+        """
+        return self.terms.has_text(row, lang_index)
+
+    def text(self, row, lang_index):
+        """
+        Returns the full translation of a row for a language, or an empty string if it is missing.
+        """
+        return self.terms.text(row, lang_index)
+
+    def set_text(self, row, lang_index, text):
+        """
+        Stores a new translation and returns the previous one. Missing language slots are padded with empty strings.
+        """
+        return self.terms.set_text(row, lang_index, text)
+
+    def term_index(self):
+        """
+        Returns the TermIndex of the document's keys (built once; keys never change after loading).
+        """
+        if self._term_index is None or len(self._term_index) != len(self.terms):
+            self._term_index = TermIndex(self.key(row) for row in range(len(self.terms)))
+        return self._term_index
+
+    def iter_json(self):
+        """
+        Yields the document as JSON text in chunks, one term at a time.
+        The output is identical to json.dump(document, indent=2, ensure_ascii=False) on the original structure.
+        """
+        head, tail = self._json_frame()
+
+        # Terms are written one level deeper than the line holding the "Array" key.
+        line = head[head.rfind('\n') + 1:]
+        indent = len(line) - len(line.lstrip(' '))
+        item_indent = '\n' + ' ' * (indent + 2)
+
+        yield head
+        if not len(self.terms):
+            yield '[]'
+        else:
+            yield '['
+            for row in range(len(self.terms)):
+                term_json = json.dumps(self.terms.term_data(row), indent=2, ensure_ascii=False)
+                yield (',' if row else '') + item_indent + term_json.replace('\n', item_indent)
+            yield '\n' + ' ' * indent + ']'
+        yield tail
+
+    def _json_frame(self):
+        """
+        Returns the JSON text of the skeleton before and after the terms array.
+        """
+        if self.skeleton is None:
+            raise ValueError("The document has not finished loading.")
+        container = _get_path(self.skeleton, self.terms_path[:-1])
+        container['Array'] = _TERMS_SENTINEL
+        try:
+            text = json.dumps(self.skeleton, indent=2, ensure_ascii=False)
+        finally:
+            container['Array'] = []
+        head, tail = text.split(json.dumps(_TERMS_SENTINEL), 1)
+        return head, tail
+
+    def save(self, path=None, progress=None):
+        """
+        Writes the document as JSON (UTF-8) to the given path or to the path it was loaded from.
+        Returns the number of terms that had to be serialized.
+
+        If the file the terms were read from is unchanged on disk, only the edited terms are serialized and
+        everything else is copied from that file byte for byte, so saving a few edits costs little more than
+        a file copy. Otherwise the whole document is written with 2-space indentation.
+
+        The data is written to a temporary file next to the target, which then replaces the target, so an
+        interrupted save never leaves a half-written file behind. progress(terms_written, total_terms) is called
+        after every chunk; it may raise OperationCancelled to abandon the save.
+        """
+        path = path or self.path
+        total = len(self.terms)
+        dirty = set(self.terms.dirty)
+        source = self.source
+        with instrument.timed('save', path):
+            if source is not None and source.is_current(total):
+                spans, serialized = self._write_changes(path, source, sorted(dirty), progress)
+            else:
+                source = SourceLayout(path, None, indent='  ', newline=os.linesep)
+                spans, serialized = self._write_all(path, source, progress)
+        instrument.count('bytes_written', spans[-1] if spans else 0)
+        instrument.count('terms_serialized', serialized)
+        if progress:
+            progress(total, total)
+        # The saved file becomes the source of the next save.
+        self.source = SourceLayout(path, spans, source.item_indent, source.indent, source.separators, source.newline)
+        self.terms.dirty -= dirty
+        self.path = path
+        return serialized
+
+    def _write_all(self, path, layout, progress):
+        """
+        Serializes the whole document (the same text as iter_json) and returns the byte span of every term.
+        """
+        head, tail = self._json_frame()
+        line = head[head.rfind('\n') + 1:]
+        indent = len(line) - len(line.lstrip(' '))
+        layout.item_indent = ' ' * (indent + 2)
+        newline = layout.newline
+        total = len(self.terms)
+        spans = array('q')
+        with _atomic_writer(path) as f:
+            offset = f.write(head.replace('\n', newline).encode('utf-8'))
+            if not total:
+                offset += f.write(b'[]')
+            else:
+                separator = (newline + layout.item_indent).encode('utf-8')
+                buffer = [b'[']
+                offset += 1
+                size = 0
+                for row in range(total):
+                    start = offset + len(separator) + (1 if row else 0)
+                    term_bytes = layout.encode_term(self.terms.term_data(row))
+                    buffer.append(b',' + separator if row else separator)
+                    buffer.append(term_bytes)
+                    offset = start + len(term_bytes)
+                    spans.append(start)
+                    spans.append(offset)
+                    size += len(term_bytes)
+                    if size >= 1 << 20:
+                        f.write(b''.join(buffer))
+                        buffer, size = [], 0
+                        if progress:
+                            progress(row + 1, total)
+                buffer.append((newline + ' ' * indent + ']').encode('utf-8'))
+                f.write(b''.join(buffer))
+            f.write(tail.replace('\n', newline).encode('utf-8'))
+        return spans, total
+
+    def _write_changes(self, path, source, rows, progress):
+        """
+        Copies the source file to path, replacing the terms of the given (sorted) rows with their current data.
+        Returns the byte span of every term in the new file and the number of terms serialized.
+        """
+        total = len(self.terms)
+        old_spans = source.spans
+        spans = array('q')
+        delta = 0  # How far the terms after the last replaced one have moved.
+        copied_row = 0  # Rows before this one already have their new span.
+        size = 0
+        # The source is closed before the new file replaces it (it may be the same file).
+        with _atomic_writer(path) as f, open(source.path, 'rb') as src:
+            for row in rows:
+                start, end = old_spans[2 * row], old_spans[2 * row + 1]
+                _copy_bytes(src, f, start - src.tell())
+                term_bytes = source.encode_term(self.terms.term_data(row))
+                f.write(term_bytes)
+                src.seek(end)
+
+                spans.extend(_shifted(old_spans[2 * copied_row:2 * row], delta))
+                spans.append(start + delta)
+                spans.append(start + delta + len(term_bytes))
+                delta += len(term_bytes) - (end - start)
+                copied_row = row + 1
+                size += len(term_bytes)
+                if progress and size >= 1 << 20:
+                    size = 0
+                    progress(row, total)
+            _copy_bytes(src, f, None)
+            spans.extend(_shifted(old_spans[2 * copied_row:], delta))
+        return spans, len(rows)
+
+
+class SourceLayout:
+    """
+    Describes where each term of a document is stored in a JSON file and how the terms are formatted there,
+    so a save can copy the unchanged terms byte for byte and format the edited ones like their neighbours.
+    """
+    def __init__(self, path, spans, item_indent='', indent=None, separators=(',', ': '), newline='\n'):
+        self.path = path
+        self.spans = spans  # array('q') holding the start and end byte offset of every term, one pair per row.
+        self.item_indent = item_indent  # Whitespace in front of every term on its line.
+        self.indent = indent  # Indentation string of the term objects, or None if they are written on one line.
+        self.separators = separators
+        self.newline = newline
+        self.stat = None
+        if spans is not None:
+            stat = os.stat(path)
+            self.stat = (stat.st_size, stat.st_mtime_ns)
+
+    @classmethod
+    def detect(cls, path, spans, stat, sample, line_prefix):
+        """
+        Guesses the formatting from the raw text of the first term (sample) and the text before it on its line.
+        """
+        newline = '\r\n' if '\r\n' in sample else '\n'
+        item_indent = line_prefix if not line_prefix.strip() else ''
+        lines = sample.split(newline)
+        if len(lines) > 1:
+            second = lines[1]
+            indent = second[:len(second) - len(second.lstrip(' \t'))][len(item_indent):] or '  '
+            separators = (',', ': ' if '": ' in sample else ':')
+        else:
+            indent = None
+            separators = (', ' if ', "' in sample else ',', ': ' if '": ' in sample else ':')
+        layout = cls(path, None, item_indent, indent, separators, newline)
+        layout.spans = spans
+        layout.stat = stat
+        return layout
+
+    def is_current(self, row_count):
+        """
+        Returns True if the file still holds exactly the terms the spans describe.
+        """
+        if self.spans is None or len(self.spans) != 2 * row_count:
+            return False
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == self.stat
+
+    def encode_term(self, term_data):
+        """
+        Serializes one term the way the terms of this file are formatted.
+        """
+        text = json.dumps(term_data, indent=self.indent, separators=self.separators, ensure_ascii=False)
+        if self.indent is not None:
+            text = text.replace('\n', self.newline + self.item_indent)
+        return text.encode('utf-8')
+
+
+def _shifted(offsets, delta):
+    return offsets if not delta else array('q', [offset + delta for offset in offsets])
+
+
+def _copy_bytes(src, dst, length, chunk_size=1 << 20):
+    """
+    Copies length bytes (or everything up to the end of the file if None) from src to dst.
+    """
+    while length is None or length > 0:
+        data = src.read(chunk_size if length is None else min(chunk_size, length))
+        if not data:
+            break
+        dst.write(data)
+        if length is not None:
+            length -= len(data)
+
+
+class _atomic_writer:
+    """
+    Context manager returning a binary file that replaces path only if the with-block completes without errors.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = f"{path}.{os.getpid()}.tmp"
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.temp_path, 'wb')
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            self.file.close()
+            if exc_type is None:
+                os.replace(self.temp_path, self.path)
+        finally:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+        return False
+
+
+# --- Streaming loader ---
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+
+
+class _JsonStreamReader:
+    """
+    A growing text window over a UTF-8 file, with just enough tokenizing to walk through a JSON document.
+    Whole values are decoded with the standard (C accelerated) JSON scanner.
+    """
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+        self._mark = 0  # A position in the window whose byte offset in the file is known...
+        self._mark_offset = 0  # ...and that offset.
+
+    def fill(self, size=None):
+        """
+        Reads more of the file into the window. Returns False at the end of the file.
+        """
+        if self.eof:
+            return False
+        data = self.f.read(size or self.chunk_size)
+        self.bytes_read += len(data)
+        if not data:
+            self.eof = True
+            self.buf += self.decoder.decode(b'', final=True)
+            return False
+        self.buf += self.decoder.decode(data)
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character ('' at the end of the file).
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Invalid JSON: expected '{char}' at character {self.pos}.")
+        self.pos += 1
+
+    def value(self):
+        """
+        Decodes the JSON value at the current position, reading more of the file as needed.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number at the very end of the window could continue in the next chunk.
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Read at least as much again as the window holds, so huge values don't cost quadratic time.
+            self.fill(max(self.chunk_size, len(self.buf) - self.pos))
+
+    def byte_offset(self, pos):
+        """
+        Returns the offset in the file of a position in the window. Positions must be asked for in increasing order.
+        """
+        self._mark_offset += len(self.buf[self._mark:pos].encode('utf-8'))
+        self._mark = pos
+        return self._mark_offset
+
+    def discard(self):
+        """
+        Forgets the part of the window that has already been consumed.
+        """
+        self.byte_offset(self.pos)
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        self._mark = 0
+
+
+class StreamingLoader:
+    """
+    Loads an I2Languages file incrementally.
+
+    The loader walks the document until it reaches mSource.mTerms.Array (or mTerms.Array), then decodes
+    one term at a time into a TermStore, so callers can show rows while the rest is still being read.
+    Everything outside the terms array is collected and parsed into the document skeleton at the end.
+
+        loader = StreamingLoader(path)
+        while not loader.load(5000):
+            ...  # loader.terms already holds the terms read so far
+        doc = loader.document
+    """
+    def __init__(self, path, chunk_size=1 << 20):
+        self.path = path
+        stat = os.stat(path)
+        self.total_bytes = stat.st_size
+        self._stat = (stat.st_size, stat.st_mtime_ns)
+        self.terms = TermStore()
+        # The document is available (and fills up) while loading; its skeleton is set once the whole file is read.
+        self.document = I2Document(None, self.terms, None, path)
+        self._file = open(path, 'rb')
+        self._reader = _JsonStreamReader(self._file, chunk_size)
+        self._steps = self._parse()
+
+    @property
+    def bytes_read(self):
+        return self._reader.bytes_read
+
+    def load(self, max_terms=None):
+        """
+        Reads up to max_terms more terms (all remaining terms if None). Returns True when the document is complete.
+        """
+        try:
+            count = 0
+            for _ in self._steps:
+                count += 1
+                if max_terms is not None and count >= max_terms:
+                    return False
+        except Exception:
+            self.close()
+            raise
+        self.close()
+        return True
+
+    def close(self):
+        self._file.close()
+
+    def _parse(self):
+        reader = self._reader
+        reader.expect('{')
+        terms_path = self._find_terms_array(())
+        if terms_path is None:
+            raise ValueError("Invalid I2Languages file structure. Could not find the 'mTerms' array.")
+        prefix = reader.buf[:reader.pos]
+        reader.discard()
+
+        # The byte span of every term is recorded so that saving can copy unchanged terms (see I2Document.save).
+        spans = array('q')
+        sample = line_prefix = ''
+        if reader.peek() == ']':
+            reader.pos += 1
+        else:
+            line_prefix = reader.buf[reader.buf.rfind('\n', 0, reader.pos) + 1:reader.pos]
+            while True:
+                reader.peek()
+                start = reader.pos
+                spans.append(reader.byte_offset(start))
+                self.terms.append(reader.value())
+                spans.append(reader.byte_offset(reader.pos))
+                if not sample:
+                    sample = reader.buf[start:reader.pos]
+                yield
+                char = reader.peek()
+                reader.pos += 1
+                if char == ']':
+                    break
+                if char != ',':
+                    raise ValueError("Invalid JSON: expected ',' or ']' in the terms array.")
+                if reader.pos >= reader.chunk_size:
+                    reader.discard()
+
+        while reader.fill():
+            pass
+        self.document.skeleton = json.loads(prefix + ']' + reader.buf[reader.pos:])
+        self.document.terms_path = terms_path
+        self.document.source = SourceLayout.detect(self.path, spans, self._stat, sample, line_prefix)
+
+    def _find_terms_array(self, path):
+        """
+        Consumes the members of the object whose '{' was just read, descending into the keys that lead to the
+        terms array. Returns the terms path when positioned right after the array's '[', or None once the
+        object has been consumed without finding it.
+        """
+        reader = self._reader
+        while True:
+            char = reader.peek()
+            if char == '}':
+                reader.pos += 1
+                return None
+            if char == ',':
+                reader.pos += 1
+                continue
+            if char != '"':
+                raise ValueError(f"Invalid JSON: expected an object key at character {reader.pos}.")
+            candidate = path + (reader.value(),)
+            reader.expect(':')
+            if candidate in TERMS_PATHS and reader.peek() == '[':
+                reader.pos += 1
+                return candidate
+            if any(terms_path[:len(candidate)] == candidate for terms_path in TERMS_PATHS) and reader.peek() == '{':
+                reader.pos += 1
+                found = self._find_terms_array(candidate)
+                if found:
+                    return found
+                continue
+            reader.value()  # Skip values that can't contain the terms array.
+
+
+def load_document(path, stream=True, progress=None, batch_size=5000):
+    """
+    Loads and parses an I2Languages JSON file.
+    With stream=True the terms are decoded one at a time (see StreamingLoader), which keeps peak memory
+    close to the size of the compact TermStore; otherwise the whole file is parsed with json.load first.
+
+    When streaming, progress(document, bytes_read, total_bytes) is called after every batch of terms with the
+    partially filled document; it may raise OperationCancelled to stop loading.
+    Text and raw Unity dumps of the LanguageSource are read directly (see i2editor.unity).
+    Raises json.JSONDecodeError, ValueError or OSError if the file can't be used.
+    """
+    from . import unity  # Imported here: the unity module builds on this one.
+    if unity.dump_kind(path) is not None:
+        return unity.load_dump(path, progress=progress, batch_size=batch_size)
+    with instrument.timed('load', path):
+        if stream:
+            loader = StreamingLoader(path)
+            try:
+                while not loader.load(batch_size if progress else None):
+                    progress(loader.document, loader.bytes_read, loader.total_bytes)
+            finally:
+                loader.close()
+            instrument.count('bytes_read', loader.total_bytes)
+            if progress:
+                progress(loader.document, loader.total_bytes, loader.total_bytes)
+            return loader.document
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        instrument.count('bytes_read', os.path.getsize(path))
+        return I2Document.from_data(data, path)
+
+
+def detect_languages(doc):
+    """
+    Returns the list of language names and the index of the language we guess is English (or None).
+    Names start with "Language N" and add the name and code declared in mLanguages, or the guessed ones
+    (see i2editor.langprofile).
+    """
+    profile = langprofile.get_profile(doc)
+    return profile.display_names(), profile.english_index
+
+
+# --- TXT export/import ---
+# Each line is wrapped in quotes, with internal quotes escaped as "" to preserve data.
+
+def encode_txt_line(text):
+    """
+    Escapes double quotes within the text and then wraps the entire string in quotes.
+    """
+    escaped_text = text.replace('"', '""')
+    return f'"{escaped_text}"'
+
+
+def decode_txt_line(line):
+    """
+    Reverses encode_txt_line. Lines that are not quoted are returned as they are, for backward compatibility.
+    """
+    processed_line = line.rstrip('\n\r')
+    if len(processed_line) >= 2 and processed_line.startswith('"') and processed_line.endswith('"'):
+        return processed_line[1:-1].replace('""', '"')
+    return processed_line
+
+
+def export_txt(doc, lang_index, path, rows=None):
+    """
+    Writes the translations of one language to a TXT file, one quoted line per row. Returns the number of lines.
+    """
+    rows = range(len(doc)) if rows is None else rows
+    count = 0
+    with instrument.timed('export_txt', path), open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(encode_txt_line(doc.text(row, lang_index)) + '\n')
+            count += 1
+    return count
+
+
+def read_txt(path):
+    """
+    Reads a TXT file written by export_txt and returns the decoded lines.
+    """
+    with instrument.timed('read_txt', path), open(path, 'r', encoding='utf-8') as f:
+        return [decode_txt_line(line) for line in f]
+
+
+# --- Statistics & validation ---
+
+def document_stats(doc):
+    """
+    Returns a dictionary with term, language and fill statistics for a document.
+    """
+    language_count = doc.language_count
+    filled = [0] * language_count
+    characters = [0] * language_count
+    keys = set()
+    duplicates = 0
+    for row in range(len(doc)):
+        key = doc.key(row)
+        if key in keys:
+            duplicates += 1
+        keys.add(key)
+        for lang_index in range(language_count):
+            text = doc.text(row, lang_index)
+            if text:
+                filled[lang_index] += 1
+                characters[lang_index] += len(text)
+    return {
+        'terms': len(doc),
+        'languages': language_count,
+        'duplicate_keys': duplicates,
+        'filled': filled,
+        'characters': characters,
+    }
+
+
+def validate_document(doc):
+    """
+    Checks the structure of a document and returns a list of human readable problems (empty if none were found).
+    """
+    problems = []
+    store = doc.terms
+    language_count = doc.language_count
+    seen = {}
+    for row, key in enumerate(store.keys):
+        if not isinstance(key, str) or not key:
+            problems.append(f"Row {row + 1}: missing or empty 'Term' key.")
+        elif key in seen:
+            problems.append(f"Row {row + 1}: duplicate term key '{key}' (first seen at row {seen[key] + 1}).")
+        else:
+            seen[key] = row
+        if store.lengths[row] != language_count:
+            problems.append(f"Row {row + 1}: has {store.lengths[row]} languages, expected {language_count}.")
+    for lang_index, column in enumerate(store.columns):
+        for row, text in enumerate(column):
+            if not isinstance(text, str):
+                problems.append(f"Row {row + 1}, Language {lang_index + 1}: translation is not a string.")
+    return problems
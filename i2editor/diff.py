@@ -0,0 +1,184 @@
+"""
+Diff and three-way merge of I2Languages files.
+
+Terms are aligned by key: the n-th occurrence of a key in one file is paired with the n-th occurrence in the
+other, so files with duplicated keys align too. Every term gets a fingerprint (a hash of all of its texts),
+and only pairs whose fingerprints differ are compared language by language. Both the alignment and the
+comparison are single passes over the files, so tens of thousands of terms take well under a second.
+
+The typical merge: "theirs" is an updated asset from the game build, "ours" an older copy the translators
+edited, and "base" (optional) the asset ours was made from. The result is theirs (its terms, order and
+source texts) with the translators' work carried over.
+"""
+from collections import Counter, namedtuple
+
+# Kinds of changes, in the order they are listed.
+ADDED = 'added'
+REMOVED = 'removed'
+SOURCE_CHANGED = 'source changed'
+TRANSLATION_CHANGED = 'translation changed'
+CONFLICT = 'conflict'
+KINDS = (ADDED, REMOVED, SOURCE_CHANGED, TRANSLATION_CHANGED, CONFLICT)
+
+TermChange = namedtuple('TermChange', 'kind key old_row new_row languages')
+TermChange.__doc__ = """
+A term that differs between two files. old_row/new_row are its rows in the old and new file (None for
+added and removed terms); languages lists the language indexes whose texts differ (or conflict).
+"""
+
+DiffResult = namedtuple('DiffResult', 'changes unchanged')
+DiffResult.__doc__ = """
+The changes between two files, in the order of the new file (removed terms last), and the number of terms
+that are identical in both.
+"""
+
+MergeResult = namedtuple('MergeResult', 'changes edits')
+MergeResult.__doc__ = """
+changes: TermChanges describing the merge (translation changed = carried over from ours, source changed =
+carried over although the source text changed, conflict = edited on both sides, ours kept).
+edits: the (row, lang_index, text) applied to theirs.
+"""
+
+
+def fingerprints(doc, language_count=None):
+    """
+    Returns a hash of the texts of every row. Rows with equal fingerprints hold the same texts.
+    """
+    language_count = doc.language_count if language_count is None else language_count
+    columns = [doc.terms.column(lang_index) if lang_index < doc.language_count else None
+               for lang_index in range(language_count)]
+    lengths = doc.terms.lengths
+    prints = []
+    for row in range(len(doc)):
+        texts = tuple(column[row] if column is not None and lang_index < lengths[row] else ""
+                      for lang_index, column in enumerate(columns))
+        prints.append(hash(texts))
+    return prints
+
+
+def align(old, new):
+    """
+    Pairs the rows of two documents by term key. Returns (pairs, removed_rows, added_rows), where pairs
+    lists (old_row, new_row) in the order of the new document.
+    """
+    index = {}  # (key, occurrence) -> old row.
+    occurrences = Counter()
+    for row in range(len(old)):
+        key = old.key(row)
+        index[key, occurrences[key]] = row
+        occurrences[key] += 1
+
+    occurrences = Counter()
+    pairs = []
+    added = []
+    for row in range(len(new)):
+        key = new.key(row)
+        old_row = index.pop((key, occurrences[key]), None)
+        occurrences[key] += 1
+        if old_row is None:
+            added.append(row)
+        else:
+            pairs.append((old_row, row))
+    return pairs, sorted(index.values()), added
+
+
+def _changed_languages(old, old_row, new, new_row, language_count):
+    return tuple(lang_index for lang_index in range(language_count)
+                 if old.text(old_row, lang_index) != new.text(new_row, lang_index))
+
+
+def diff_documents(old, new, source_lang=0):
+    """
+    Compares two documents. A term whose source language text differs is "source changed" (whether or
+    not its translations changed as well); one where only other languages differ is "translation changed".
+    Only the texts are compared, not the other fields of the terms.
+    """
+    language_count = max(old.language_count, new.language_count)
+    old_prints = fingerprints(old, language_count)
+    new_prints = fingerprints(new, language_count)
+    pairs, removed, added = align(old, new)
+    added = set(added)
+    old_rows = {new_row: old_row for old_row, new_row in pairs}
+
+    changes = []
+    unchanged = 0
+    for new_row in range(len(new)):
+        if new_row in added:
+            changes.append(TermChange(ADDED, new.key(new_row), None, new_row, ()))
+            continue
+        old_row = old_rows[new_row]
+        if old_prints[old_row] == new_prints[new_row]:
+            unchanged += 1
+            continue
+        languages = _changed_languages(old, old_row, new, new_row, language_count)
+        if not languages:
+            unchanged += 1
+            continue
+        kind = SOURCE_CHANGED if source_lang in languages else TRANSLATION_CHANGED
+        changes.append(TermChange(kind, new.key(new_row), old_row, new_row, languages))
+    changes.extend(TermChange(REMOVED, old.key(old_row), old_row, None, ()) for old_row in removed)
+    return DiffResult(changes, unchanged)
+
+
+def merge_documents(ours, theirs, base=None, source_lang=0):
+    """
+    Carries the translations of ours over to theirs, which is modified in place (save it to write the
+    merged file). Source texts, the set of terms and their order always come from theirs.
+
+    With a base, each translation is merged three-way: whichever side changed it since the base wins, and a
+    translation changed differently on both sides is a conflict, for which ours is kept. Without a base, every
+    non-empty translation of ours that differs from theirs is taken (as it is for terms the base doesn't have).
+    """
+    language_count = max(ours.language_count, theirs.language_count)
+    ours_prints = fingerprints(ours, language_count)
+    theirs_prints = fingerprints(theirs, language_count)
+    pairs, removed, added = align(ours, theirs)
+    base_rows = {}
+    if base is not None:
+        base_rows = {theirs_row: base_row for base_row, theirs_row in align(base, theirs)[0]}
+
+    changes = []
+    edits = []
+    for ours_row, theirs_row in pairs:
+        if ours_prints[ours_row] == theirs_prints[theirs_row]:
+            continue
+        base_row = base_rows.get(theirs_row)
+        taken = []
+        conflicts = []
+        for lang_index in _changed_languages(ours, ours_row, theirs, theirs_row, language_count):
+            if lang_index == source_lang:
+                continue
+            text = ours.text(ours_row, lang_index)
+            if base_row is not None:
+                base_text = base.text(base_row, lang_index)
+                if text == base_text:
+                    continue  # Only the build changed it.
+                if theirs.text(theirs_row, lang_index) != base_text:
+                    conflicts.append(lang_index)
+            elif not text:
+                continue  # Nothing to carry over.
+            edits.append((theirs_row, lang_index, text))
+            taken.append(lang_index)
+
+        key = theirs.key(theirs_row)
+        if conflicts:
+            changes.append(TermChange(CONFLICT, key, ours_row, theirs_row, tuple(conflicts)))
+        elif ours.text(ours_row, source_lang) != theirs.text(theirs_row, source_lang):
+            # The translations were made for another source text and may need to be reviewed.
+            changes.append(TermChange(SOURCE_CHANGED, key, ours_row, theirs_row, (source_lang,) + tuple(taken)))
+        elif taken:
+            changes.append(TermChange(TRANSLATION_CHANGED, key, ours_row, theirs_row, tuple(taken)))
+    changes.extend(TermChange(ADDED, theirs.key(row), None, row, ()) for row in added)
+    changes.extend(TermChange(REMOVED, ours.key(row), row, None, ()) for row in removed)
+
+    for row, lang_index, text in edits:
+        theirs.set_text(row, lang_index, text)
+    return MergeResult(changes, edits)
+
+
+def summarize(changes):
+    """
+    Returns the number of changes of every kind, e.g. "12 added, 3 removed".
+    """
+    counts = Counter(change.kind for change in changes)
+    return ", ".join(f"{counts[kind]} {kind}" for kind in KINDS if counts[kind]) or "no differences"
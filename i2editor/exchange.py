@@ -0,0 +1,330 @@
+"""
+Key-aligned exchange formats: CSV/TSV with every language, XLIFF 2.0 and gettext PO.
+
+Unlike the TXT export (one line per row, matched by position), every record of these formats carries the
+term key, so files can be re-sorted, filtered or extended by translators and still be imported correctly.
+Both directions stream: exports write one row at a time and imports are generators of records, so memory
+use does not grow with the size of the exchange file. Imports are matched to rows through a hash index
+of the term keys, and unmatched and new keys are collected in the same pass.
+"""
+import csv
+import os
+import re
+from collections import Counter, namedtuple
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape, quoteattr
+
+# File extensions and the formats they select.
+FORMATS = {
+    '.csv': 'csv',
+    '.tsv': 'tsv',
+    '.xlf': 'xliff',
+    '.xliff': 'xliff',
+    '.po': 'po',
+    '.pot': 'po',
+}
+
+ImportResult = namedtuple('ImportResult', 'edits matched new_keys unmatched_keys')
+ImportResult.__doc__ = """
+Outcome of reading an exchange file against a document.
+edits: list of (row, lang_index, text) for the translations that differ from the document.
+matched: number of records assigned to a row. new_keys: keys in the file but not in the document, or
+repeated in the file more often than in the document.
+unmatched_keys: keys of the document that the file does not mention.
+"""
+
+
+def format_for_path(path):
+    """
+    Returns the exchange format for a file name, or raises ValueError for unknown extensions.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown exchange format '{extension}'. Use one of: {', '.join(sorted(FORMATS))}.")
+    return FORMATS[extension]
+
+
+def language_code(lang_index):
+    """
+    The BCP 47 private-use tag used for a language column when no real language code is known.
+    """
+    return f"x-lang{lang_index + 1}"
+
+
+# --- Export ---
+
+def export_file(doc, path, fmt=None, rows=None, source_lang=0, target_lang=None, source_code=None, target_code=None):
+    """
+    Writes rows of a document (all rows by default, in the given order otherwise) to an exchange file.
+    CSV and TSV contain every language; XLIFF and PO contain one source and one target language.
+    Returns the number of records written.
+    """
+    fmt = fmt or format_for_path(path)
+    rows = range(len(doc)) if rows is None else rows
+    if fmt in ('csv', 'tsv'):
+        return export_table(doc, path, rows, delimiter=',' if fmt == 'csv' else '\t')
+    if target_lang is None:
+        raise ValueError("A target language is needed for XLIFF and PO files.")
+    source_code = source_code or language_code(source_lang)
+    target_code = target_code or language_code(target_lang)
+    if fmt == 'xliff':
+        return export_xliff(doc, path, rows, source_lang, target_lang, source_code, target_code)
+    if fmt == 'po':
+        return export_po(doc, path, rows, source_lang, target_lang, target_code)
+    raise ValueError(f"Unknown exchange format '{fmt}'.")
+
+
+def export_table(doc, path, rows, delimiter=','):
+    """
+    Writes a CSV (or TSV) file with a Key column followed by one column per language.
+    """
+    language_count = doc.language_count
+    count = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(['Key'] + [f"Language {lang_index + 1}" for lang_index in range(language_count)])
+        for row in rows:
+            writer.writerow([doc.key(row)] + [doc.text(row, lang_index) for lang_index in range(language_count)])
+            count += 1
+    return count
+
+
+# Characters that XML 1.0 can't represent at all; they are dropped from XLIFF files.
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# Carriage returns would be normalized away by XML parsers, so they are written as character references.
+_XML_ENTITIES = {'\r': '&#13;'}
+
+
+def _xml_text(text):
+    return escape(_XML_INVALID.sub('', text), _XML_ENTITIES)
+
+
+def export_xliff(doc, path, rows, source_lang, target_lang, source_code, target_code):
+    """
+    Writes an XLIFF 2.0 file with one unit per row. The term key is stored in the unit's name attribute.
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<xliff xmlns="urn:oasis:names:tc:xliff:document:2.0" version="2.0" '
+                f'srcLang={quoteattr(source_code)} trgLang={quoteattr(target_code)}>\n')
+        f.write(f' <file id="f1" original={quoteattr(os.path.basename(doc.path or "I2Languages"))} xml:space="preserve">\n')
+        for row in rows:
+            f.write(f'  <unit id="u{row + 1}" name={quoteattr(_XML_INVALID.sub("", doc.key(row)))}>\n'
+                    f'   <segment>\n'
+                    f'    <source>{_xml_text(doc.text(row, source_lang))}</source>\n'
+                    f'    <target>{_xml_text(doc.text(row, target_lang))}</target>\n'
+                    f'   </segment>\n'
+                    f'  </unit>\n')
+            count += 1
+        f.write(' </file>\n</xliff>\n')
+    return count
+
+
+def _po_string(text):
+    """
+    Quotes a PO string; multi-line texts are split after every newline, as gettext tools do.
+    """
+    text = text.replace('\\', '\\\\').replace('"', '\\"').replace('\t', '\\t').replace('\r', '\\r')
+    lines = text.split('\n')
+    if len(lines) == 1:
+        return f'"{text}"'
+    parts = [line + '\\n' for line in lines[:-1]] + ([lines[-1]] if lines[-1] else [])
+    return '""\n' + '\n'.join(f'"{part}"' for part in parts)
+
+
+def export_po(doc, path, rows, source_lang, target_lang, target_code):
+    """
+    Writes a gettext PO file. The term key is the message context (msgctxt), so identical source texts stay
+    separate entries.
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=UTF-8\\n"\n'
+                f'"Language: {target_code}\\n"\n')
+        for row in rows:
+            f.write(f'\nmsgctxt {_po_string(doc.key(row))}\n'
+                    f'msgid {_po_string(doc.text(row, source_lang))}\n'
+                    f'msgstr {_po_string(doc.text(row, target_lang))}\n')
+            count += 1
+    return count
+
+
+# --- Import ---
+
+def read_records(path, fmt=None, target_lang=None):
+    """
+    Yields (term_key, {lang_index: text}, row) for every record of an exchange file, reading it incrementally.
+    row is the row the record was exported from when the format keeps it (XLIFF unit ids), else None.
+    XLIFF and PO files hold a single translation, which is assigned to target_lang.
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt in ('csv', 'tsv'):
+        return ((key, texts, None) for key, texts in read_table(path, delimiter=',' if fmt == 'csv' else '\t'))
+    if target_lang is None:
+        raise ValueError("A target language is needed to import XLIFF and PO files.")
+    if fmt == 'xliff':
+        return ((key, {target_lang: text}, row) for key, text, row in read_xliff(path))
+    if fmt == 'po':
+        return ((key, {target_lang: text}, None) for key, text in read_po(path))
+    raise ValueError(f"Unknown exchange format '{fmt}'.")
+
+
+def read_table(path, delimiter=','):
+    """
+    Reads a CSV/TSV file written by export_table. Columns headed "Language N" go to language N; any other
+    column after the key is assigned by its position.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if not header:
+            return
+        languages = []
+        for position, name in enumerate(header[1:]):
+            match = re.fullmatch(r'\s*Language\s+(\d+)\s*', name)
+            languages.append(int(match.group(1)) - 1 if match and int(match.group(1)) > 0 else position)
+        for record in reader:
+            if not record or not record[0]:
+                continue
+            yield record[0], {lang_index: text for lang_index, text in zip(languages, record[1:])}
+
+
+# Unit ids written by export_xliff: "u" and the row number, counted from 1.
+_UNIT_ID = re.compile(r'u([1-9]\d*)')
+
+
+def read_xliff(path):
+    """
+    Yields (term_key, target_text, row) for every unit of an XLIFF 2.0 (or 1.2) file. row comes from the
+    u<row + 1> unit ids written by export_xliff and is None for other ids.
+    Parsed units are discarded immediately, so memory use stays flat for any file size.
+    """
+    open_elements = []
+    key = None
+    row = None
+    target = None
+    for event, elem in iterparse(path, events=('start', 'end')):
+        tag = elem.tag.rsplit('}', 1)[-1]
+        if event == 'start':
+            open_elements.append(elem)
+            if tag in ('unit', 'trans-unit'):
+                key = elem.get('name') or elem.get('resname') or elem.get('id')
+                match = _UNIT_ID.fullmatch(elem.get('id') or '')
+                row = int(match.group(1)) - 1 if match else None
+                target = None
+            continue
+        open_elements.pop()
+        if tag == 'target':
+            # Segments of one unit are joined back together.
+            target = (target or '') + ''.join(elem.itertext())
+        elif tag in ('unit', 'trans-unit'):
+            if key is not None and target is not None:
+                yield key, target, row
+            elem.clear()
+            if open_elements:
+                open_elements[-1].remove(elem)
+
+
+_PO_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+
+
+def _po_unquote(text):
+    text = text.strip()
+    if len(text) < 2 or text[0] != '"' or text[-1] != '"':
+        raise ValueError(f"Invalid PO string: {text}")
+    return re.sub(r'\\(.)', lambda match: _PO_ESCAPES.get(match.group(1), match.group(1)), text[1:-1])
+
+
+def read_po(path):
+    """
+    Yields (term_key, msgstr) for every entry of a PO file. The key is the msgctxt (or the msgid if an entry
+    has no context); the header entry and obsolete entries are skipped.
+    """
+    def finish(entry):
+        if 'msgid' not in entry or 'msgstr' not in entry:
+            return None
+        key = entry.get('msgctxt', entry['msgid'])
+        if not key and 'msgctxt' not in entry:
+            return None  # The header.
+        return key, entry['msgstr']
+
+    entry = {}
+    field = None
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('"'):
+                if field is not None:
+                    entry[field] += _po_unquote(line)
+                continue
+            keyword, _, value = line.partition(' ')
+            if keyword.startswith('msgstr['):
+                # Plural forms: only the first one is used.
+                keyword = 'msgstr' if keyword == 'msgstr[0]' else None
+            if keyword == 'msgid_plural' or keyword is None:
+                field = None
+                continue
+            if keyword in ('msgctxt', 'msgid') and 'msgstr' in entry:
+                record = finish(entry)
+                if record:
+                    yield record
+                entry = {}
+            if keyword not in ('msgctxt', 'msgid', 'msgstr'):
+                raise ValueError(f"Invalid PO line: {line}")
+            field = keyword
+            entry[field] = _po_unquote(value)
+    record = finish(entry)
+    if record:
+        yield record
+
+
+def import_records(doc, records):
+    """
+    Matches records (term_key, {lang_index: text}, row) to the rows of a document by key and collects the
+    translations that differ. A record whose row holds its key goes to that row; otherwise the nth record of
+    a key goes to the nth row with that key, the way diff.align pairs rows, so files with duplicated keys
+    re-import unchanged. Records beyond the rows of their key are reported as new keys. Nothing is modified;
+    apply the returned edits with doc.set_text (or through the editor, to make them undoable).
+    """
+    index = doc.term_index()
+    language_count = doc.language_count
+
+    edits = {}  # (row, lang_index) -> text; a row matched twice keeps the last translation.
+    occurrences = Counter()
+    seen = set()
+    new_keys = []
+    new_seen = set()
+    matched = 0
+    for key, texts, row in records:
+        seen.add(key)
+        if row is None or not 0 <= row < len(doc) or doc.key(row) != key:
+            rows = index.rows(key)
+            occurrence = occurrences[key]
+            occurrences[key] += 1
+            if occurrence >= len(rows):
+                if key not in new_seen:
+                    new_keys.append(key)
+                    new_seen.add(key)
+                continue
+            row = rows[occurrence]
+        matched += 1
+        for lang_index, text in texts.items():
+            if not 0 <= lang_index < language_count:
+                continue
+            if doc.text(row, lang_index) != text:
+                edits[row, lang_index] = text
+            else:
+                edits.pop((row, lang_index), None)
+    unmatched_keys = [key for key in index if key not in seen]
+    return ImportResult([(row, lang_index, text) for (row, lang_index), text in edits.items()],
+                        matched, new_keys, unmatched_keys)
+
+
+def import_file(doc, path, fmt=None, target_lang=None):
+    """
+    Reads an exchange file and matches it to a document (see import_records). Returns an ImportResult.
+    """
+    return import_records(doc, read_records(path, fmt, target_lang))
@@ -0,0 +1,230 @@
+"""
+Filtering and sorting the rows of the term table.
+
+Everything runs over the columns of the TermStore, never over the widgets: a query returns the list of rows
+to show, in display order, and the virtual table renders only the visible part of it. Filters are applied
+cheapest first, and each one only looks at the rows the previous ones kept.
+
+Key prefixes ("UI/", "3DMark/Menu/") are answered from a sorted copy of the keys: the rows under a prefix
+are one contiguous slice of it, found with two binary searches.
+"""
+import operator
+import re
+from bisect import bisect_left, bisect_right
+from itertools import compress
+
+from . import instrument
+
+# Row statuses, for filtering and sorting. "edited" means edited in this session.
+UNTRANSLATED = 'untranslated'
+IDENTICAL = 'identical'
+TRANSLATED = 'translated'
+EDITED = 'edited'
+STATUSES = (UNTRANSLATED, IDENTICAL, TRANSLATED, EDITED)
+
+# Sort orders; 'file' keeps the order of the terms array.
+SORT_ORDERS = ('file', 'key', 'length', 'status')
+
+
+# Characters that make a filter a regular expression rather than plain text.
+_REGEX_SYNTAX = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
+
+def _prefix_end(prefix):
+    """
+    The smallest string greater than every string starting with prefix.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class KeyTree:
+    """
+    The term keys in sorted order, seen as a tree of categories separated by "/".
+    Built once per document (keys don't change while editing).
+    """
+    def __init__(self, doc, separator='/'):
+        self.separator = separator
+        keys = [doc.key(row) for row in range(len(doc))]
+        self.rows = sorted(range(len(keys)), key=keys.__getitem__)  # Rows in key order.
+        self.keys = [keys[row] for row in self.rows]
+
+    def _range(self, prefix):
+        if not prefix:
+            return 0, len(self.keys)
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, _prefix_end(prefix))
+
+    def count(self, prefix):
+        start, end = self._range(prefix)
+        return end - start
+
+    def rows_under(self, prefix):
+        """
+        Returns the rows whose key starts with prefix, in key order.
+        """
+        start, end = self._range(prefix)
+        return self.rows[start:end]
+
+    def children(self, prefix=''):
+        """
+        Returns the (child, count, is_category) entries directly under a prefix: categories end with the
+        separator, other children are whole keys. Takes one binary search per child, not per key.
+        """
+        start, end = self._range(prefix)
+        children = []
+        position = start
+        while position < end:
+            key = self.keys[position]
+            cut = key.find(self.separator, len(prefix))
+            if cut < 0:
+                following = bisect_right(self.keys, key, position, end)  # Duplicated keys are counted once.
+                children.append((key, following - position, False))
+            else:
+                child = key[:cut + 1]
+                following = bisect_left(self.keys, _prefix_end(child), position, end)
+                children.append((child, following - position, True))
+            position = following
+        return children
+
+
+def row_status(doc, row, lang_index, source_lang=None, edited=()):
+    """
+    Returns the status of one row in a language (see STATUSES); EDITED takes precedence.
+    """
+    if row in edited:
+        return EDITED
+    text = doc.text(row, lang_index)
+    if not text:
+        return UNTRANSLATED
+    if source_lang is not None and source_lang != lang_index and text == doc.text(row, source_lang):
+        return IDENTICAL
+    return TRANSLATED
+
+
+def _keys(doc):
+    """
+    The keys of every row, as a list indexed by row. Missing keys read as core.NO_TERM_KEY, as in the KeyTree.
+    """
+    return [doc.key(row) for row in range(len(doc))]
+
+
+def _text_column(doc, lang_index):
+    """
+    The texts of a language with "" for missing translations, as a list indexed by row.
+    """
+    if lang_index >= doc.language_count:
+        return [""] * len(doc)
+    column = doc.terms.column(lang_index)
+    return [text if isinstance(text, str) else "" for text in column]
+
+
+def query_rows(doc, lang_index, source_lang=None, status=None, key_prefix=None, pattern=None, search_keys=False,
+               edited=(), sort='file', descending=False, key_tree=None, search_index=None):
+    """
+    Returns the rows matching every given filter, in the requested order.
+
+    status: one of STATUSES (IDENTICAL needs source_lang). edited: the rows edited in this session.
+    key_prefix: only keys starting with it (answered from key_tree, built if not given).
+    pattern: a regular expression (string or compiled) searched in the texts of lang_index, or in the keys
+    with search_keys=True. sort: one of SORT_ORDERS. Raises re.error for an invalid pattern.
+    search_index: the search.SearchIndex of lang_index, if available; text patterns without any regular
+    expression syntax are then answered from its trigram index instead of testing every row.
+    """
+    with instrument.timed('filter', f"{len(doc)} terms"):
+        return _query_rows(doc, lang_index, source_lang, status, key_prefix, pattern, search_keys, edited, sort,
+                           descending, key_tree, search_index)
+
+
+def _query_rows(doc, lang_index, source_lang, status, key_prefix, pattern, search_keys, edited, sort, descending,
+                key_tree, search_index):
+    if isinstance(pattern, str) and pattern and search_index is not None and not search_keys \
+            and not _REGEX_SYNTAX.search(pattern):
+        matches = search_index.search(pattern)
+        pattern = None
+    else:
+        matches = None
+    if isinstance(pattern, str):
+        pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+
+    # Start from the most selective cheap filter.
+    rows = None  # Every row.
+    if status == EDITED:
+        rows = sorted(edited)
+        if key_prefix:
+            rows = [row for row in rows if doc.key(row).startswith(key_prefix)]
+    elif key_prefix:
+        key_tree = key_tree or KeyTree(doc)
+        rows = sorted(key_tree.rows_under(key_prefix))
+
+    texts = None
+    if status in (UNTRANSLATED, IDENTICAL, TRANSLATED):
+        texts = _text_column(doc, lang_index)
+        if status == UNTRANSLATED:
+            flags = map(operator.not_, texts)
+        else:
+            source = _text_column(doc, source_lang) if source_lang is not None and source_lang != lang_index else None
+            if status == IDENTICAL:
+                flags = map(operator.eq, texts, source) if source is not None else [False] * len(texts)
+            else:
+                flags = map(operator.ne, texts, source) if source is not None else texts
+            if status == IDENTICAL or source is not None:
+                flags = map(operator.and_, map(bool, texts), flags)
+        rows = _select(rows, flags, len(texts))
+
+    if pattern is not None:
+        values = _keys(doc) if search_keys else (texts or _text_column(doc, lang_index))
+        if rows is None:
+            rows = list(compress(range(len(values)), map(pattern.search, values)))
+        else:
+            rows = [row for row in rows if pattern.search(values[row])]
+
+    if matches is not None:
+        if rows is None:
+            rows = matches
+        else:
+            matches = set(matches)
+            rows = [row for row in rows if row in matches]
+
+    if rows is None:
+        rows = range(len(doc))
+    return sort_rows(doc, rows, sort, lang_index, source_lang, edited, descending, key_tree)
+
+
+def _select(rows, flags, count):
+    """
+    Keeps the rows (all rows if None) whose flag is true; flags holds one value per row of the document.
+    """
+    if rows is None:
+        return list(compress(range(count), flags))
+    flags = list(flags)
+    return [row for row in rows if flags[row]]
+
+
+def sort_rows(doc, rows, sort='file', lang_index=0, source_lang=None, edited=(), descending=False, key_tree=None):
+    """
+    Orders rows by file position, key, text length (of lang_index) or status. Sorting is stable, so rows
+    that compare equal stay in file order.
+    """
+    if sort == 'file':
+        if descending:
+            return list(reversed(rows))
+        return rows if isinstance(rows, range) else list(rows)
+    if sort == 'key':
+        if key_tree is not None and isinstance(rows, range) and len(rows) == len(doc):
+            return list(reversed(key_tree.rows)) if descending else list(key_tree.rows)  # Already sorted.
+        return sorted(rows, key=_keys(doc).__getitem__, reverse=descending)
+    if sort == 'length':
+        texts = _text_column(doc, lang_index)
+        return sorted(rows, key=lambda row: len(texts[row]), reverse=descending)
+    if sort == 'status':
+        # Rank of every row, in the order of STATUSES: untranslated, identical, translated, edited.
+        texts = _text_column(doc, lang_index)
+        if source_lang is not None and source_lang != lang_index:
+            source = _text_column(doc, source_lang)
+            ranks = [0 if not text else 1 if text == source_text else 2 for text, source_text in zip(texts, source)]
+        else:
+            ranks = [2 if text else 0 for text in texts]
+        for row in edited:
+            if row < len(ranks):
+                ranks[row] = 3
+        return sorted(rows, key=ranks.__getitem__, reverse=descending)
+    raise ValueError(f"Unknown sort order '{sort}'. Use one of: {', '.join(SORT_ORDERS)}.")
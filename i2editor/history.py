@@ -0,0 +1,96 @@
+"""
+Undo/redo history of text edits.
+
+Instead of document snapshots, the history keeps a compact log of the cells that changed:
+(row, language index, old text, new text). Everything a single user action changes (one "Save Changes",
+a whole Replace All or TXT import) is grouped into one step, and the log is capped in memory by evicting
+the oldest steps.
+"""
+import sys
+from collections import deque, namedtuple
+
+# One changed cell.
+Edit = namedtuple('Edit', 'row lang_index old_text new_text')
+
+# Approximate memory used by one Edit tuple besides its strings.
+_EDIT_OVERHEAD = sys.getsizeof((0, 0, "", "")) + 2 * sys.getsizeof(0)
+
+
+class EditGroup:
+    """
+    One undoable step: a label for the menu and the edits it made, in the order they were applied.
+    """
+    __slots__ = ('label', 'edits', 'size')
+
+    def __init__(self, label, edits):
+        self.label = label
+        self.edits = tuple(edits)
+        self.size = sum(sys.getsizeof(edit.old_text) + sys.getsizeof(edit.new_text) + _EDIT_OVERHEAD
+                        for edit in self.edits)
+
+
+class EditHistory:
+    """
+    Undo and redo stacks of EditGroups, bounded by max_bytes (approximate) and max_steps.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_steps=1000):
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+        self._undo = deque()
+        self._redo = []
+        self._size = 0  # Approximate memory used by both stacks.
+
+    def clear(self):
+        self._undo.clear()
+        self._redo = []
+        self._size = 0
+
+    def record(self, label, edits):
+        """
+        Adds a step and clears the redo stack. Returns False (and clears the history) if the step alone is
+        larger than the memory cap, since it could not be undone anyway.
+        """
+        group = EditGroup(label, edits)
+        if not group.edits:
+            return True
+        self._size -= sum(redo_group.size for redo_group in self._redo)
+        self._redo = []
+        if group.size > self.max_bytes:
+            self.clear()
+            return False
+        self._undo.append(group)
+        self._size += group.size
+        # Evict the oldest steps until the log fits again.
+        while self._undo and (self._size > self.max_bytes or len(self._undo) > self.max_steps):
+            self._size -= self._undo.popleft().size
+        return True
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_label(self):
+        return self._undo[-1].label if self._undo else None
+
+    def redo_label(self):
+        return self._redo[-1].label if self._redo else None
+
+    def undo(self):
+        """
+        Moves the latest step to the redo stack and returns it. The caller restores each edit's old_text,
+        in reverse order.
+        """
+        group = self._undo.pop()
+        self._redo.append(group)
+        return group
+
+    def redo(self):
+        """
+        Moves the latest undone step back to the undo stack and returns it. The caller re-applies each
+        edit's new_text, in order.
+        """
+        group = self._redo.pop()
+        self._undo.append(group)
+        return group
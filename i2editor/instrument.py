@@ -0,0 +1,194 @@
+"""
+Instrumentation: timings and counters of the editor's operations, and optional cProfile capture.
+
+Operations are timed with `with timed('save', path):`. The most recent ones are kept in a ring buffer, and
+calls, total and longest time are summed per operation name. Counters add up amounts such as rows rendered,
+Tk calls, or bytes read and written. Recording an operation costs about a microsecond and only whole
+operations are timed (never single rows), so instrumentation is always on. Everything is thread-safe:
+background tasks record their operations like the GUI thread does.
+
+While a Profiler is running, cProfile statistics are collected for the GUI thread and for every call made
+through profiled() (background tasks use it), and merged when the profiler is stopped.
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from contextlib import contextmanager
+
+# Number of recent operations kept for the debug panel.
+RECENT_OPERATIONS = 500
+# Operations slower than this (in seconds) are flagged as slow.
+SLOW_OPERATION = 0.5
+
+Operation = namedtuple('Operation', 'name detail started seconds thread')
+Operation.__doc__ = """
+One timed operation: its name (e.g. "load"), a detail such as the file path, the wall-clock time it started
+(time.time()), its duration in seconds and the name of the thread that ran it.
+"""
+
+_lock = threading.Lock()
+_recent = deque(maxlen=RECENT_OPERATIONS)
+_totals = {}  # Operation name -> [calls, total seconds, longest seconds].
+_counters = Counter()
+_profiler = None  # The running Profiler, if any.
+
+
+@contextmanager
+def timed(name, detail=""):
+    """
+    Times the enclosed block as one operation. Operations that raise are recorded too.
+    """
+    started = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, detail, started)
+
+
+def record(name, seconds, detail="", started=None):
+    """
+    Records an operation that was timed by the caller.
+    """
+    operation = Operation(name, str(detail), time.time() - seconds if started is None else started, seconds,
+                          threading.current_thread().name)
+    with _lock:
+        _recent.append(operation)
+        totals = _totals.get(name)
+        if totals is None:
+            _totals[name] = [1, seconds, seconds]
+        else:
+            totals[0] += 1
+            totals[1] += seconds
+            if seconds > totals[2]:
+                totals[2] = seconds
+
+
+def count(name, amount=1):
+    """
+    Adds amount to a counter (e.g. count('bytes_written', size)).
+    """
+    with _lock:
+        _counters[name] += amount
+
+
+def recent(limit=None):
+    """
+    Returns the most recent operations, oldest first.
+    """
+    with _lock:
+        operations = list(_recent)
+    return operations[-limit:] if limit else operations
+
+
+def totals():
+    """
+    Returns {operation name: (calls, total seconds, longest seconds)}.
+    """
+    with _lock:
+        return {name: tuple(values) for name, values in _totals.items()}
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def reset():
+    """
+    Forgets every recorded operation and counter.
+    """
+    with _lock:
+        _recent.clear()
+        _totals.clear()
+        _counters.clear()
+
+
+def format_report(limit=50):
+    """
+    Returns the totals, the counters and the most recent operations as text, e.g. to attach to a bug report.
+    """
+    lines = ["Operation totals (calls, total, longest):"]
+    for name, (calls, seconds, longest) in sorted(totals().items(), key=lambda item: -item[1][1]):
+        lines.append(f"  {name:<24} {calls:8d} {seconds:10.3f} s {longest:10.3f} s")
+    lines.append("Counters:")
+    for name, value in sorted(counters().items()):
+        lines.append(f"  {name:<24} {value:14d}")
+    lines.append("Recent operations:")
+    for operation in recent(limit):
+        started = time.strftime('%H:%M:%S', time.localtime(operation.started))
+        slow = "  SLOW" if operation.seconds >= SLOW_OPERATION else ""
+        lines.append(f"  {started} {operation.seconds * 1000:10.1f} ms  {operation.name} {operation.detail} "
+                     f"[{operation.thread}]{slow}")
+    return "\n".join(lines)
+
+
+# --- cProfile capture ---
+
+class Profiler:
+    """
+    Collects cProfile statistics of the thread that starts it and of the calls made through profiled().
+    """
+    def __init__(self):
+        self._main = cProfile.Profile()
+        self._others = []  # Profiles of background calls, merged by stop().
+        self._lock = threading.Lock()
+
+    def start(self):
+        global _profiler
+        self._main.enable()
+        _profiler = self
+        return self
+
+    def stop(self):
+        """
+        Stops profiling and returns the merged pstats.Stats.
+        """
+        global _profiler
+        _profiler = None
+        self._main.disable()
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            for profile in self._others:
+                stats.add(profile)
+        return stats
+
+    def _add(self, profile):
+        with self._lock:
+            self._others.append(profile)
+
+
+def is_profiling():
+    return _profiler is not None
+
+
+def profiled(func, *args):
+    """
+    Calls func(*args), under a profiler of its own if profiling is on (for work done in other threads).
+    """
+    profiler = _profiler
+    if profiler is None:
+        return func(*args)
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        return func(*args)  # Python 3.12+: the running profiler already sees every thread.
+    try:
+        return func(*args)
+    finally:
+        profile.disable()
+        profiler._add(profile)
+
+
+def stats_summary(stats, limit=30):
+    """
+    Returns the functions with the most cumulative time as text.
+    """
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
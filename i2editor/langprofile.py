@@ -0,0 +1,244 @@
+"""
+Language column profiler.
+
+One pass over every language column collects its fill rate and size, and a sample of its texts gives a
+histogram of the writing systems used and the most common words. From these the profiler guesses the
+language of each column (writing system first, then stop-word signatures for languages sharing a script).
+Names and codes declared in the file's mLanguages list take precedence over the guesses.
+
+Profiles are cached per document, so the editor, the command line and later features can ask for them freely.
+"""
+import re
+import weakref
+from collections import Counter, namedtuple
+
+from . import instrument
+
+# Number of texts per column used for the script and word statistics (spread evenly over the column).
+SAMPLE_SIZE = 3000
+
+ColumnProfile = namedtuple('ColumnProfile', 'lang_index name code declared guess confidence filled total '
+                                            'characters scripts top_words')
+ColumnProfile.__doc__ = """
+Statistics of one language column. name/code come from mLanguages when declared, else from the guess.
+scripts maps a writing system to the number of sampled letters in it; top_words lists (word, count).
+"""
+
+# Writing systems, as character classes counted over the sample.
+SCRIPTS = (
+    ('Latin', re.compile('[A-Za-zÀ-ɏḀ-ỿ]')),
+    ('Cyrillic', re.compile('[Ѐ-ӿ]')),
+    ('Greek', re.compile('[Ͱ-Ͽ]')),
+    ('Arabic', re.compile('[؀-ۿݐ-ݿ]')),
+    ('Hebrew', re.compile('[֐-׿]')),
+    ('Devanagari', re.compile('[ऀ-ॿ]')),
+    ('Thai', re.compile('[฀-๿]')),
+    ('Hangul', re.compile('[가-힣ᄀ-ᇿ㄰-㆏]')),
+    ('Kana', re.compile('[぀-ヿ]')),
+    ('Han', re.compile('[一-鿿㐀-䶿]')),
+)
+
+# Scripts that identify a language on their own.
+SCRIPT_LANGUAGES = {
+    'Greek': ('el', 'Greek'),
+    'Arabic': ('ar', 'Arabic'),
+    'Hebrew': ('he', 'Hebrew'),
+    'Devanagari': ('hi', 'Hindi'),
+    'Thai': ('th', 'Thai'),
+    'Hangul': ('ko', 'Korean'),
+    'Kana': ('ja', 'Japanese'),
+    'Han': ('zh', 'Chinese'),
+}
+
+# Very common words of languages that share a script; the best matching list wins.
+STOP_WORDS = {
+    'en': ('English', 'the and of to a in is you for it on with are this that be your not or can'),
+    'es': ('Spanish', 'de la el que en y los las del se por un una para con no es su al lo'),
+    'fr': ('French', 'de la le et les des en un une du est pour que pas vous sur au avec ce dans'),
+    'de': ('German', 'der die und das ist nicht sie zu den mit ein eine auf für sich dem des von wird'),
+    'it': ('Italian', 'di il che la e per non un una del della le è sono con si al gli da'),
+    'pt': ('Portuguese', 'de que o a e do da em um para com não uma os no se na por você'),
+    'nl': ('Dutch', 'de het een en van is dat op te in niet je met voor zijn er aan ook'),
+    'pl': ('Polish', 'i w nie na się z do to że jest jak o co po ale dla tak'),
+    'tr': ('Turkish', 've bir bu da de için ile ne çok daha olarak gibi ama sen ben değil'),
+    'ru': ('Russian', 'и в не на что с по как это для к вы из от у все так же'),
+    'uk': ('Ukrainian', 'і в не на що з та як це для до ви за від у все також'),
+}
+_STOP_WORD_SETS = {code: set(words.split()) for code, (_, words) in STOP_WORDS.items()}
+
+# Markup that says nothing about the language: rich-text tags, placeholders and bracketed codes.
+_MARKUP = re.compile(r'<[^<>]*>|\{[^{}]*\}|\[[^\[\]]*\]|%\d*\$?[sd]')
+_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+
+def declared_languages(doc):
+    """
+    Returns the (name, code) pairs listed in the file's mLanguages array, or an empty list.
+    A workspace uses the list of its first file.
+    """
+    documents = getattr(doc, 'documents', None)
+    if documents:
+        doc = documents[0]
+    skeleton = getattr(doc, 'skeleton', None)
+    terms_path = getattr(doc, 'terms_path', None)
+    if not isinstance(skeleton, dict) or not terms_path:
+        return []
+    container = skeleton
+    for key in terms_path[:-2]:
+        container = container.get(key) if isinstance(container, dict) else None
+    languages = container.get('mLanguages') if isinstance(container, dict) else None
+    if isinstance(languages, dict):
+        languages = languages.get('Array')
+    if not isinstance(languages, list):
+        return []
+    declared = []
+    for language in languages:
+        if not isinstance(language, dict):
+            language = {}
+        declared.append((str(language.get('Name') or ''), str(language.get('Code') or '')))
+    return declared
+
+
+def _sample(column, size):
+    """
+    Returns up to size non-empty texts taken at even intervals over the column.
+    """
+    step = max(1, len(column) // size)
+    return [text for text in column[::step] if isinstance(text, str) and text][:size]
+
+
+def guess_language(scripts, words):
+    """
+    Guesses (code, name, confidence) from a script histogram and a Counter of lower-cased words.
+    Returns (None, None, 0.0) when the column has no letters.
+    """
+    letters = sum(scripts.values())
+    if not letters:
+        return None, None, 0.0
+    script, count = max(scripts.items(), key=lambda item: item[1])
+    share = count / letters
+    # Japanese mixes kana and kanji; any real amount of kana means Japanese rather than Chinese.
+    if script == 'Han' and scripts.get('Kana', 0) > 0.1 * letters:
+        script = 'Kana'
+        share = (count + scripts['Kana']) / letters
+    if script in SCRIPT_LANGUAGES:
+        code, name = SCRIPT_LANGUAGES[script]
+        return code, name, share
+
+    candidates = [code for code in STOP_WORDS if (script == 'Cyrillic') == (code in ('ru', 'uk'))]
+    total_words = sum(words.values())
+    if not total_words:
+        return None, script, 0.0
+    scores = {code: sum(count for word, count in words.items() if word in _STOP_WORD_SETS[code]) / total_words
+              for code in candidates}
+    code = max(scores, key=scores.get)
+    if scores[code] < 0.05:
+        return None, script, 0.0  # Words of an unknown language (or only names and labels).
+    return code, STOP_WORDS[code][0], share * min(1.0, scores[code] * 4)
+
+
+def profile_column(column, lang_index, sample_size=SAMPLE_SIZE):
+    """
+    Computes the statistics of one language column (a list of texts, one per row).
+    """
+    filled = 0
+    characters = 0
+    for text in column:
+        if isinstance(text, str) and text:  # JSON null or numbers are not translations.
+            filled += 1
+            characters += len(text)
+
+    sample = _MARKUP.sub(' ', '\n'.join(_sample(column, sample_size)))
+    scripts = {}
+    for script, pattern in SCRIPTS:
+        count = len(pattern.findall(sample))
+        if count:
+            scripts[script] = count
+    words = Counter(word.lower() for word in _WORD.findall(sample))
+    code, name, confidence = guess_language(scripts, words)
+    return ColumnProfile(lang_index, name, code, False, code, round(confidence, 3), filled, len(column),
+                         characters, scripts, words.most_common(10))
+
+
+class LanguageProfile:
+    """
+    The profiles of every language column of a document, with display names and the English column.
+    """
+    def __init__(self, columns, english_index):
+        self.columns = columns
+        self.english_index = english_index
+
+    def __len__(self):
+        return len(self.columns)
+
+    def display_names(self):
+        """
+        Names for the language selector, e.g. "Language 2 - Spanish (es)". They always start with "Language N".
+        """
+        names = []
+        for column in self.columns:
+            label = f"Language {column.lang_index + 1}"
+            if column.name:
+                label += f" - {column.name}"
+                if column.code:
+                    label += f" ({column.code})" if column.declared else f" ({column.code}?)"
+            names.append(label)
+        return names
+
+    def index_of(self, code):
+        """
+        Returns the column whose (declared or guessed) code matches a language code such as "en", or None.
+        """
+        best = None
+        for column in self.columns:
+            if column.code and column.code.lower().split('-')[0] == code.lower():
+                if column.declared:
+                    return column.lang_index
+                if best is None or column.confidence > self.columns[best].confidence:
+                    best = column.lang_index
+        return best
+
+
+def profile_document(doc, sample_size=SAMPLE_SIZE):
+    """
+    Profiles every language column of a document (see profile_column) and merges in the mLanguages names.
+    """
+    declared = declared_languages(doc)
+    columns = []
+    for lang_index in range(doc.language_count):
+        column = profile_column(doc.terms.column(lang_index), lang_index, sample_size)
+        if lang_index < len(declared) and (declared[lang_index][0] or declared[lang_index][1]):
+            name, code = declared[lang_index]
+            column = column._replace(name=name or column.name, code=code or column.code, declared=True)
+        columns.append(column)
+    profile = LanguageProfile(columns, None)
+    profile.english_index = profile.index_of('en')
+    return profile
+
+
+# Profiles by document, recomputed when the number of terms changes (e.g. after the rest of a file was read).
+_cache = weakref.WeakKeyDictionary()
+
+
+def _state(doc):
+    return len(doc), doc.language_count, getattr(doc, 'skeleton', None) is not None
+
+
+def get_profile(doc, refresh=False):
+    """
+    Returns the cached LanguageProfile of a document, profiling it on first use.
+    """
+    cached = _cache.get(doc)
+    state = _state(doc)
+    if cached is None or refresh or cached[0] != state:
+        with instrument.timed('detect_languages', f"{len(doc)} terms"):
+            cached = _cache[doc] = (state, profile_document(doc))
+    return cached[1]
+
+
+def remember_profile(doc, profile):
+    """
+    Stores a profile computed earlier for the same data (e.g. kept in the session cache), so get_profile
+    doesn't have to compute it again.
+    """
+    _cache[doc] = (_state(doc), profile)
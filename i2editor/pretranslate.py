@@ -0,0 +1,265 @@
+"""
+Machine pre-translation: fills a language column from a translation backend in one pass.
+
+The pipeline collects the rows to fill and groups them by source text, since games repeat the same strings
+("OK", "Back", item names) many times, so each text is translated once. Rich-text tags and placeholders are
+replaced with numbered markers (see protect()) so that a backend can't translate or drop them, and are put
+back afterwards; a translation that lost or invented a marker is rejected. The unique texts are sent in
+batches that run concurrently on an asyncio event loop, up to the backend's limit, and the result is one
+list of (row, lang_index, text) edits that the caller applies in a single update (one undo step in the editor).
+
+Backends implement Backend.translate(). Two offline ones are included: DictionaryBackend, a glossary of
+source -> translation pairs, and TranslationMemoryBackend, which takes matches from the local translation memory.
+"""
+import asyncio
+import csv
+import json
+import re
+from collections import namedtuple
+
+from . import checks, instrument, tm
+
+# Marker standing in for the n-th protected tag or placeholder; the brackets don't occur in game texts.
+MARKER = '⟦{}⟧'
+_MARKER_PATTERN = re.compile('⟦(\\d+)⟧')
+
+PreTranslation = namedtuple('PreTranslation', 'edits unique translated missing rejected')
+PreTranslation.__doc__ = """
+The result of pretranslate(): edits lists the (row, lang_index, text) to apply, unique the number of distinct
+source texts, translated/missing/rejected how many of them got a translation, none, or one with broken markup.
+"""
+
+
+def protect(text):
+    """
+    Replaces the tags and placeholders of a text with markers. Returns the masked text and the markup it replaced.
+    """
+    tokens = []
+
+    def replace(match):
+        tokens.append(match.group(0))
+        return MARKER.format(len(tokens) - 1)
+
+    return checks.TOKEN_PATTERN.sub(replace, text), tokens
+
+
+def restore(text, tokens):
+    """
+    Puts the markup back into a translated text (markers may have been moved). Returns None if a marker was
+    lost, repeated or made up by the backend.
+    """
+    found = sorted(int(number) for number in _MARKER_PATTERN.findall(text))
+    if found != list(range(len(tokens))):
+        return None
+    return _MARKER_PATTERN.sub(lambda match: tokens[int(match.group(1))], text)
+
+
+# --- Backends ---
+
+class Backend:
+    """
+    Interface of translation backends.
+
+    translate(texts, source_lang, target_lang) is a coroutine that returns one translation per text, or None
+    for texts it can't translate. Languages are identified like in the translation memory (a language code
+    such as "en", see tm.language_ids). With protect_markup the backend receives texts whose markup was
+    replaced with markers and must keep them; otherwise it gets the texts as they are, and translations whose
+    tags or placeholders differ from the source are rejected. Up to batch_size texts are sent per call, and
+    up to max_concurrency calls run at the same time. close() is called when a pre-translation ends.
+    """
+    name = "backend"
+    batch_size = 50
+    max_concurrency = 4
+    protect_markup = True
+
+    async def translate(self, texts, source_lang, target_lang):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class DictionaryBackend(Backend):
+    """
+    Translates texts found in a glossary of source -> translation pairs (ignoring case and whitespace unless
+    case_sensitive). Markup is compared by position, so an entry for "<b>Start</b>" also translates
+    "<color=red>Start</color>".
+    """
+    name = "glossary"
+    batch_size = 1000
+
+    def __init__(self, entries, case_sensitive=False):
+        self.case_sensitive = case_sensitive
+        self.entries = {}
+        for source, target in dict(entries).items():
+            if not source or not isinstance(target, str):
+                continue
+            masked_source, source_tokens = protect(source)
+            self.entries[self._lookup_key(masked_source)] = _mask_like(target, source_tokens)
+
+    @classmethod
+    def from_file(cls, path, case_sensitive=False):
+        """
+        Reads a glossary: a JSON object, or a CSV/TSV file whose first two columns hold the source text and
+        its translation (a "source,target" header line is skipped). Raises ValueError or OSError.
+        """
+        if path.lower().endswith('.json'):
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                entries = json.load(f)
+            if not isinstance(entries, dict):
+                raise ValueError(f"{path}: a JSON glossary must be an object of source -> translation.")
+            return cls(entries, case_sensitive)
+        delimiter = '\t' if path.lower().endswith(('.tsv', '.tab', '.txt')) else ','
+        entries = {}
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for number, fields in enumerate(csv.reader(f, delimiter=delimiter)):
+                if len(fields) < 2:
+                    continue
+                if number == 0 and (fields[0].strip().lower(), fields[1].strip().lower()) == ('source', 'target'):
+                    continue
+                entries[fields[0]] = fields[1]
+        return cls(entries, case_sensitive)
+
+    def _lookup_key(self, masked_text):
+        return masked_text if self.case_sensitive else tm.normalize(masked_text)
+
+    async def translate(self, texts, source_lang, target_lang):
+        return [self.entries.get(self._lookup_key(text)) for text in texts]
+
+
+def _mask_like(text, tokens):
+    """
+    Masks the markup of a translation with the markers of its source's markup (by equal token); markup the
+    source doesn't have stays as it is.
+    """
+    available = {}
+    for number, token in enumerate(tokens):
+        available.setdefault(token, []).append(number)
+
+    def replace(match):
+        numbers = available.get(match.group(0))
+        return MARKER.format(numbers.pop(0)) if numbers else match.group(0)
+
+    return checks.TOKEN_PATTERN.sub(replace, text)
+
+
+class TranslationMemoryBackend(Backend):
+    """
+    Takes translations from the local translation memory (see i2editor.tm): exact matches by default, or the
+    best fuzzy match scoring at least min_score (much slower, one lookup per text). The texts are looked up
+    with their markup, as they are stored. The database is opened by the thread running the pre-translation.
+    """
+    name = "translation memory"
+    batch_size = 500
+    max_concurrency = 1  # One SQLite connection.
+    protect_markup = False
+
+    def __init__(self, path=tm.DEFAULT_PATH, min_score=1.0):
+        self.path = path
+        self.min_score = min_score
+        self.memory = None
+
+    async def translate(self, texts, source_lang, target_lang):
+        if self.memory is None:
+            self.memory = tm.TranslationMemory(self.path)
+        if self.min_score >= 1.0:
+            return self.memory.exact_matches(source_lang, texts, target_lang)
+        translations = []
+        for text in texts:
+            suggestions = self.memory.suggest(source_lang, text, target_lang, limit=1, min_score=self.min_score)
+            translations.append(suggestions[0].target if suggestions else None)
+        return translations
+
+    def close(self):
+        if self.memory is not None:
+            self.memory.close()
+            self.memory = None
+
+
+# --- Pipeline ---
+
+def collect(doc, source_index, target_index, rows=None, overwrite=False):
+    """
+    Returns {source text: [rows]} for the rows to translate: those with a source text and, unless overwrite,
+    an empty translation. Texts are listed in the order they first appear.
+    """
+    groups = {}
+    for row in range(len(doc)) if rows is None else rows:
+        source = doc.text(row, source_index)
+        if source.strip() and (overwrite or not doc.text(row, target_index)):
+            groups.setdefault(source, []).append(row)
+    return groups
+
+
+async def _translate_all(backend, texts, source_lang, target_lang, progress):
+    """
+    Translates texts in batches, running up to backend.max_concurrency batches at a time.
+    """
+    semaphore = asyncio.Semaphore(max(1, backend.max_concurrency))
+    size = max(1, backend.batch_size)
+    results = [None] * len(texts)
+    done = [0]
+
+    async def run(start):
+        batch = texts[start:start + size]
+        async with semaphore:
+            with instrument.timed('pretranslate_batch', f"{backend.name}: {len(batch)} texts"):
+                translations = await backend.translate(batch, source_lang, target_lang)
+        if len(translations) != len(batch):
+            raise ValueError(f"The {backend.name} returned {len(translations)} translations for {len(batch)} texts.")
+        results[start:start + len(batch)] = translations
+        done[0] += len(batch)
+        if progress:
+            progress(done[0], len(texts))
+
+    tasks = [asyncio.ensure_future(run(start)) for start in range(0, len(texts), size)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return results
+
+
+def pretranslate(doc, source_index, target_index, backend, source_lang=None, target_lang=None, rows=None,
+                 overwrite=False, progress=None):
+    """
+    Translates the rows collected by collect() with a backend and returns a PreTranslation; the document is
+    not modified. source_lang/target_lang are the language ids passed to the backend (by default the ones
+    of the columns, see tm.language_ids). progress(texts_done, total_texts) is called after every batch; it
+    may raise (e.g. OperationCancelled) to stop, which cancels the batches still running.
+    """
+    if source_lang is None or target_lang is None:
+        ids = tm.language_ids(doc)
+        source_lang = ids[source_index] if source_lang is None else source_lang
+        target_lang = ids[target_index] if target_lang is None else target_lang
+    groups = collect(doc, source_index, target_index, rows, overwrite)
+    sources = list(groups)
+    protected = [protect(text) for text in sources] if backend.protect_markup else None
+
+    with instrument.timed('pretranslate', f"{backend.name}: {len(sources)} texts"):
+        loop = asyncio.new_event_loop()
+        try:
+            texts = [masked for masked, _ in protected] if protected is not None else sources
+            translations = loop.run_until_complete(_translate_all(backend, texts, source_lang, target_lang, progress))
+        finally:
+            loop.close()
+            backend.close()
+
+    edits = []
+    translated = missing = rejected = 0
+    for position, (source, translation) in enumerate(zip(sources, translations)):
+        if not translation or not translation.strip():
+            missing += 1
+            continue
+        if protected is not None:
+            translation = restore(translation, protected[position][1])
+        elif set(checks.check_text(translation, source)) - set(checks.check_text(source, None)):
+            translation = None  # Tags or placeholders don't match the source.
+        if translation is None:
+            rejected += 1
+            continue
+        translated += 1
+        edits.extend((row, target_index, translation) for row in groups[source])
+    return PreTranslation(edits, len(sources), translated, missing, rejected)
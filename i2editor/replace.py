@@ -0,0 +1,79 @@
+"""
+Batched find & replace over a language column.
+
+Replacing is split in two steps: plan_replacements() computes the list of changes on the raw column data
+without modifying anything, and apply_changes() writes the accepted ones
+back to the document in one pass. This lets the GUI show a preview and refresh its table only once.
+"""
+import re
+from collections import namedtuple
+
+from . import instrument
+
+# One planned replacement: the row, its text before and after, and the number of substitutions.
+Change = namedtuple('Change', 'row old_text new_text count')
+
+
+def build_pattern(query, regex=False, whole_word=False, match_case=False):
+    """
+    Compiles the search query. Plain queries are matched literally; whole_word only matches occurrences
+    that are not part of a longer word. Raises re.error for an invalid regular expression.
+    """
+    expression = query if regex else re.escape(query)
+    if whole_word:
+        expression = r'(?<!\w)(?:' + expression + r')(?!\w)'
+    return re.compile(expression, 0 if match_case else re.IGNORECASE)
+
+
+def _replacer(replacement, regex):
+    """
+    Returns the replacement argument for re.subn: a template in regex mode (\\1, \\g<name>), literal text otherwise.
+    """
+    if regex:
+        return replacement
+    return lambda match: replacement
+
+
+def replace_text(text, pattern, replacement, regex=False, count=0):
+    """
+    Replaces matches of a compiled pattern in one text (at most count of them if count > 0).
+    Returns the new text and the number of substitutions, like re.subn.
+    """
+    return pattern.subn(_replacer(replacement, regex), text, count=count)
+
+
+def _plan_rows(texts, rows, pattern, replacer):
+    changes = []
+    for row in rows:
+        old_text = texts[row]
+        if not isinstance(old_text, str):
+            continue
+        new_text, count = pattern.subn(replacer, old_text)
+        if count and new_text != old_text:
+            changes.append(Change(row, old_text, new_text, count))
+    return changes
+
+
+def plan_replacements(texts, query, replacement, rows=None, regex=False, whole_word=False, match_case=False):
+    """
+    Computes every replacement in a column of texts (e.g. TermStore.column(lang_index)) without modifying it.
+
+    rows limits the search to some rows (e.g. the candidates from a search index, or the rows of a filtered
+    view); by default every row is searched. Returns the list of Change tuples in row order.
+    """
+    pattern = query if hasattr(query, 'subn') else build_pattern(query, regex, whole_word, match_case)
+    replacer = _replacer(replacement, regex)
+    rows = range(len(texts)) if rows is None else list(rows)
+    with instrument.timed('plan_replacements', f"{len(rows)} rows"):
+        return _plan_rows(texts, rows, pattern, replacer)
+
+
+def apply_changes(doc, lang_index, changes):
+    """
+    Writes planned changes to a document. Returns the total number of substitutions applied.
+    """
+    total = 0
+    for change in changes:
+        doc.set_text(change.row, lang_index, change.new_text)
+        total += change.count
+    return total
@@ -0,0 +1,117 @@
+"""
+Full-text search over one language column.
+
+A SearchIndex keeps a casefolded copy of every translation plus a trigram index (trigram -> sorted rows
+containing it). Queries of three or more characters only look at the rows that contain all of their
+trigrams, so searching costs time in proportion to the candidates instead of the total amount of text.
+"""
+from array import array
+from bisect import bisect_left, insort
+
+from . import instrument
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    Case-insensitive substring index over a list of texts, identified by row.
+    """
+    def __init__(self, texts):
+        self.folded = [text.casefold() if isinstance(text, str) else "" for text in texts]
+        self.postings = {}  # Trigram -> array of the rows containing it, in ascending order.
+        postings = self.postings
+        for row, text in enumerate(self.folded):
+            for gram in _trigrams(text):
+                rows = postings.get(gram)
+                if rows is None:
+                    rows = postings[gram] = array('l')
+                rows.append(row)
+
+    def __len__(self):
+        return len(self.folded)
+
+    def update(self, row, text):
+        """
+        Replaces the text of one row and adjusts the trigram postings that changed.
+        """
+        old = self.folded[row]
+        new = text.casefold()
+        if old == new:
+            return
+        old_grams = _trigrams(old)
+        new_grams = _trigrams(new)
+        for gram in old_grams - new_grams:
+            rows = self.postings[gram]
+            del rows[bisect_left(rows, row)]
+            if not rows:
+                del self.postings[gram]
+        for gram in new_grams - old_grams:
+            rows = self.postings.get(gram)
+            if rows is None:
+                rows = self.postings[gram] = array('l')
+            insort(rows, row)
+        self.folded[row] = new
+
+    def search(self, query):
+        """
+        Returns the rows whose text contains query (case-insensitive), in ascending order.
+        """
+        query = query.casefold()
+        if not query:
+            return []
+        folded = self.folded
+        if len(query) < 3:
+            return [row for row, text in enumerate(folded) if query in text]
+
+        # Intersect the postings of the query's trigrams, starting with the rarest, then verify the candidates.
+        posting_lists = []
+        for gram in _trigrams(query):
+            rows = self.postings.get(gram)
+            if rows is None:
+                return []
+            posting_lists.append(rows)
+        posting_lists.sort(key=len)
+        candidates = set(posting_lists[0])
+        for rows in posting_lists[1:4]:
+            if len(candidates) < 32:
+                break  # Few enough to verify directly.
+            candidates.intersection_update(rows)
+        return sorted(row for row in candidates if query in folded[row])
+
+    def count(self, query):
+        return len(self.search(query))
+
+
+class SearchIndexes:
+    """
+    The search indexes of a document, built per language on first use and kept up to date with edits.
+    """
+    def __init__(self, doc):
+        self.doc = doc
+        self._indexes = {}
+
+    def get(self, lang_index):
+        index = self._indexes.get(lang_index)
+        if index is None:
+            doc = self.doc
+            with instrument.timed('search_index', f"language {lang_index + 1}"):
+                index = self._indexes[lang_index] = SearchIndex(
+                    doc.text(row, lang_index) for row in range(len(doc)))
+        return index
+
+    def is_built(self, lang_index):
+        return lang_index in self._indexes
+
+    def update(self, row, lang_index, text):
+        """
+        Records an edit. Indexes that have not been built yet will see the new text when they are.
+        """
+        index = self._indexes.get(lang_index)
+        if index is not None:
+            index.update(row, text)
+
+    def search(self, lang_index, query):
+        return self.get(lang_index).search(query)
@@ -0,0 +1,79 @@
+"""
+Background tasks: run slow work (loading, saving) in a worker thread and hand the results back to the GUI.
+
+The worker never touches Tk. It puts messages on a queue, and the GUI drains the queue from its own event
+loop (e.g. with after()), so the window keeps responding while a large file is parsed or written.
+"""
+import queue
+import threading
+
+from . import instrument
+from .core import OperationCancelled
+
+
+class BackgroundTask:
+    """
+    Runs func(task, *args) in a daemon thread.
+
+    The function reports progress with task.report(...) and should call task.check_cancelled() regularly,
+    which raises OperationCancelled once cancel() has been called. The GUI reads the resulting messages with
+    poll(), each one being a (kind, payload) tuple where kind is 'progress', 'done', 'cancelled' or 'error'.
+    """
+    def __init__(self, name, func, *args):
+        self.name = name  # Short description of the task, e.g. "load" or "save".
+        self.func = func
+        self.args = args
+        self.queue = queue.Queue()
+        self.finished = False  # Set by poll() once the final message has been read.
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"i2editor-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """
+        Asks the worker to stop at its next check_cancelled() call.
+        """
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise OperationCancelled()
+
+    def report(self, *progress):
+        """
+        Sends a progress message to the GUI (called from the worker thread).
+        """
+        self.queue.put(('progress', progress))
+
+    def poll(self):
+        """
+        Returns the messages sent since the last call, without blocking.
+        """
+        messages = []
+        while True:
+            try:
+                message = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            messages.append(message)
+            if message[0] != 'progress':
+                self.finished = True
+        return messages
+
+    def _run(self):
+        try:
+            with instrument.timed(f"task {self.name}"):
+                result = instrument.profiled(self.func, self, *self.args)
+        except OperationCancelled:
+            self.queue.put(('cancelled', None))
+        except Exception as e:
+            self.queue.put(('error', e))
+        else:
+            self.queue.put(('done', result))
@@ -0,0 +1,277 @@
+"""
+Local translation memory (TM) stored in SQLite.
+
+Every term of every loaded file is stored as a unit with one segment per language, so any language can serve
+as the source and any other as the target. Exact matches are found through an index of normalized text
+hashes. Fuzzy matches use MinHash signatures of character trigrams, split into LSH bands. Similar texts
+share at least one band with high probability, so a lookup reads a handful of index entries instead of
+scanning the memory. The few candidates are then ranked by their real similarity.
+"""
+import difflib
+import os
+import random
+import re
+import sqlite3
+import struct
+import zlib
+from collections import namedtuple
+
+from . import langprofile
+
+# Default location of the memory, shared by all files the editor opens.
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.i2languages-editor', 'tm.sqlite3')
+
+# MinHash parameters: NUM_BANDS bands of BAND_SIZE values. Texts sharing half of their trigrams are found
+# with ~80% probability, texts sharing 70% with ~98%.
+NUM_BANDS = 6
+BAND_SIZE = 2
+_rng = random.Random(0x12E)  # Fixed seed: signatures must be identical in every session.
+# Each "permutation" XORs the trigram hashes with a random mask, which lets min() run over map() in C.
+_MASKS = [_rng.randrange(1 << 32) for _ in range(NUM_BANDS * BAND_SIZE)]
+
+# Fuzzy lookups score at most this many candidates.
+MAX_CANDIDATES = 300
+
+Suggestion = namedtuple('Suggestion', 'score source target key origin')
+Suggestion.__doc__ = """
+A translation memory match: score is 1.0 for an exact match and the similarity of the sources otherwise.
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS origins (id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime INTEGER);
+CREATE TABLE IF NOT EXISTS units (id INTEGER PRIMARY KEY, origin INTEGER, key TEXT);
+CREATE TABLE IF NOT EXISTS segments (id INTEGER PRIMARY KEY, unit INTEGER, lang TEXT, text TEXT, norm_hash INTEGER);
+CREATE TABLE IF NOT EXISTS bands (band_key INTEGER, segment INTEGER);
+CREATE INDEX IF NOT EXISTS units_origin ON units (origin);
+CREATE INDEX IF NOT EXISTS segments_unit ON segments (unit, lang);
+CREATE INDEX IF NOT EXISTS segments_norm ON segments (lang, norm_hash);
+CREATE INDEX IF NOT EXISTS bands_key ON bands (band_key);
+CREATE INDEX IF NOT EXISTS bands_segment ON bands (segment);
+"""
+
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(text):
+    """
+    The form texts are compared in: case-folded, with runs of whitespace collapsed.
+    """
+    return _SPACES.sub(' ', text.casefold()).strip()
+
+
+def _norm_hash(norm):
+    # Signed 64-bit so it fits an SQLite INTEGER; collisions are ruled out by comparing the texts.
+    return (zlib.crc32(norm.encode('utf-8')) << 16 | len(norm) & 0xFFFF) - (1 << 47)
+
+
+def minhash(norm):
+    """
+    Returns the MinHash signature of the character trigrams of a normalized text.
+    """
+    padded = f"  {norm} "
+    hashes = list({zlib.crc32(padded[i:i + 3].encode('utf-8')) for i in range(len(padded) - 2)})
+    return [min(map(mask.__xor__, hashes)) for mask in _MASKS]
+
+
+def band_keys(signature):
+    """
+    Splits a signature into LSH bands and returns one integer key per band.
+    """
+    keys = []
+    for band in range(NUM_BANDS):
+        values = signature[band * BAND_SIZE:(band + 1) * BAND_SIZE]
+        keys.append(band << 32 | zlib.crc32(struct.pack(f'<{BAND_SIZE}I', *values)))
+    return keys
+
+
+def similarity(a, b):
+    """
+    Similarity of two normalized texts between 0 and 1.
+    """
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def language_ids(doc):
+    """
+    Returns the identifier each language column of a document is stored under: its language code when
+    declared or guessed, otherwise its column number. Files with the same languages then share their segments.
+    """
+    ids = []
+    for column in langprofile.get_profile(doc).columns:
+        ids.append(column.code.lower() if column.code else f"x-lang{column.lang_index + 1}")
+    return ids
+
+
+class TranslationMemory:
+    """
+    A translation memory database. Use one instance per thread (SQLite connections are not shared).
+    """
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        if path != ':memory:':
+            # Lets the editor read suggestions while another connection is adding a file.
+            self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    # --- Filling ---
+
+    def is_current(self, path):
+        """
+        Returns True if a file is already in the memory and has not changed on disk since it was added.
+        """
+        stat = os.stat(path)
+        row = self.connection.execute("SELECT size, mtime FROM origins WHERE path = ?",
+                                      (os.path.abspath(path),)).fetchone()
+        return row is not None and tuple(row) == (stat.st_size, stat.st_mtime_ns)
+
+    def add_document(self, doc, path=None, progress=None, batch_size=2000):
+        """
+        Adds (or replaces) every term of a document, with all of its languages. Empty texts are skipped.
+        progress(rows_done, total_rows) is called after every batch; it may raise to abandon the update, which
+        leaves the memory as it was.
+        """
+        path = os.path.abspath(path or doc.path)
+        languages = language_ids(doc)
+        try:
+            stat = os.stat(path)
+            size, mtime = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            size = mtime = None
+        total = len(doc)
+        with self.connection:
+            cursor = self.connection.cursor()
+            self._remove_origin(cursor, path)
+            cursor.execute("INSERT INTO origins (path, size, mtime) VALUES (?, ?, ?)", (path, size, mtime))
+            origin = cursor.lastrowid
+            # Ids are assigned here so that whole batches can be inserted with executemany.
+            unit = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM units").fetchone()[0]
+            segment = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM segments").fetchone()[0]
+            signatures = {}  # Repeated texts (very common in UI strings) are hashed once.
+            for start in range(0, total, batch_size):
+                units, segments, bands = [], [], []
+                for row in range(start, min(total, start + batch_size)):
+                    unit += 1
+                    units.append((unit, origin, doc.key(row)))
+                    for lang_index, lang in enumerate(languages):
+                        text = doc.text(row, lang_index)
+                        norm = normalize(text)
+                        if not norm:
+                            continue
+                        segment += 1
+                        segments.append((segment, unit, lang, text, _norm_hash(norm)))
+                        keys = signatures.get(norm)
+                        if keys is None:
+                            keys = signatures[norm] = band_keys(minhash(norm))
+                        bands.extend((key, segment) for key in keys)
+                cursor.executemany("INSERT INTO units (id, origin, key) VALUES (?, ?, ?)", units)
+                cursor.executemany("INSERT INTO segments (id, unit, lang, text, norm_hash) VALUES (?, ?, ?, ?, ?)", segments)
+                cursor.executemany("INSERT INTO bands (band_key, segment) VALUES (?, ?)", bands)
+                if progress:
+                    progress(min(total, start + batch_size), total)
+
+    def remove(self, path):
+        """
+        Removes the segments of a file from the memory.
+        """
+        with self.connection:
+            self._remove_origin(self.connection.cursor(), os.path.abspath(path))
+
+    def _remove_origin(self, cursor, path):
+        row = cursor.execute("SELECT id FROM origins WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        origin = row[0]
+        cursor.execute("DELETE FROM bands WHERE segment IN "
+                       "(SELECT segments.id FROM segments JOIN units ON segments.unit = units.id WHERE units.origin = ?)",
+                       (origin,))
+        cursor.execute("DELETE FROM segments WHERE unit IN (SELECT id FROM units WHERE origin = ?)", (origin,))
+        cursor.execute("DELETE FROM units WHERE origin = ?", (origin,))
+        cursor.execute("DELETE FROM origins WHERE id = ?", (origin,))
+
+    # --- Lookup ---
+
+    def exact_matches(self, source_lang, source_texts, target_lang):
+        """
+        Returns the translation of each source text found in the memory as an exact match (ignoring case and
+        whitespace), or None. A translation of the very same text is preferred. Only uses the hash index, so
+        it is fast enough for whole columns.
+        """
+        translations = []
+        for source_text in source_texts:
+            norm = normalize(source_text)
+            best = None
+            if norm:
+                for text, target in self.connection.execute(
+                        "SELECT source.text, target.text FROM segments AS source "
+                        "JOIN segments AS target ON target.unit = source.unit AND target.lang = ? "
+                        "WHERE source.lang = ? AND source.norm_hash = ?", (target_lang, source_lang, _norm_hash(norm))):
+                    if text == source_text:
+                        best = target
+                        break
+                    if best is None and normalize(text) == norm:
+                        best = target
+            translations.append(best)
+        return translations
+
+    def suggest(self, source_lang, source_text, target_lang, limit=10, min_score=0.5, exclude=None):
+        """
+        Returns up to limit Suggestions for translating source_text from source_lang to target_lang, best first.
+        Exact matches (ignoring case and whitespace) score 1.0. exclude=(path, key) leaves out the term itself.
+        Suggestions with the same translation are merged, keeping the best score.
+        """
+        norm = normalize(source_text)
+        if not norm:
+            return []
+        candidates = {}  # Source segment id -> (unit, text).
+        for segment, unit, text in self.connection.execute(
+                "SELECT id, unit, text FROM segments WHERE lang = ? AND norm_hash = ?", (source_lang, _norm_hash(norm))):
+            candidates[segment] = (unit, text)
+        keys = band_keys(minhash(norm))
+        # CROSS JOIN makes SQLite start from the band index rather than from all segments of the language.
+        query = ("SELECT DISTINCT segments.id, segments.unit, segments.text FROM bands "
+                 "CROSS JOIN segments ON segments.id = bands.segment "
+                 f"WHERE bands.band_key IN ({','.join('?' * len(keys))}) AND segments.lang = ? LIMIT ?")
+        for segment, unit, text in self.connection.execute(query, keys + [source_lang, MAX_CANDIDATES]):
+            candidates[segment] = (unit, text)
+
+        scored = []
+        for unit, text in candidates.values():
+            candidate_norm = normalize(text)
+            score = 1.0 if candidate_norm == norm else similarity(norm, candidate_norm)
+            if score >= min_score:
+                scored.append((score, unit, text))
+        scored.sort(key=lambda item: -item[0])
+
+        excluded_path = os.path.abspath(exclude[0]) if exclude and exclude[0] else None
+        suggestions = {}
+        for score, unit, text in scored:
+            found = self.connection.execute(
+                "SELECT segments.text, units.key, origins.path FROM segments "
+                "JOIN units ON units.id = segments.unit JOIN origins ON origins.id = units.origin "
+                "WHERE segments.unit = ? AND segments.lang = ?", (unit, target_lang)).fetchone()
+            if found is None:
+                continue
+            target, key, path = found
+            if exclude and key == exclude[1] and path == excluded_path:
+                continue
+            if target not in suggestions:
+                suggestions[target] = Suggestion(round(score, 3), text, target, key, path)
+                if len(suggestions) >= limit:
+                    break
+        return list(suggestions.values())
@@ -0,0 +1,456 @@
+"""
+Unity asset dumps: reading and writing the LanguageSource MonoBehaviour without a JSON round trip.
+
+Asset tools export a MonoBehaviour either as a text dump (UABE/UABEA "Export Dump", one field per line,
+e.g. LanguageSource-resources.assets.txt) or as its raw serialized bytes ("Export Raw", usually a .dat
+file). Both are read into a UnityDocument, an I2Document whose save() writes the same format back: the dump
+is streamed to the new file and only the translations of the edited terms are replaced, so the result can
+be imported into the asset again as it is.
+
+Text dumps are parsed line by line into the same structure the JSON dumps have. Strings are quoted, with
+backslashes, carriage returns and line feeds escaped (as UABEA writes them).
+
+Raw dumps hold no field names. The MonoBehaviour header (game object, enabled flag, script, name) is
+skipped and the mTerms list is looked for among the next fields: a count followed by that many TermData
+records, trying the layouts used by the versions of I2 Localization (see _TERM_LAYOUTS). Strings are a
+32-bit length, UTF-8 bytes and padding to 4 bytes, so replacing one moves the rest of the data by a
+multiple of 4 and keeps it aligned.
+
+A dump keeps the number of terms and of translations of each term: the Flags and Languages_Touch arrays
+would have to grow too. Saving a document whose terms gained a language slot raises ValueError.
+"""
+import os
+import re
+import struct
+from array import array
+
+from . import core, instrument
+
+# Kinds of Unity dumps.
+TEXT_DUMP = 'text'
+RAW_DUMP = 'raw'
+
+# Bytes read at the start of a file to tell a dump from a JSON file.
+_SNIFF_SIZE = 4096
+# Extensions of raw dumps. Raw data has no header to recognize it by, so other files are never read as one.
+RAW_DUMP_EXTENSIONS = ('.dat',)
+# First line of a text dump: the base field of the object, e.g. "0 MonoBehaviour Base".
+_TEXT_DUMP_START = re.compile(rb'\d [^\r\n]+ Base\r?\n')
+# A field line of a text dump (after its indentation): align flag, type, name, then a value or an item count.
+_FIELD = re.compile(r'\d (.+?) (\S+)(?: = (.*)| \(\d+ items?\))?$')
+_ESCAPED = re.compile(r'\\(.)')
+# Characters that never occur in a term key.
+_CONTROL_CHARACTERS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_UNESCAPES = {'\\': '\\', 'r': '\r', 'n': '\n'}
+
+_INT = struct.Struct('<i')
+# Raw dumps: bytes of the MonoBehaviour header before m_Name, with 64-bit and with 32-bit object ids.
+_HEADER_SIZES = (28, 20)
+# Fields of a TermData record in the versions of I2 Localization found in games, most common first.
+# Description is only serialized by editor builds, Languages_Touch by older versions.
+_TERM_LAYOUTS = (
+    ('Term', 'TermType', 'Languages', 'Flags', 'Languages_Touch'),
+    ('Term', 'TermType', 'Languages', 'Flags'),
+    ('Term', 'TermType', 'Description', 'Languages', 'Flags', 'Languages_Touch'),
+    ('Term', 'TermType', 'Description', 'Languages', 'Flags'),
+)
+# Fields that may lie between mTerms and mLanguages (CaseInsensitiveTerms, OnMissingTranslation, mTerm_AppName).
+_LANGUAGE_PREFIXES = (('bool', 'int', 'string'), ('bool', 'int'), ('bool',), ())
+# Field offsets (after m_Name) searched for mTerms in a raw dump.
+_SEARCH_WINDOW = 256
+# Terms read with every candidate position and layout before one is accepted and read to the end.
+_PROBE_TERMS = 64
+
+
+def dump_kind(path):
+    """
+    Returns TEXT_DUMP or RAW_DUMP if the file is a Unity dump, or None for anything else (such as JSON).
+    Text dumps are recognized by their first line, raw dumps by their extension (see RAW_DUMP_EXTENSIONS).
+    """
+    with open(path, 'rb') as f:
+        head = f.read(_SNIFF_SIZE)
+    stripped = head.lstrip(b'\xef\xbb\xbf \t\r\n')
+    if not stripped or stripped[:1] in (b'{', b'['):
+        return None
+    if _TEXT_DUMP_START.match(stripped):
+        return TEXT_DUMP
+    if os.path.splitext(path)[1].lower() in RAW_DUMP_EXTENSIONS:
+        return RAW_DUMP
+    return None
+
+
+def load_dump(path, progress=None, batch_size=5000):
+    """
+    Loads the I2 LanguageSource of a text or raw Unity dump into a UnityDocument. progress(document,
+    bytes_read, total_bytes) is called after every batch of terms, like core.load_document does; it may raise
+    OperationCancelled. Raises ValueError if the file holds no I2 terms, or OSError.
+    """
+    with instrument.timed('load', path):
+        kind = dump_kind(path)
+        if kind is None:
+            raise ValueError(f"{path} is not a Unity dump.")
+        stat = os.stat(path)
+        document = UnityDocument(path)
+        if kind == TEXT_DUMP:
+            cells, first_cells = _read_text_dump(path, document, stat.st_size, progress, batch_size)
+        else:
+            cells, first_cells = _read_raw_dump(path, document, stat.st_size, progress, batch_size)
+        document.dump = DumpLayout(path, kind, cells, first_cells, (stat.st_size, stat.st_mtime_ns))
+        instrument.count('bytes_read', stat.st_size)
+        if progress:
+            progress(document, stat.st_size, stat.st_size)
+        return document
+
+
+class DumpLayout:
+    """
+    Where the translations of a document are stored in a dump: the byte span of every translation (the
+    text between the quotes of a text dump, the length, bytes and padding of a raw string), in row order.
+    The translations of row r are the cells first_cells[r] to first_cells[r + 1].
+    """
+    def __init__(self, path, kind, cells, first_cells, stat):
+        self.path = path
+        self.kind = kind
+        self.cells = cells  # array('q') holding the start and end byte offset of every translation.
+        self.first_cells = first_cells  # array('q') of len(rows) + 1 cell numbers.
+        self.stat = stat  # (size, mtime_ns) of the file the spans describe.
+
+    def is_current(self):
+        """
+        Returns True if the file is unchanged since the spans were recorded.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == self.stat
+
+    def encode(self, text):
+        """
+        Encodes a translation the way it is stored in the dump.
+        """
+        if self.kind == TEXT_DUMP:
+            return _escape(text).encode('utf-8', 'surrogatepass')
+        data = text.encode('utf-8', 'surrogatepass')
+        return _INT.pack(len(data)) + data + b'\0' * (-len(data) % 4)
+
+
+class UnityDocument(core.I2Document):
+    """
+    An I2Languages document loaded from a Unity dump (see load_dump). It is edited like any I2Document, and
+    save() writes a dump again, replacing only the translations of the edited terms.
+    """
+    def __init__(self, path):
+        super().__init__(None, core.TermStore(), core.TERMS_PATHS[0], path)
+        self.dump = None  # The DumpLayout of the file, once loaded.
+
+    def save(self, path=None, progress=None):
+        """
+        Copies the dump to path (by default the file it was loaded from), replacing the translations of the
+        edited terms. Returns the number of terms written. Raises ValueError if the dump changed on disk since
+        it was read or if a term has more translations than the dump has room for.
+        """
+        path = path or self.path
+        layout = self.dump
+        terms = self.terms
+        total = len(terms)
+        dirty = sorted(terms.dirty)
+        with instrument.timed('save', path):
+            if len(layout.first_cells) != total + 1:
+                raise ValueError("Terms can't be added to a Unity dump.")
+            if not layout.is_current():
+                raise ValueError(f"{layout.path} was changed on disk since it was opened. Open it again to edit it.")
+            patches = []
+            for row in dirty:
+                first, end = layout.first_cells[row], layout.first_cells[row + 1]
+                if terms.lengths[row] > end - first:
+                    raise ValueError(f"Term '{terms.key(row)}' has room for {end - first} translation(s) in the "
+                                     f"Unity dump; add languages to the LanguageSource in Unity first.")
+                for lang_index in range(end - first):
+                    patches.append((first + lang_index, layout.encode(terms.text(row, lang_index))))
+            cells = self._write_patches(path, layout, patches, progress)
+        if progress:
+            progress(total, total)
+        stat = os.stat(path)
+        self.dump = DumpLayout(path, layout.kind, cells, layout.first_cells, (stat.st_size, stat.st_mtime_ns))
+        terms.dirty -= set(dirty)
+        self.path = path
+        return len(dirty)
+
+    def _write_patches(self, path, layout, patches, progress):
+        """
+        Copies the dump to path with the given (cell, bytes) replacements, in cell order. Returns the new spans.
+        """
+        old_cells = layout.cells
+        cells = array('q')
+        delta = 0  # How far the cells after the last replaced one have moved.
+        copied = 0  # Cells before this one already have their new span.
+        size = 0
+        with core._atomic_writer(path) as f, open(layout.path, 'rb') as src:
+            for cell, data in patches:
+                start, end = old_cells[2 * cell], old_cells[2 * cell + 1]
+                core._copy_bytes(src, f, start - src.tell())
+                f.write(data)
+                src.seek(end)
+
+                cells.extend(core._shifted(old_cells[2 * copied:2 * cell], delta))
+                cells.append(start + delta)
+                cells.append(start + delta + len(data))
+                delta += len(data) - (end - start)
+                copied = cell + 1
+                size += len(data)
+                if progress and size >= 1 << 20:
+                    size = 0
+                    progress(0, len(self.terms))
+            core._copy_bytes(src, f, None)
+            cells.extend(core._shifted(old_cells[2 * copied:], delta))
+        instrument.count('bytes_written', layout.stat[0] + delta)
+        instrument.count('terms_serialized', len(patches))
+        return cells
+
+
+# --- Text dumps ---
+
+def _escape(text):
+    if '\\' not in text and '\r' not in text and '\n' not in text:
+        return text
+    return text.replace('\\', '\\\\').replace('\r', '\\r').replace('\n', '\\n')
+
+
+def _unescape(text):
+    if '\\' not in text:
+        return text
+    return _ESCAPED.sub(lambda match: _UNESCAPES.get(match.group(1), match.group(0)), text)
+
+
+def _parse_value(type_name, value, number):
+    """
+    Converts the value written after "=" on a field line.
+    """
+    if type_name == 'string':
+        if len(value) < 2 or value[0] != '"' or value[-1] != '"':
+            raise ValueError(f"Line {number}: unterminated string.")
+        return _unescape(value[1:-1])
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _read_text_dump(path, document, total_bytes, progress, batch_size):
+    """
+    Parses a text dump: the terms go to the document's TermStore and everything else to its skeleton, with
+    the structure of a JSON dump. Returns the cells and first_cells of its DumpLayout.
+    """
+    store = document.terms
+    cells = array('q')
+    first_cells = array('q', [0])
+    skeleton = None
+    stack = []  # (depth, container, name) of the open fields, innermost last.
+    terms = None  # The list of the mTerms array, once found.
+    term = None  # The term being read.
+    term_cells = []
+    offset = 0
+
+    def add_term():
+        store.append(term)
+        cells.extend(term_cells)
+        first_cells.append(len(cells) // 2)
+        del term_cells[:]
+        if progress and len(store) % batch_size == 0:
+            progress(document, offset, total_bytes)
+
+    with open(path, 'rb') as f:
+        for number, line in enumerate(f, 1):
+            line_start = offset
+            offset += len(line)
+            stripped = line.lstrip(b' ')
+            if stripped[:1] in (b'[', b'\r', b'\n', b''):
+                continue  # Array item numbers (the item follows on the next line) and blank lines.
+            depth = len(line) - len(stripped)
+            text = line.decode('utf-8', 'surrogatepass').rstrip('\r\n')
+            body = text[depth:]
+            match = _FIELD.match(body)
+            if match is None:
+                raise ValueError(f"Line {number}: unexpected text in the Unity dump.")
+            type_name, name, value = match.groups()
+            if skeleton is None:
+                skeleton = {}
+                stack.append((depth, skeleton, name))
+                continue
+            while stack and stack[-1][0] >= depth:
+                stack.pop()
+            if not stack:
+                raise ValueError(f"Line {number}: a second object in the Unity dump.")
+            parent = stack[-1][1]
+            if isinstance(parent, list) and name == 'size':
+                continue  # Arrays list their size before their items.
+
+            if value is not None:
+                item = _parse_value(type_name, value, number)
+                if (type_name == 'string' and term is not None and len(stack) >= 3 and stack[-3][1] is term
+                        and stack[-2][2] == 'Languages'):
+                    # The span of the text between the quotes.
+                    prefix = text[:depth + match.start(3) + 1].encode('utf-8', 'surrogatepass')
+                    term_cells.extend((line_start + len(prefix), line_start + len(line.rstrip(b'\r\n')) - 1))
+            else:
+                item = [] if type_name == 'Array' else {}
+            if parent is terms:
+                if term is not None:
+                    add_term()
+                term = item
+            elif isinstance(parent, list):
+                parent.append(item)
+            else:
+                parent[name] = item
+            if value is None:
+                if terms is None and type_name == 'Array' and stack[-1][2] == 'mTerms':
+                    terms = item
+                    document.terms_path = tuple(entry[2] for entry in stack[1:]) + ('Array',)
+                stack.append((depth, item, name))
+    if term is not None:
+        add_term()
+    if terms is None:
+        raise ValueError("Invalid Unity dump: could not find the 'mTerms' array of an I2 LanguageSource.")
+    document.skeleton = skeleton
+    return cells, first_cells
+
+
+# --- Raw dumps ---
+
+def _read_string(data, pos):
+    """
+    Reads an aligned string. Returns (text, end); raises ValueError (also for invalid UTF-8).
+    """
+    if pos + 4 > len(data):
+        raise ValueError("String beyond the end of the data.")
+    length = _INT.unpack_from(data, pos)[0]
+    end = pos + 4 + length
+    if length < 0 or end > len(data):
+        raise ValueError("Invalid string length.")
+    return data[pos + 4:end].decode('utf-8', 'surrogatepass'), end + (-end % 4)
+
+
+def _read_count(data, pos, limit=1 << 24):
+    if pos + 4 > len(data):
+        raise ValueError("Array beyond the end of the data.")
+    count = _INT.unpack_from(data, pos)[0]
+    if not 0 <= count <= limit:
+        raise ValueError("Invalid array size.")
+    return count, pos + 4
+
+
+def _read_terms(data, pos, layout, document, progress=None, batch_size=5000, limit=None):
+    """
+    Reads the mTerms list at pos with one TermData layout into the document, or only its first limit terms.
+    Returns (cells, first_cells, end). Raises ValueError as soon as a term does not fit the layout.
+    """
+    store = document.terms
+    cells = array('q')
+    first_cells = array('q', [0])
+    count, pos = _read_count(data, pos, len(data) // 16)
+    if not count:
+        raise ValueError("No terms.")
+    for _ in range(count if limit is None else min(count, limit)):
+        term = {}
+        for field in layout:
+            if field in ('Term', 'Description'):
+                term[field], pos = _read_string(data, pos)
+            elif field == 'TermType':
+                if pos + 4 > len(data):
+                    raise ValueError("Term beyond the end of the data.")
+                term[field] = _INT.unpack_from(data, pos)[0]
+                if not 0 <= term[field] < 64:
+                    raise ValueError("Invalid term type.")
+                pos += 4
+            elif field == 'Flags':
+                length, pos = _read_count(data, pos, 1024)
+                if pos + length > len(data):
+                    raise ValueError("Flags beyond the end of the data.")
+                term[field] = {'Array': list(data[pos:pos + length])}
+                pos += length + (-(pos + length) % 4)
+            else:
+                length, pos = _read_count(data, pos, 1024)
+                texts = []
+                for _ in range(length):
+                    start = pos
+                    text, pos = _read_string(data, pos)
+                    texts.append(text)
+                    if field == 'Languages':
+                        cells.append(start)
+                        cells.append(pos)
+                term[field] = {'Array': texts}
+        # Term keys are names: control characters (or an empty first term) mean other fields are being read
+        # as a term.
+        if _CONTROL_CHARACTERS.search(term['Term']) or \
+                not store.keys and not (term['Term'] and term['Languages']['Array']):
+            raise ValueError("Not a term.")
+        store.append(term)
+        first_cells.append(len(cells) // 2)
+        if progress and len(store) % batch_size == 0:
+            progress(document, pos, len(data))
+    return cells, first_cells, pos
+
+
+def _read_languages(data, pos, language_count):
+    """
+    Looks for the mLanguages list after mTerms. Returns its LanguageData entries, or None.
+    """
+    for prefix in _LANGUAGE_PREFIXES:
+        for flags_size in (4, 1):  # The byte of Flags is padded in most versions.
+            try:
+                start = pos
+                for field in prefix:
+                    start = _read_string(data, start)[1] if field == 'string' else start + 4
+                count, start = _read_count(data, start, 1024)
+                if count != language_count:
+                    continue
+                languages = []
+                for _ in range(count):
+                    name, start = _read_string(data, start)
+                    code, start = _read_string(data, start)
+                    if not name.strip() or len(code) > 16 or start + 1 > len(data):
+                        raise ValueError("Not a language.")
+                    languages.append({'Name': name, 'Code': code, 'Flags': data[start]})
+                    start += flags_size
+                return languages
+            except ValueError:
+                continue
+    return None
+
+
+def _read_raw_dump(path, document, total_bytes, progress, batch_size):
+    """
+    Parses a raw MonoBehaviour dump. Returns the cells and first_cells of its DumpLayout.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    starts = []
+    for header_size in _HEADER_SIZES:
+        try:
+            starts.append(_read_string(data, header_size)[1])
+        except ValueError:
+            pass
+    candidates = [start + step for start in starts for step in range(0, _SEARCH_WINDOW, 4)]
+    candidates.extend(range(0, min(len(data), 4096), 4))  # Unknown header: search the start of the data.
+    for pos in dict.fromkeys(candidates):
+        for layout in _TERM_LAYOUTS:
+            # Progress is only reported once the first terms have been read with a layout.
+            document.terms = core.TermStore()
+            try:
+                _read_terms(data, pos, layout, document, limit=_PROBE_TERMS)
+            except ValueError:
+                continue
+            document.terms = core.TermStore()
+            try:
+                cells, first_cells, end = _read_terms(data, pos, layout, document, progress, batch_size)
+            except ValueError:
+                continue
+            languages = _read_languages(data, end, document.language_count) or []
+            document.skeleton = {'mSource': {'mTerms': {'Array': []}, 'mLanguages': {'Array': languages}}}
+            return cells, first_cells
+    raise ValueError("Invalid Unity dump: could not find the 'mTerms' list of an I2 LanguageSource.")
@@ -0,0 +1,237 @@
+"""
+Workspaces: several I2Languages files edited together as one table.
+
+Games usually ship many LanguageSource-*.json assets. A Workspace loads them (in parallel, one process per
+file) and exposes the same interface as a single I2Document, with the terms of every file following each
+other. Each row remembers the file it came from, and saving only rewrites the files that were edited.
+"""
+import os
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import cache, core, instrument
+
+
+class _WorkspaceTerms:
+    """
+    Read-mostly view that makes the TermStores of all files look like a single store.
+    Columns and keys are concatenated on first use and kept; edits go to the store of the file owning the row
+    and to the kept column of their language.
+    """
+    def __init__(self, workspace):
+        self.workspace = workspace
+        self._keys = None
+        self._columns = {}  # lang_index -> concatenated column, once built.
+
+    def __len__(self):
+        return len(self.workspace)
+
+    @property
+    def language_count(self):
+        return self.workspace.language_count
+
+    @property
+    def keys(self):
+        if self._keys is None:
+            self._keys = [key for document in self.workspace.documents for key in document.terms.keys]
+        return self._keys
+
+    @property
+    def lengths(self):
+        lengths = array('l')
+        for document in self.workspace.documents:
+            lengths.extend(document.terms.lengths)
+        return lengths
+
+    @property
+    def columns(self):
+        return [self.column(lang_index) for lang_index in range(self.language_count)]
+
+    @property
+    def dirty(self):
+        """
+        The edited rows of every file, as workspace rows.
+        """
+        rows = set()
+        for start, document in zip(self.workspace.starts, self.workspace.documents):
+            rows.update(start + row for row in document.terms.dirty)
+        return rows
+
+    def column(self, lang_index):
+        """
+        Returns the list of translations of one language in every file (files without it give "").
+        The list belongs to the workspace and must not be modified.
+        """
+        column = self._columns.get(lang_index)
+        if column is None:
+            column = []
+            for document in self.workspace.documents:
+                if lang_index < document.language_count:
+                    column.extend(document.terms.column(lang_index))
+                else:
+                    column.extend([""] * len(document))
+            self._columns[lang_index] = column
+        return column
+
+    def text_changed(self, row, lang_index):
+        """
+        Brings the kept column of a language up to date after a row was edited.
+        """
+        column = self._columns.get(lang_index)
+        if column is not None:
+            column[row] = self.workspace.text(row, lang_index)
+
+    def key(self, row):
+        return self.workspace.key(row)
+
+    def has_text(self, row, lang_index):
+        return self.workspace.has_text(row, lang_index)
+
+    def text(self, row, lang_index):
+        return self.workspace.text(row, lang_index)
+
+    def set_text(self, row, lang_index, text):
+        return self.workspace.set_text(row, lang_index, text)
+
+
+class Workspace:
+    """
+    Several I2Documents presented as one. Rows are numbered across the files in the order they were given;
+    languages are matched by their index, as in the editor.
+    """
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self.starts = array('l')  # First workspace row of every document.
+        total = 0
+        for document in self.documents:
+            self.starts.append(total)
+            total += len(document)
+        self._length = total
+        self.terms = _WorkspaceTerms(self)
+        self.path = None  # A workspace has no single file; see paths.
+        self._term_index = None
+
+    @property
+    def paths(self):
+        return [document.path for document in self.documents]
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def language_count(self):
+        return max((document.language_count for document in self.documents), default=0)
+
+    def locate(self, row):
+        """
+        Returns the document holding a workspace row and the row's index inside that document.
+        """
+        index = bisect_right(self.starts, row) - 1
+        if index < 0 or row >= self._length:
+            raise IndexError(f"Row {row} is not in the workspace.")
+        return self.documents[index], row - self.starts[index]
+
+    def path_of(self, row):
+        """
+        Returns the file a row was loaded from.
+        """
+        return self.locate(row)[0].path
+
+    def key(self, row):
+        document, local_row = self.locate(row)
+        return document.key(local_row)
+
+    def has_text(self, row, lang_index):
+        document, local_row = self.locate(row)
+        return document.has_text(local_row, lang_index)
+
+    def text(self, row, lang_index):
+        document, local_row = self.locate(row)
+        return document.text(local_row, lang_index)
+
+    def set_text(self, row, lang_index, text):
+        document, local_row = self.locate(row)
+        result = document.set_text(local_row, lang_index, text)
+        self.terms.text_changed(row, lang_index)
+        return result
+
+    def term_index(self):
+        """
+        Returns the TermIndex of the keys of every file (a key used in several files maps to several rows).
+        """
+        if self._term_index is None:
+            self._term_index = core.TermIndex(self.key(row) for row in range(len(self)))
+        return self._term_index
+
+    def changed_documents(self):
+        """
+        Returns the documents that have edits which have not been saved yet.
+        """
+        return [document for document in self.documents if document.terms.dirty]
+
+    def save(self, path=None, progress=None):
+        """
+        Saves every edited file in place (unchanged files are not touched). Returns the number of terms serialized.
+        progress(terms_written, total_terms) counts the terms of the files being saved; it may raise
+        OperationCancelled, in which case the files saved so far keep their new contents.
+        """
+        if path is not None:
+            raise ValueError("A workspace is saved to the files it was loaded from.")
+        changed = self.changed_documents()
+        total = sum(len(document) for document in changed)
+        done = 0
+        serialized = 0
+        for document in changed:
+            def document_progress(written, document_total, done=done):
+                if progress:
+                    progress(done + written, total)
+            serialized += document.save(progress=document_progress)
+            done += len(document)
+        return serialized
+
+
+def load_workspace(paths, workers=None, progress=None):
+    """
+    Loads several I2Languages files into a Workspace, parsing them in parallel worker processes.
+
+    progress(files_loaded, total_files, path) is called as each file finishes; it may raise
+    OperationCancelled, which stops the files that have not started yet.
+    Raises ValueError naming the file if one of them can't be loaded.
+    """
+    paths = list(dict.fromkeys(paths))  # The same file twice would be saved over itself.
+    with instrument.timed('load_workspace', f"{len(paths)} files"):
+        if workers is None:
+            workers = min(len(paths), os.cpu_count() or 1)
+        documents = {}
+        if len(paths) < 2 or workers <= 1:
+            for path in paths:
+                documents[path] = _load(path)
+                if progress:
+                    progress(len(documents), len(paths), path)
+            return Workspace(documents[path] for path in paths)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_load, path): path for path in paths}
+            try:
+                for future in as_completed(futures):
+                    path = futures[future]
+                    documents[path] = future.result()
+                    if progress:
+                        progress(len(documents), len(paths), path)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return Workspace(documents[path] for path in paths)
+
+
+def _load(path):
+    """
+    Loads one file in a worker process (the document is sent back to the caller pickled).
+    Files opened before are read from the session cache.
+    """
+    try:
+        return cache.load_document(path)
+    except (ValueError, OSError) as e:
+        raise ValueError(f"{path}: {e}") from e
@@ -0,0 +1,79 @@
+"""
+Shared fixtures: small I2Languages files written to a temporary directory.
+"""
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def term(key, *texts):
+    """
+    Returns a term dict with the given key and translations, laid out like a Unity asset dump.
+    """
+    return {
+        "Term": key,
+        "TermType": 0,
+        "Description": "",
+        "Languages": {"Array": list(texts)},
+        "Flags": {"Array": [0] * len(texts)},
+        "Languages_Touch": {"Array": [""] * len(texts)},
+    }
+
+
+def source_data(terms):
+    """
+    Returns the JSON structure of a LanguageSource holding a copy of the given terms.
+    """
+    return {
+        "m_GameObject": {"m_FileID": 0, "m_PathID": 0},
+        "m_Enabled": 1,
+        "m_Name": "",
+        "mSource": {
+            "UserAgreesToHaveItOnTheScene": 0,
+            "mTerms": {"Array": copy.deepcopy(terms)},
+            "CaseInsensitiveTerms": 0,
+            "mLanguages": {"Array": [{"Name": "English", "Code": "en", "Flags": 0},
+                                     {"Name": "French", "Code": "fr", "Flags": 0}]},
+        },
+    }
+
+
+# Terms used by most tests: two languages, a repeated key and texts with escapes and non-ASCII characters.
+TERMS = [
+    term("Menu/Start", "Start", "Démarrer"),
+    term("Menu/Quit", "Quit", "Quitter"),
+    term("Dialog/Hello", "Hello\n\"friend\"", "Bonjour\n« ami »"),
+    term("Menu/Quit", "Exit", "Sortir"),
+    term("Items/Sword", "Sword {0}", ""),
+]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Keeps the session cache of the files loaded by a test (see i2editor.cache) in its temporary directory.
+    """
+    from i2editor import cache
+    directory = str(tmp_path / "cache")
+    monkeypatch.setattr(cache, 'CACHE_DIR', directory)
+    return directory
+
+
+@pytest.fixture
+def write_source(tmp_path):
+    """
+    Returns a function that writes a JSON file with the given terms (TERMS by default) and returns its path.
+    Keyword arguments are passed to json.dumps; the default is the 2-space layout of asset dump tools.
+    """
+    def write(terms=None, name="source.json", **dump_args):
+        dump_args.setdefault('indent', 2)
+        dump_args.setdefault('ensure_ascii', False)
+        path = tmp_path / name
+        path.write_bytes(json.dumps(source_data(TERMS if terms is None else terms), **dump_args).encode('utf-8'))
+        return str(path)
+    return write
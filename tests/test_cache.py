@@ -0,0 +1,78 @@
+import os
+
+from i2editor import cache, core
+
+from conftest import term
+
+
+def _same_terms(a, b):
+    return len(a) == len(b) and all(a.terms.term_data(row) == b.terms.term_data(row) for row in range(len(a)))
+
+
+def test_round_trip(write_source):
+    terms = [term("a", "x", "é\ud800"), {"Term": None, "Languages": {"Array": [None, 5]}}, term("c", "", "z")]
+    path = write_source(terms, ensure_ascii=True)  # The lone surrogate is written as \ud800.
+    doc = core.load_document(path)
+    assert cache.write_cache(doc) == cache.cache_path(path)
+
+    cached = cache.read_cache(path)
+    assert cached is not None and cached is not doc
+    assert _same_terms(cached, doc)
+    assert cached.skeleton == doc.skeleton
+    assert cached.text(0, 1) == "é\ud800"
+    assert cached.key(1) == core.NO_TERM_KEY and cached.terms.columns[1][1] == 5
+
+
+def test_cached_document_saves_incrementally(write_source, tmp_path):
+    path = write_source(indent='\t')
+    cache.write_cache(core.load_document(path))
+    doc = cache.load_document(path)
+    doc.set_text(0, 1, "Commencer")
+    assert doc.save(str(tmp_path / "out.json")) == 1
+    saved = core.load_document(str(tmp_path / "out.json"))
+    assert saved.text(0, 1) == "Commencer" and saved.text(2, 0) == "Hello\n\"friend\""
+
+
+def test_changed_file_invalidates_the_cache(write_source):
+    path = write_source()
+    cache.write_cache(core.load_document(path))
+    write_source(indent=4)
+    assert cache.read_cache(path) is None
+    doc = cache.load_document(path)  # Parsed again and cached again.
+    assert cache.read_cache(path) is not None and len(doc) == 5
+
+
+def test_touched_file_is_checked_by_hash(write_source):
+    path = write_source()
+    cache.write_cache(core.load_document(path))
+    os.utime(path, ns=(1, 1))
+    assert cache.read_cache(path) is not None
+
+    with open(path, 'r+b') as f:  # Same size and time, different contents.
+        data = f.read()
+        f.seek(0)
+        f.write(data.replace(b"Quitter", b"Sortie!"))
+    os.utime(path, ns=(1, 1))
+    assert cache.read_cache(path) is None
+
+
+def test_unsaved_or_damaged_caches_are_not_used(write_source):
+    path = write_source()
+    doc = core.load_document(path)
+    doc.set_text(0, 0, "Go")
+    assert cache.write_cache(doc) is None
+
+    cache.write_cache(core.load_document(path))
+    with open(cache.cache_path(path), 'r+b') as f:
+        f.truncate(100)
+    assert cache.read_cache(path) is None
+
+
+def test_prune_removes_the_oldest_caches(write_source):
+    paths = [write_source(name=f"file{index}.json") for index in range(3)]
+    for index, path in enumerate(paths):
+        cache.write_cache(core.load_document(path))
+        os.utime(cache.cache_path(path), (index, index))
+    size = os.path.getsize(cache.cache_path(paths[0]))
+    cache.prune(limit=2 * size)
+    assert [os.path.exists(cache.cache_path(path)) for path in paths] == [False, True, True]
@@ -0,0 +1,62 @@
+from i2editor import checks, core
+
+from conftest import term
+
+
+def test_tags_are_balanced():
+    assert checks.scan("plain text") == ([], {})
+    assert checks.scan("<b>bold</b> <size=18>big</size> a<br>b <sprite=3/> a < b")[0] == []
+    assert checks.scan("<b><i>x</b>")[0] == ["<i> is not closed"]
+    assert checks.scan("x</color> <B>y")[0] == ["</color> has no opening tag", "<b> is not closed"]
+
+
+def test_placeholders_must_match_the_source():
+    source = "{0} has {1:N0} gold, %s {[PLAYER]}"
+    assert checks.check_text("{1:N0} or {0}, %s {[PLAYER]}", source) == []
+    assert checks.check_text("{0} {0} has gold %s {[PLAYER]}", source) == \
+        [(checks.MISSING_PLACEHOLDER, "{1:N0}"), (checks.EXTRA_PLACEHOLDER, "{0}")]
+
+
+def test_empty_translations():
+    assert checks.check_text("", "Source") == [(checks.EMPTY, "")]
+    assert checks.check_text("", "") == []
+    # Only the tags of a source text are checked.
+    assert checks.check_text("<b>{0}", None) == [(checks.UNBALANCED_TAG, "<b> is not closed")]
+
+
+def test_checker_finds_and_rechecks_issues(write_source):
+    doc = core.load_document(write_source([
+        term("a", "Hello {0}", "Bonjour"),
+        term("b", "<b>Bold</b>", "<b>Gras"),
+        term("c", "Quit", ""),
+        term("d", "Fine", "Bien"),
+    ]))
+    progress = []
+    checker = checks.Checker(doc, chunk_size=3)
+    assert checker.check_all(lambda done, total: progress.append((done, total))) == [
+        checks.Issue(0, 1, checks.MISSING_PLACEHOLDER, "{0}"),
+        checks.Issue(1, 1, checks.UNBALANCED_TAG, "<b> is not closed"),
+        checks.Issue(2, 1, checks.EMPTY, ""),
+    ]
+    assert progress == [(3, 4), (4, 4)]
+    assert checker.counts() == {checks.MISSING_PLACEHOLDER: 1, checks.UNBALANCED_TAG: 1, checks.EMPTY: 1}
+
+    doc.set_text(0, 1, "Bonjour {0}")
+    assert checker.recheck(0, 1)
+    assert not checker.recheck(0, 1)
+    doc.set_text(3, 1, "<i>Bien")
+    assert checker.recheck(3, 1)
+    assert [(issue.row, issue.kind) for issue in checker.issues()] == \
+        [(1, checks.UNBALANCED_TAG), (2, checks.EMPTY), (3, checks.UNBALANCED_TAG)]
+
+
+def test_edited_source_rechecks_every_translation(write_source):
+    doc = core.load_document(write_source([term("a", "Sword", "Épée {0}")]))
+    checker = checks.Checker(doc)
+    assert checker.check_all() == [checks.Issue(0, 1, checks.EXTRA_PLACEHOLDER, "{0}")]
+    doc.set_text(0, 0, "Sword {0}")
+    assert checker.recheck(0, 0)
+    assert checker.issues() == []
+    doc.set_text(0, 0, "<b>Sword {0}")
+    assert checker.recheck(0, 0)
+    assert checker.issues() == [checks.Issue(0, 0, checks.UNBALANCED_TAG, "<b> is not closed")]
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from i2editor import core
+
+from conftest import term
+
+
+@pytest.mark.parametrize('dump_args', [
+    {},
+    {'indent': '\t', 'ensure_ascii': True},
+    {'indent': None, 'separators': (',', ':')},
+])
+def test_save_without_edits_is_byte_identical(write_source, tmp_path, dump_args):
+    path = write_source(**dump_args)
+    doc = core.load_document(path)
+    out = str(tmp_path / "out.json")
+
+    assert doc.save(out) == 0
+    with open(path, 'rb') as original, open(out, 'rb') as saved:
+        assert saved.read() == original.read()
+
+
+def test_streaming_and_full_parse_agree(write_source):
+    path = write_source()
+    streamed = core.load_document(path)
+    parsed = core.load_document(path, stream=False)
+    assert len(streamed) == len(parsed) == 5
+    for row in range(len(parsed)):
+        assert streamed.terms.term_data(row) == parsed.terms.term_data(row)
+    assert streamed.skeleton == parsed.skeleton
+
+
+def _save_and_read_terms(terms, write_source, edits):
+    path = write_source(terms)
+    doc = core.load_document(path)
+    for row, lang_index, text in edits:
+        doc.set_text(row, lang_index, text)
+    doc.save()
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['mSource']['mTerms']['Array']
+
+
+def test_edited_languages_keep_their_field_order(write_source):
+    terms = [{"Term": "a", "Languages": {"Array": ["x"], "Extra": 1}, "Flags": {"Array": [0]}},
+             {"Term": "b", "Languages": {"Extra": 2, "Array": ["y"]}}]
+    saved = _save_and_read_terms(terms, write_source, [(0, 0, "x2"), (1, 0, "y2")])
+    assert list(saved[0]['Languages'].items()) == [("Array", ["x2"]), ("Extra", 1)]
+    assert list(saved[1]['Languages'].items()) == [("Extra", 2), ("Array", ["y2"])]
+
+
+def test_edit_of_a_term_without_languages_is_saved(write_source):
+    terms = [{"Term": "a", "Languages": {"Array": ["x"]}},
+             {"Term": "b", "TermType": 0, "Flags": {"Array": [0]}},
+             {"Term": "c", "Languages": None}]
+    saved = _save_and_read_terms(terms, write_source, [(1, 0, "new"), (2, 1, "z")])
+    assert saved[1] == {"Term": "b", "TermType": 0, "Languages": {"Array": ["new"]}, "Flags": {"Array": [0]}}
+    assert list(saved[1]) == ["Term", "TermType", "Languages", "Flags"]
+    assert saved[2] == {"Term": "c", "Languages": {"Array": ["", "z"]}}
+
+
+def test_null_translations_read_as_empty(write_source):
+    doc = core.load_document(write_source([{"Term": "a", "Languages": {"Array": [None, "x"]}}]))
+    assert doc.text(0, 0) == ""
+    assert doc.text(0, 1) == "x"
+    assert doc.has_text(0, 1) and not doc.has_text(0, 2)
+
+
+def test_term_index_keeps_every_row_of_a_duplicated_key():
+    index = core.TermIndex(["a", "b", "a", None, "c", "a"])
+    assert len(index) == 6
+    assert index.rows("a") == (0, 2, 5)
+    assert index.rows("b") == (1,)
+    assert index.rows("missing") == ()
+    assert index.first("a") == 0 and index.first("c") == 4 and index.first("missing") is None
+    assert "c" in index and "missing" not in index
+    assert list(index) == ["a", "b", None, "c"]
+    assert index.duplicates() == {"a": [0, 2, 5]}
+
+
+def test_document_index_uses_the_placeholder_for_missing_keys(write_source):
+    doc = core.load_document(write_source([term("a", "x"), {"Languages": {"Array": ["y"]}}, term("a", "z")]))
+    index = doc.term_index()
+    assert index.rows("a") == (0, 2)
+    assert index.rows(core.NO_TERM_KEY) == (1,)
@@ -0,0 +1,74 @@
+import pytest
+
+from i2editor import core, diff
+
+from conftest import term
+
+
+BASE = [term("A", "Start", "Démarrer", "Start"), term("B", "Quit", "Quitter", "Beenden"),
+        term("C", "Sword", "Épée", "Schwert"), term("D", "Old", "Vieux", "Alt")]
+# The translator's copy: edits in French and German, one of them to a text the new build changed as well.
+OURS = [term("A", "Start", "Commencer", "Start"), term("B", "Quit", "Quitter", "Verlassen"),
+        term("C", "Sword", "Lame", "Schwert"), term("D", "Old", "Vieux", "Alt")]
+# The new build: a changed source text, a changed translation, D removed and E added.
+THEIRS = [term("A", "Start", "Démarrer", "Start"), term("B", "Quit game", "Quitter", "Beenden"),
+          term("C", "Sword", "Glaive", "Schwert"), term("E", "New", "", "")]
+
+
+@pytest.fixture
+def load(write_source):
+    def load(terms, name):
+        return core.load_document(write_source(terms, name))
+    return load
+
+
+def test_diff_classifies_every_term(load):
+    result = diff.diff_documents(load(BASE, "base.json"), load(THEIRS, "theirs.json"))
+    assert result.changes == [
+        diff.TermChange(diff.SOURCE_CHANGED, "B", 1, 1, (0,)),
+        diff.TermChange(diff.TRANSLATION_CHANGED, "C", 2, 2, (1,)),
+        diff.TermChange(diff.ADDED, "E", None, 3, ()),
+        diff.TermChange(diff.REMOVED, "D", 3, None, ()),
+    ]
+    assert result.unchanged == 1
+    assert diff.summarize(result.changes) == "1 added, 1 removed, 1 source changed, 1 translation changed"
+    assert diff.summarize([]) == "no differences"
+
+
+def test_duplicated_keys_are_aligned_by_occurrence(load):
+    old = load([term("K", "a"), term("X", "x"), term("K", "b")], "old.json")
+    new = load([term("K", "a"), term("K", "b"), term("K", "c")], "new.json")
+    assert diff.align(old, new) == ([(0, 0), (2, 1)], [1], [2])
+    assert [change.kind for change in diff.diff_documents(old, new).changes] == [diff.ADDED, diff.REMOVED]
+
+
+def test_three_way_merge_detects_conflicts(load):
+    theirs = load(THEIRS, "theirs.json")
+    result = diff.merge_documents(load(OURS, "ours.json"), theirs, load(BASE, "base.json"))
+    assert result.edits == [(0, 1, "Commencer"), (1, 2, "Verlassen"), (2, 1, "Lame")]
+    assert result.changes == [
+        diff.TermChange(diff.TRANSLATION_CHANGED, "A", 0, 0, (1,)),
+        diff.TermChange(diff.SOURCE_CHANGED, "B", 1, 1, (0, 2)),
+        diff.TermChange(diff.CONFLICT, "C", 2, 2, (1,)),
+        diff.TermChange(diff.ADDED, "E", None, 3, ()),
+        diff.TermChange(diff.REMOVED, "D", 3, None, ()),
+    ]
+    # Theirs is modified in place; its source texts and terms are kept.
+    assert [theirs.text(row, 1) for row in range(4)] == ["Commencer", "Quitter", "Lame", ""]
+    assert theirs.text(1, 0) == "Quit game" and theirs.text(1, 2) == "Verlassen"
+
+
+def test_changes_of_the_build_alone_are_kept(load):
+    base = load(BASE, "base.json")
+    theirs = load(THEIRS, "theirs.json")
+    result = diff.merge_documents(load(BASE, "ours.json"), theirs, base)
+    assert result.edits == []
+    assert theirs.text(2, 1) == "Glaive"
+
+
+def test_two_way_merge_takes_every_translation_of_ours(load):
+    theirs = load(THEIRS, "theirs.json")
+    result = diff.merge_documents(load(OURS, "ours.json"), theirs)
+    assert result.edits == [(0, 1, "Commencer"), (1, 2, "Verlassen"), (2, 1, "Lame")]
+    assert [change.kind for change in result.changes] == \
+        [diff.TRANSLATION_CHANGED, diff.SOURCE_CHANGED, diff.TRANSLATION_CHANGED, diff.ADDED, diff.REMOVED]
@@ -0,0 +1,61 @@
+import csv
+
+import pytest
+
+from i2editor import core, exchange
+
+
+@pytest.mark.parametrize('name', ["terms.csv", "terms.tsv", "terms.xlf", "terms.po"])
+def test_reimporting_an_export_changes_nothing(write_source, tmp_path, name):
+    doc = core.load_document(write_source())
+    path = str(tmp_path / name)
+    exchange.export_file(doc, path, source_lang=0, target_lang=1)
+
+    result = exchange.import_file(doc, path, target_lang=1)
+    assert result.edits == []
+    assert result.matched == len(doc)
+    assert result.new_keys == []
+    assert result.unmatched_keys == []
+
+
+def test_duplicated_keys_are_matched_by_occurrence(write_source, tmp_path):
+    doc = core.load_document(write_source())
+    path = str(tmp_path / "terms.csv")
+    exchange.export_file(doc, path)
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        records = list(csv.reader(f))
+    assert [record[0] for record in records[1:]].count("Menu/Quit") == 2
+
+    # Edit the second "Menu/Quit" record only, and add a third one.
+    second = [index for index, record in enumerate(records) if record[0] == "Menu/Quit"][1]
+    records[second][2] = "Fermer"
+    records.append(["Menu/Quit", "Leave", "Partir"])
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(records)
+
+    result = exchange.import_file(doc, path)
+    assert result.edits == [(3, 1, "Fermer")]
+    assert result.new_keys == ["Menu/Quit"]
+    assert result.matched == len(doc)
+
+
+def test_xliff_units_are_matched_by_id(write_source, tmp_path):
+    doc = core.load_document(write_source())
+    path = str(tmp_path / "terms.xlf")
+    doc.set_text(3, 1, "Fermer")
+    exchange.export_file(doc, path, source_lang=0, target_lang=1)
+    doc.set_text(3, 1, "Sortir")
+
+    # Units in reverse order still reach the row they were exported from.
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    head, _, rest = content.partition('  <unit ')
+    units = ['  <unit ' + unit for unit in rest.split('  <unit ')]
+    tail_start = units[-1].index('</unit>\n') + len('</unit>\n')
+    units[-1], tail = units[-1][:tail_start], units[-1][tail_start:]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(head + ''.join(reversed(units)) + tail)
+
+    result = exchange.import_file(doc, path, target_lang=1)
+    assert result.edits == [(3, 1, "Fermer")]
+    assert result.new_keys == []
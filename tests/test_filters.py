@@ -0,0 +1,32 @@
+from i2editor import core, filters
+
+from conftest import term
+
+# Rows 1 and 3 have no key ("Term": null), which real dumps contain.
+TERMS = [
+    term("Menu/Start", "Start", "Démarrer"),
+    term(None, "Orphan", ""),
+    term("Dialog/Hello", "Hello", "Bonjour"),
+    term(None, "Another orphan", "Autre"),
+    term("Abc", "Abc", "Abc"),
+]
+
+
+def test_missing_keys_read_as_placeholder(write_source):
+    doc = core.load_document(write_source(TERMS))
+    assert doc.key(1) == doc.key(3) == core.NO_TERM_KEY
+
+
+def test_key_pattern_with_missing_keys(write_source):
+    doc = core.load_document(write_source(TERMS))
+    assert filters.query_rows(doc, 0, pattern="^Menu/", search_keys=True) == [0]
+    assert filters.query_rows(doc, 0, pattern="NO TERM", search_keys=True) == [1, 3]
+
+
+def test_sort_by_key_with_missing_keys(write_source):
+    doc = core.load_document(write_source(TERMS))
+    expected = sorted(range(len(doc)), key=doc.key)
+    assert filters.query_rows(doc, 0, sort='key') == expected
+    # Sorting is stable: rows with the same key keep the order they were given in.
+    assert filters.sort_rows(doc, [4, 3, 2, 1, 0], sort='key') == [4, 2, 0, 3, 1]
+    assert filters.query_rows(doc, 1, status=filters.UNTRANSLATED, sort='key', descending=True) == [1]
@@ -0,0 +1,62 @@
+from i2editor.history import Edit, EditGroup, EditHistory
+
+
+def _step(row, text="x"):
+    return [Edit(row, 0, "", text)]
+
+
+def test_undo_and_redo_move_whole_steps():
+    history = EditHistory()
+    history.record("Replace All", [Edit(0, 0, "a", "b"), Edit(5, 1, "c", "d")])
+    history.record("Edit", _step(2))
+    assert history.undo_label() == "Edit" and history.redo_label() is None
+
+    assert history.undo().edits == tuple(_step(2))
+    group = history.undo()
+    assert group.label == "Replace All" and len(group.edits) == 2
+    assert not history.can_undo() and history.redo_label() == "Replace All"
+
+    assert history.redo() is group
+    assert history.undo_label() == "Replace All" and history.redo_label() == "Edit"
+
+
+def test_new_step_clears_redo():
+    history = EditHistory()
+    history.record("one", _step(0))
+    history.undo()
+    history.record("two", _step(1))
+    assert not history.can_redo()
+    assert history.undo_label() == "two"
+
+
+def test_empty_steps_are_not_recorded():
+    history = EditHistory()
+    assert history.record("nothing", [])
+    assert not history.can_undo()
+
+
+def test_oldest_steps_are_evicted_past_the_byte_cap():
+    step_size = EditGroup("s", _step(0, "x" * 1000)).size
+    history = EditHistory(max_bytes=3 * step_size)
+    for row in range(5):
+        assert history.record(f"step {row}", _step(row, "x" * 1000))
+    labels = []
+    while history.can_undo():
+        labels.append(history.undo().label)
+    assert labels == ["step 4", "step 3", "step 2"]
+
+
+def test_oldest_steps_are_evicted_past_the_step_cap():
+    history = EditHistory(max_steps=2)
+    for row in range(4):
+        history.record(f"step {row}", _step(row))
+    assert [history.undo().label, history.undo().label] == ["step 3", "step 2"]
+    assert not history.can_undo()
+
+
+def test_step_larger_than_the_cap_clears_the_history():
+    history = EditHistory(max_bytes=2000)
+    history.record("small", _step(0))
+    assert not history.record("huge", _step(1, "x" * 5000))
+    assert not history.can_undo() and not history.can_redo()
+    assert history.record("small again", _step(2))
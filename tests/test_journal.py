@@ -0,0 +1,64 @@
+from i2editor import core, journal
+
+
+def test_replay_ignores_a_truncated_last_line(write_source, tmp_path):
+    path = write_source()
+    directory = str(tmp_path / "journal")
+    log = journal.Journal(path, directory)
+    log.record(0, 1, "Menu/Start", "Commencer")
+    log.record(2, 0, "Dialog/Hello", "Hi\n\"you\"")
+    log.record(0, 1, "Menu/Start", "Lancer")
+    log.flush()
+    # A crash in the middle of the next write.
+    with open(log.path, 'ab') as f:
+        f.write(b'[4, 1, "Items/Sword", "\xc3\x89p')
+
+    header, records, valid_length = journal.read_journal(log.path)
+    assert header['file'] == log.source_path
+    assert len(records) == 3
+    assert valid_length == log.size
+
+    doc = core.load_document(path)
+    edits, skipped = journal.replay(doc, journal.Journal(path, directory).recoverable())
+    assert skipped == 0
+    assert edits == [(2, 0, "Hi\n\"you\""), (0, 1, "Lancer")]
+
+
+def test_resume_drops_the_truncated_line(write_source, tmp_path):
+    path = write_source()
+    directory = str(tmp_path / "journal")
+    log = journal.Journal(path, directory)
+    log.record(1, 1, "Menu/Quit", "Fermer")
+    log.flush()
+    with open(log.path, 'ab') as f:
+        f.write(b'[3, 1, "Menu/Qu')
+
+    resumed = journal.Journal(path, directory)
+    resumed.resume()
+    resumed.record(3, 1, "Menu/Quit", "Partir")
+    resumed.flush()
+
+    records = journal.read_journal(resumed.path)[1]
+    assert records == [(1, 1, "Menu/Quit", "Fermer"), (3, 1, "Menu/Quit", "Partir")]
+
+
+def test_records_of_another_term_are_skipped(write_source, tmp_path):
+    path = write_source()
+    doc = core.load_document(path)
+    edits, skipped = journal.replay(doc, [(1, 1, "Menu/Start", "Commencer"), (9, 0, "Gone", ""),
+                                          (1, 1, "Menu/Quit", "Fermer")])
+    assert edits == [(1, 1, "Fermer")]
+    assert skipped == 2
+
+
+def test_journal_of_a_changed_file_is_not_recovered(write_source, tmp_path):
+    path = write_source()
+    directory = str(tmp_path / "journal")
+    log = journal.Journal(path, directory)
+    log.record(0, 0, "Menu/Start", "Go")
+    log.flush()
+    assert journal.find_recoverable(directory)[0].edits == 1
+
+    write_source(indent=4)  # Saved by another program.
+    assert journal.Journal(path, directory).recoverable() == []
+    assert journal.find_recoverable(directory) == []
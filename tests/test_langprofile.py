@@ -0,0 +1,46 @@
+from i2editor import core, langprofile
+
+from conftest import term
+
+
+ENGLISH = ["Start the game", "You are not ready for this", "Open the door with your key", "Quit to the menu"]
+SPANISH = ["Empezar el juego", "No estás listo para la batalla", "Abre la puerta con la llave", "Salir al menú"]
+RUSSIAN = ["Начать игру", "Вы не готовы к этому", "Откройте дверь ключом", "Выйти в меню"]
+JAPANESE = ["ゲームを始める", "準備ができていません", "鍵でドアを開ける", "メニューに戻る"]
+
+
+def test_languages_are_guessed_from_scripts_and_stop_words():
+    guesses = [langprofile.profile_column(texts, lang_index).guess
+               for lang_index, texts in enumerate([ENGLISH, SPANISH, RUSSIAN, JAPANESE])]
+    assert guesses == ["en", "es", "ru", "ja"]
+
+
+def test_markup_and_unknown_words_give_no_guess():
+    profile = langprofile.profile_column(["<b>{0}</b>", "[PLAYER] {1:N0}", ""], 0)
+    assert profile.guess is None and profile.confidence == 0.0
+    assert profile.filled == 2 and profile.total == 3
+
+
+def test_non_text_cells_are_skipped():
+    profile = langprofile.profile_column([5, "abc", None, True, ""], 0)
+    assert profile.filled == 1
+    assert profile.characters == 3
+    assert profile.total == 5
+
+
+def test_declared_languages_take_precedence(write_source):
+    terms = [term(f"Key{row}", english, spanish) for row, (english, spanish) in enumerate(zip(ENGLISH, SPANISH))]
+    doc = core.load_document(write_source(terms))  # mLanguages declares English and French.
+    profile = langprofile.profile_document(doc)
+    assert [(column.name, column.code, column.declared) for column in profile.columns] == \
+        [("English", "en", True), ("French", "fr", True)]
+    assert profile.columns[1].guess == "es"
+    assert profile.english_index == 0
+    assert profile.display_names() == ["Language 1 - English (en)", "Language 2 - French (fr)"]
+    assert langprofile.get_profile(doc) is langprofile.get_profile(doc)
+
+
+def test_guessed_names_are_marked():
+    profile = langprofile.LanguageProfile([langprofile.profile_column(RUSSIAN, 0)], None)
+    assert profile.display_names() == ["Language 1 - Russian (ru?)"]
+    assert profile.index_of("ru") == 0 and profile.index_of("en") is None
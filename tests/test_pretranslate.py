@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from i2editor import core, pretranslate
+
+from conftest import term
+
+
+class RecordingBackend(pretranslate.Backend):
+    """
+    Translates with a function of the text, recording the batches it translated and how many ran at once.
+    """
+    name = "test backend"
+    batch_size = 2
+    max_concurrency = 2
+
+    def __init__(self, translate_text, protect_markup=True):
+        self.translate_text = translate_text
+        self.protect_markup = protect_markup
+        self.batches = []
+        self.running = self.most_running = 0
+        self.closed = False
+
+    async def translate(self, texts, source_lang, target_lang):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        self.batches.append((list(texts), source_lang, target_lang))
+        return [self.translate_text(text) for text in texts]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def doc(write_source):
+    return core.load_document(write_source([
+        term("a", "OK", ""),
+        term("b", "Back", ""),
+        term("c", "OK", ""),
+        term("d", "Hello <b>{0}</b>", ""),
+        term("e", "Quit", "Quitter"),
+        term("f", "  ", ""),
+        term("g", "Sword", ""),
+    ]))
+
+
+def test_unique_texts_are_translated_in_batches(doc):
+    backend = RecordingBackend(lambda text: text.upper())
+    progress = []
+    result = pretranslate.pretranslate(doc, 0, 1, backend, progress=lambda done, total: progress.append((done, total)))
+
+    assert sorted(batch for batch, _, _ in backend.batches) == [["Hello ⟦0⟧⟦1⟧⟦2⟧", "Sword"], ["OK", "Back"]]
+    assert backend.batches[0][1:] == ("en", "fr")
+    assert backend.most_running == 2
+    assert backend.closed
+    assert sorted(progress) == [(2, 4), (4, 4)]
+    # The markers are put back as the markup they replaced; the document itself is not modified.
+    assert sorted(result.edits) == [(0, 1, "OK"), (1, 1, "BACK"), (2, 1, "OK"), (3, 1, "HELLO <b>{0}</b>"),
+                                    (6, 1, "SWORD")]
+    assert (result.unique, result.translated, result.missing, result.rejected) == (4, 4, 0, 0)
+    assert doc.text(0, 1) == ""
+
+
+def test_overwrite_includes_translated_rows(doc):
+    assert list(pretranslate.collect(doc, 0, 1, overwrite=True)) == ["OK", "Back", "Hello <b>{0}</b>", "Quit", "Sword"]
+    assert pretranslate.collect(doc, 0, 1, rows=[0, 2, 4]) == {"OK": [0, 2]}
+
+
+def test_translations_with_broken_markers_are_rejected(doc):
+    translations = {"OK": "D'accord", "Back": "", "Hello ⟦0⟧⟦1⟧⟦2⟧": "Bonjour ⟦0⟧⟦1⟧", "Sword": None}
+    result = pretranslate.pretranslate(doc, 0, 1, RecordingBackend(translations.get))
+    assert result.edits == [(0, 1, "D'accord"), (2, 1, "D'accord")]
+    assert (result.unique, result.translated, result.missing, result.rejected) == (4, 1, 2, 1)
+
+
+def test_unprotected_translations_must_keep_the_markup(doc):
+    translations = {"Hello <b>{0}</b>": "Bonjour <b>{0}", "Sword": "Épée {0}", "OK": "OK"}
+    backend = RecordingBackend(translations.get, protect_markup=False)
+    result = pretranslate.pretranslate(doc, 0, 1, backend)
+    assert ["Hello <b>{0}</b>", "Sword"] in [batch for batch, _, _ in backend.batches]
+    assert result.edits == [(0, 1, "OK"), (2, 1, "OK")]
+    assert result.rejected == 2
+
+
+def test_progress_can_cancel_the_batches(doc):
+    class Cancelled(Exception):
+        pass
+
+    def progress(done, total):
+        raise Cancelled
+
+    backend = RecordingBackend(str.upper)
+    backend.max_concurrency = 1
+    with pytest.raises(Cancelled):
+        pretranslate.pretranslate(doc, 0, 1, backend, progress=progress)
+    assert len(backend.batches) == 1
+    assert backend.closed
+
+
+def test_glossary_matches_markup_by_position(doc):
+    backend = pretranslate.DictionaryBackend({"ok": "D'accord", "Hello <i>{0}</i>": "Bonjour <i>{0}</i> !"})
+    result = pretranslate.pretranslate(doc, 0, 1, backend)
+    assert sorted(result.edits) == [(0, 1, "D'accord"), (2, 1, "D'accord"), (3, 1, "Bonjour <b>{0}</b> !")]
+    assert (result.translated, result.missing) == (2, 2)
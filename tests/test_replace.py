@@ -0,0 +1,47 @@
+import re
+
+import pytest
+
+from i2editor import core, replace
+
+from conftest import term
+
+
+TEXTS = ["Start the game", "Restart", None, "start START", "", 5]
+
+
+def test_plain_query_is_literal_and_case_insensitive():
+    changes = replace.plan_replacements(TEXTS, "start", "Go")
+    assert changes == [replace.Change(0, "Start the game", "Go the game", 1),
+                       replace.Change(1, "Restart", "ReGo", 1),
+                       replace.Change(3, "start START", "Go Go", 2)]
+    assert replace.plan_replacements(["a.b", "axb"], ".", "-") == [replace.Change(0, "a.b", "a-b", 1)]
+
+
+def test_whole_word_and_match_case():
+    changes = replace.plan_replacements(TEXTS, "start", "Go", whole_word=True, match_case=True)
+    assert changes == [replace.Change(3, "start START", "Go START", 1)]
+
+
+def test_regex_replacement_uses_groups():
+    changes = replace.plan_replacements(["{0} of {1}", "none"], r"\{(\d)\}", r"<\1>", regex=True)
+    assert changes == [replace.Change(0, "{0} of {1}", "<0> of <1>", 2)]
+    with pytest.raises(re.error):
+        replace.plan_replacements(TEXTS, "(", "x", regex=True)
+
+
+def test_literal_replacement_is_not_a_template():
+    assert replace.plan_replacements(["cost"], "cost", r"\1 $") == [replace.Change(0, "cost", r"\1 $", 1)]
+
+
+def test_rows_limit_the_search():
+    assert [change.row for change in replace.plan_replacements(TEXTS, "start", "Go", rows=[3, 2, 5])] == [3]
+
+
+def test_apply_changes_edits_the_document(write_source):
+    doc = core.load_document(write_source([term("a", "Start", "Démarrer"), term("b", "Restart", "Recommencer")]))
+    changes = replace.plan_replacements(doc.terms.column(0), "start", "Begin")
+    assert doc.text(0, 0) == "Start"  # Planning changes nothing.
+    assert replace.apply_changes(doc, 0, changes) == 2
+    assert [doc.text(row, 0) for row in range(2)] == ["Begin", "ReBegin"]
+    assert doc.terms.dirty == {0, 1}
@@ -0,0 +1,56 @@
+import json
+
+from i2editor import core
+
+from conftest import TERMS, source_data
+
+
+def test_incremental_save_serializes_only_edited_terms(write_source):
+    path = write_source()
+    doc = core.load_document(path)
+    doc.set_text(1, 1, "Quitter le jeu")
+    doc.set_text(2, 0, "Hi\\there")
+
+    assert doc.save() == 2
+    expected = source_data(TERMS)
+    expected['mSource']['mTerms']['Array'][1]['Languages']['Array'][1] = "Quitter le jeu"
+    expected['mSource']['mTerms']['Array'][2]['Languages']['Array'][0] = "Hi\\there"
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == expected
+    assert not doc.terms.dirty
+
+    # A second save starts from the file written by the first one.
+    doc.set_text(4, 1, "Épée {0}")
+    assert doc.save() == 1
+    reloaded = core.load_document(path)
+    assert [reloaded.text(row, 1) for row in range(len(reloaded))] == \
+        ["Démarrer", "Quitter le jeu", "Bonjour\n« ami »", "Sortir", "Épée {0}"]
+    assert reloaded.text(2, 0) == "Hi\\there"
+
+
+def test_unedited_terms_keep_their_bytes(write_source):
+    path = write_source(indent='\t', ensure_ascii=True)
+    with open(path, 'rb') as f:
+        original = f.read()
+    doc = core.load_document(path)
+    doc.set_text(0, 1, "Commencer")
+    doc.save()
+
+    with open(path, 'rb') as f:
+        saved = f.read()
+    # Only the edited term differs; the rest, including the \u escapes of the other terms, is copied.
+    start = original.index(b'"Menu/Quit"')
+    assert saved.endswith(original[start:])
+    assert b'Bonjour\\n\\u00ab ami \\u00bb' in saved
+
+
+def test_file_changed_on_disk_is_written_in_full(write_source, tmp_path):
+    path = write_source()
+    doc = core.load_document(path)
+    doc.set_text(0, 1, "Commencer")
+    write_source(indent=4)  # Rewritten by another program: the byte spans no longer match.
+
+    assert doc.save() == len(doc)
+    reloaded = core.load_document(path)
+    assert reloaded.text(0, 1) == "Commencer"
+    assert reloaded.text(3, 0) == "Exit"
@@ -0,0 +1,47 @@
+from i2editor import core, search
+
+from conftest import term
+
+
+TEXTS = ["Start the game", "Quit", None, "Restart LEVEL", "", "Gamepad settings", "star"]
+
+
+def _scan(texts, query):
+    query = query.casefold()
+    return [row for row, text in enumerate(texts) if isinstance(text, str) and query in text.casefold()]
+
+
+def test_search_matches_a_full_scan():
+    index = search.SearchIndex(TEXTS)
+    for query in ["star", "START", "game", "t", "ar", "level", "restart level", "missing", "settings"]:
+        assert index.search(query) == _scan(TEXTS, query), query
+    assert index.search("") == []
+    assert index.count("game") == 2
+
+
+def test_update_moves_the_row_between_postings():
+    texts = list(TEXTS)
+    index = search.SearchIndex(texts)
+    for row, text in [(1, "Quit the game"), (0, "Begin"), (2, "Start over"), (5, ""), (1, "Quit the game")]:
+        texts[row] = text
+        index.update(row, text)
+        for query in ["game", "start", "begin", "over", "quit", "settings"]:
+            assert index.search(query) == _scan(texts, query), (row, text, query)
+    # Postings of trigrams that no longer occur anywhere are dropped.
+    assert "set" not in index.postings
+
+
+def test_indexes_are_built_on_first_use_and_follow_edits(write_source):
+    doc = core.load_document(write_source([term("a", "Hello", "Bonjour"), term("b", None, "Salut")]))
+    indexes = search.SearchIndexes(doc)
+    indexes.update(0, 1, "Bonsoir")  # Not built yet: nothing to update.
+    assert not indexes.is_built(1)
+
+    doc.set_text(0, 1, "Bonsoir")
+    assert indexes.search(1, "bon") == [0]
+    assert indexes.is_built(1) and not indexes.is_built(0)
+    assert indexes.search(0, "hel") == [0]
+
+    doc.set_text(1, 0, "Hello again")
+    indexes.update(1, 0, "Hello again")
+    assert indexes.search(0, "hello") == [0, 1]
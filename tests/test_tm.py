@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from i2editor import bench, core, tm
+
+from conftest import term
+
+
+@pytest.fixture
+def memory(tmp_path):
+    with tm.TranslationMemory(str(tmp_path / "tm.sqlite3")) as memory:
+        yield memory
+
+
+TERMS = [
+    term("Menu/Start", "Start the game", "Commencer la partie"),
+    term("Menu/Quit", "Quit the game", "Quitter la partie"),
+    term("Menu/Options", "Options", "Options"),
+    term("Dialog/Door", "The door is locked.", "La porte est verrouillée."),
+    term("Menu/Empty", "Untranslated", ""),
+]
+
+
+def test_exact_and_fuzzy_suggestions(memory, write_source):
+    doc = core.load_document(write_source(TERMS))
+    memory.add_document(doc)
+    assert len(memory) == 9  # The empty translation is skipped.
+
+    exact = memory.suggest("en", "  start THE game ", "fr")
+    assert exact[0] == tm.Suggestion(1.0, "Start the game", "Commencer la partie", "Menu/Start", doc.path)
+    fuzzy = memory.suggest("en", "The door is locked!", "fr")
+    assert fuzzy[0].target == "La porte est verrouillée." and 0.8 < fuzzy[0].score < 1.0
+    assert memory.suggest("en", "Untranslated", "fr") == []
+    assert memory.suggest("en", "Start the game", "fr", exclude=(doc.path, "Menu/Start"))[0].key == "Menu/Quit"
+
+
+def test_exact_matches_for_a_column(memory, write_source):
+    memory.add_document(core.load_document(write_source(TERMS)))
+    assert memory.exact_matches("en", ["options", "Quit the game", "Unknown", ""], "fr") == \
+        ["Options", "Quitter la partie", None, None]
+
+
+def test_readding_a_file_replaces_its_segments(memory, write_source):
+    path = write_source(TERMS)
+    memory.add_document(core.load_document(path))
+    assert memory.is_current(path)
+
+    changed = [term("Menu/Start", "Start the game", "Lancer la partie")]
+    os.utime(write_source(changed), ns=(1, 1))
+    assert not memory.is_current(path)
+    memory.add_document(core.load_document(path))
+    assert len(memory) == 2
+    assert [s.target for s in memory.suggest("en", "Start the game", "fr")] == ["Lancer la partie"]
+
+    memory.remove(path)
+    assert len(memory) == 0
+
+
+def test_cancelled_update_leaves_the_memory_unchanged(memory, write_source):
+    doc = core.load_document(write_source(TERMS))
+
+    def cancel(done, total):
+        raise core.OperationCancelled()
+    with pytest.raises(core.OperationCancelled):
+        memory.add_document(doc, progress=cancel, batch_size=2)
+    assert len(memory) == 0
+
+
+def test_lsh_finds_near_duplicates(memory, write_source):
+    # Sentences of ~60 characters; every query differs from its original by one word.
+    terms = bench.generate_terms(200, 2, length=60, seed=1, empty_rate=0, identical_rate=0)
+    doc = core.load_document(write_source(terms))
+    memory.add_document(doc)
+
+    found = 0
+    queries = range(0, 200, 5)
+    for row in queries:
+        words = doc.text(row, 0).split()
+        words[len(words) // 2] = "dragon"
+        suggestions = memory.suggest("en", " ".join(words), "fr", limit=5, min_score=0.7)
+        found += any(suggestion.key == doc.key(row) for suggestion in suggestions)
+    assert found >= 0.95 * len(queries)
@@ -0,0 +1,93 @@
+import pytest
+
+from i2editor import core, unity
+
+from conftest import TERMS
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('\r', '\\r').replace('\n', '\\n')
+
+
+def text_dump(terms):
+    """
+    Returns a UABEA text dump ("Export Dump") of a LanguageSource holding the given terms.
+    """
+    lines = ["0 MonoBehaviour Base",
+             " 0 PPtr<GameObject> m_GameObject", "  0 int m_FileID = 0", "  0 SInt64 m_PathID = 0",
+             " 1 UInt8 m_Enabled = 1", ' 1 string m_Name = "LanguageSource"',
+             " 0 LanguageSourceData mSource", "  0 vector mTerms",
+             f"   1 Array Array ({len(terms)} items)", f"    0 int size = {len(terms)}"]
+    for index, data in enumerate(terms):
+        lines += [f"    [{index}]", "     0 TermData data", f'      1 string Term = "{_escape(data["Term"])}"',
+                  f"      0 int TermType = {data['TermType']}", "      0 vector Languages"]
+        texts = data['Languages']['Array']
+        lines += [f"       1 Array Array ({len(texts)} items)", f"        0 int size = {len(texts)}"]
+        for text_index, text in enumerate(texts):
+            lines += [f"        [{text_index}]", f'         1 string data = "{_escape(text)}"']
+        flags = data['Flags']['Array']
+        lines += ["      0 vector Flags", f"       1 Array Array ({len(flags)} items)",
+                  f"        0 int size = {len(flags)}"]
+        for flag_index, flag in enumerate(flags):
+            lines += [f"        [{flag_index}]", f"         0 UInt8 data = {flag}"]
+    lines += ["  1 UInt8 CaseInsensitiveTerms = 0"]
+    return ''.join(line + '\r\n' for line in lines).encode('utf-8')
+
+
+@pytest.fixture
+def dump_path(tmp_path):
+    path = tmp_path / "LanguageSource-resources.assets.txt"
+    path.write_bytes(text_dump(TERMS))
+    return str(path)
+
+
+def test_text_dump_is_read(dump_path):
+    assert unity.dump_kind(dump_path) == unity.TEXT_DUMP
+    doc = core.load_document(dump_path)
+    assert isinstance(doc, unity.UnityDocument)
+    assert [doc.key(row) for row in range(len(doc))] == [data['Term'] for data in TERMS]
+    assert doc.text(2, 0) == "Hello\n\"friend\""
+    assert doc.text(2, 1) == "Bonjour\n« ami »"
+
+
+def test_text_dump_is_patched_in_place(dump_path):
+    with open(dump_path, 'rb') as f:
+        original = f.read()
+    doc = core.load_document(dump_path)
+    doc.set_text(1, 1, "Fermer\nle jeu")
+    assert doc.save() == 1
+
+    with open(dump_path, 'rb') as f:
+        saved = f.read()
+    assert saved == original.replace(b'string data = "Quitter"', b'string data = "Fermer\\nle jeu"')
+
+    # The new spans are used by the next save.
+    doc.set_text(3, 1, "C:\\Partir")
+    doc.set_text(4, 1, "Épée {0}")
+    assert doc.save() == 2
+    reloaded = core.load_document(dump_path)
+    assert [reloaded.text(row, 1) for row in range(len(reloaded))] == \
+        ["Démarrer", "Fermer\nle jeu", "Bonjour\n« ami »", "C:\\Partir", "Épée {0}"]
+
+
+def test_dump_keeps_its_number_of_languages(dump_path):
+    doc = core.load_document(dump_path)
+    doc.set_text(0, 2, "Starten")
+    with pytest.raises(ValueError):
+        doc.save()
+
+
+def test_dump_changed_on_disk_is_not_overwritten(dump_path):
+    doc = core.load_document(dump_path)
+    doc.set_text(0, 1, "Commencer")
+    with open(dump_path, 'ab') as f:
+        f.write(b"  1 UInt8 Other = 0\r\n")
+    with pytest.raises(ValueError):
+        doc.save()
+
+
+def test_only_known_dumps_are_sniffed(tmp_path, write_source):
+    binary = tmp_path / "data.bin"
+    binary.write_bytes(b"\x01\x00\x00\x00binary\x00")
+    assert unity.dump_kind(str(binary)) is None
+    assert unity.dump_kind(write_source()) is None
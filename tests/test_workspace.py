@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from i2editor import core, workspace
+
+from conftest import term
+
+
+@pytest.fixture
+def paths(write_source):
+    first = write_source([term("Menu/Start", "Start", "Démarrer"), term("Menu/Quit", "Quit", "Quitter")], "a.json")
+    second = write_source([term("Menu/Start", "Begin"), term("Items/Sword", "Sword")], "b.json")
+    return first, second
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_rows_are_numbered_across_files(paths, workers):
+    ws = workspace.load_workspace(paths, workers=workers)
+    assert len(ws) == 4
+    assert ws.language_count == 2
+    assert [ws.key(row) for row in range(4)] == ["Menu/Start", "Menu/Quit", "Menu/Start", "Items/Sword"]
+    assert [ws.path_of(row) for row in range(4)] == [paths[0], paths[0], paths[1], paths[1]]
+    assert ws.term_index().rows("Menu/Start") == (0, 2)
+    with pytest.raises(IndexError):
+        ws.locate(4)
+
+
+def test_columns_fill_missing_languages_and_follow_edits(paths):
+    ws = workspace.load_workspace(paths, workers=1)
+    column = ws.terms.column(1)
+    assert column == ["Démarrer", "Quitter", "", ""]
+    assert ws.terms.column(1) is column  # Built once.
+
+    ws.set_text(3, 1, "Épée")
+    ws.set_text(0, 1, "Commencer")
+    assert ws.terms.column(1) == ["Commencer", "Quitter", "", "Épée"]
+    assert ws.terms.dirty == {0, 3}
+
+
+def test_save_writes_only_the_edited_files(paths):
+    ws = workspace.load_workspace(paths, workers=1)
+    ws.set_text(2, 0, "Go")
+    assert [document.path for document in ws.changed_documents()] == [paths[1]]
+    with open(paths[0], 'rb') as f:
+        untouched = f.read()
+
+    ws.save()
+    with open(paths[0], 'rb') as f:
+        assert f.read() == untouched
+    with open(paths[1], encoding='utf-8') as f:
+        assert json.load(f)['mSource']['mTerms']['Array'][0]['Languages']['Array'] == ["Go"]
+    assert not ws.terms.dirty
+    with pytest.raises(ValueError):
+        ws.save("elsewhere.json")
+
+
+def test_a_file_that_fails_to_load_is_named(paths, tmp_path):
+    broken = tmp_path / "broken.json"
+    broken.write_text("{", encoding='utf-8')
+    with pytest.raises(ValueError, match="broken.json"):
+        workspace.load_workspace([paths[0], str(broken)], workers=1)
+
+
+def test_the_same_file_is_loaded_once(paths):
+    ws = workspace.load_workspace([paths[0], paths[0], paths[1]], workers=1)
+    assert ws.paths == list(paths)